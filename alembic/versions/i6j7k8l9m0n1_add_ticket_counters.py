@@ -0,0 +1,44 @@
+"""add ticket_counters
+
+Revision ID: i6j7k8l9m0n1
+Revises: h5i6j7k8l9m0
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'i6j7k8l9m0n1'
+down_revision = 'h5i6j7k8l9m0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'ticket_counters',
+        sa.Column('id',               sa.Integer(),    primary_key=True, autoincrement=True),
+        sa.Column('hotel_id',         sa.Integer(),    nullable=False),
+        sa.Column('assigned_team_id', sa.Integer(),    nullable=False, server_default='0'),
+        sa.Column('status',           sa.String(20),   nullable=False),
+        sa.Column('progress',         sa.String(30),   nullable=False),
+        sa.Column('priority',         sa.String(10),   nullable=False),
+        sa.Column('unassigned',       sa.Boolean(),    nullable=False, server_default='0'),
+        sa.Column('count',            sa.Integer(),    nullable=False, server_default='0'),
+        sa.UniqueConstraint(
+            'hotel_id', 'assigned_team_id', 'status', 'progress', 'priority', 'unassigned',
+            name='uq_ticket_counters_dims',
+        ),
+    )
+    # Carga inicial a partir dos tickets existentes
+    op.execute("""
+        INSERT INTO ticket_counters (hotel_id, assigned_team_id, status, progress, priority, unassigned, count)
+        SELECT hotel_id, COALESCE(assigned_team_id, 0), status, progress, priority,
+               assigned_to IS NULL, COUNT(*)
+        FROM tickets
+        GROUP BY hotel_id, COALESCE(assigned_team_id, 0), status, progress, priority, assigned_to IS NULL
+    """)
+
+
+def downgrade():
+    op.drop_table('ticket_counters')
@@ -0,0 +1,22 @@
+"""add tickets (created_at, id) index for keyset pagination
+
+Revision ID: j7k8l9m0n1o2
+Revises: i6j7k8l9m0n1
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+revision = 'j7k8l9m0n1o2'
+down_revision = 'i6j7k8l9m0n1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # status=all no modo cursor; com filtro de status o ix_tickets_status_created_at (+ PK) já atende
+    op.create_index('ix_tickets_created_at_id', 'tickets', ['created_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_tickets_created_at_id', table_name='tickets')
@@ -0,0 +1,24 @@
+"""add FULLTEXT indexes for ticket search
+
+Revision ID: k8l9m0n1o2p3
+Revises: j7k8l9m0n1o2
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+revision = 'k8l9m0n1o2p3'
+down_revision = 'j7k8l9m0n1o2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ft_tickets_title_description', 'tickets', ['title', 'description'], mysql_prefix='FULLTEXT')
+    # Usado só quando a busca pede search_comments=true
+    op.create_index('ft_ticket_comments_comment', 'ticket_comments', ['comment'], mysql_prefix='FULLTEXT')
+
+
+def downgrade():
+    op.drop_index('ft_ticket_comments_comment', table_name='ticket_comments')
+    op.drop_index('ft_tickets_title_description', table_name='tickets')
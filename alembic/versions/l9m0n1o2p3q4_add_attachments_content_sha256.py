@@ -0,0 +1,27 @@
+"""add content_sha256 to attachments (content-addressed storage)
+
+Revision ID: l9m0n1o2p3q4
+Revises: k8l9m0n1o2p3
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'l9m0n1o2p3q4'
+down_revision = 'k8l9m0n1o2p3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('attachments', sa.Column('content_sha256', sa.String(length=64), nullable=True))
+    op.create_index('ix_attachments_content_sha256', 'attachments', ['content_sha256'])
+    # Arquivos existentes continuam em TICKETS_DIR/<ticket_id> até rodar
+    # `python -m services.attachment_dedupe`
+
+
+def downgrade():
+    # Anexos já gravados em blobs/ deixam de ser encontrados pelo código anterior
+    op.drop_index('ix_attachments_content_sha256', table_name='attachments')
+    op.drop_column('attachments', 'content_sha256')
@@ -0,0 +1,30 @@
+"""add ticket_sla indexes for the SLA breach sweeper
+
+Revision ID: m0n1o2p3q4r5
+Revises: l9m0n1o2p3q4
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+revision = 'm0n1o2p3q4r5'
+down_revision = 'l9m0n1o2p3q4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # services/sla_sweeper: breached = 0 AND met_at IS NULL AND deadline <= agora (faixa)
+    op.create_index(
+        'ix_ticket_sla_response_sweep', 'ticket_sla',
+        ['response_breached', 'response_met_at', 'response_deadline'],
+    )
+    op.create_index(
+        'ix_ticket_sla_resolution_sweep', 'ticket_sla',
+        ['resolution_breached', 'resolution_met_at', 'resolution_deadline'],
+    )
+
+
+def downgrade():
+    op.drop_index('ix_ticket_sla_resolution_sweep', table_name='ticket_sla')
+    op.drop_index('ix_ticket_sla_response_sweep', table_name='ticket_sla')
@@ -0,0 +1,58 @@
+"""add effective deadline columns to ticket_sla
+
+Revision ID: n1o2p3q4r5s6
+Revises: m0n1o2p3q4r5
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'n1o2p3q4r5s6'
+down_revision = 'm0n1o2p3q4r5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('ticket_sla', sa.Column('effective_response_deadline', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('ticket_sla', sa.Column('effective_resolution_deadline', sa.DateTime(timezone=True), nullable=True))
+
+    # Prazo + total pausado; NULL enquanto pausado (sla_service.refresh_effective_deadlines)
+    op.execute("""
+        UPDATE ticket_sla
+        SET effective_response_deadline =
+                CASE WHEN paused_at IS NULL
+                     THEN TIMESTAMPADD(SECOND, total_paused_seconds, response_deadline) END,
+            effective_resolution_deadline =
+                CASE WHEN paused_at IS NULL
+                     THEN TIMESTAMPADD(SECOND, total_paused_seconds, resolution_deadline) END
+    """)
+
+    # Varredura e "em risco": breached = 0 AND met_at IS NULL AND efetivo em faixa.
+    # Substituem os índices sobre o prazo bruto da varredura anterior
+    op.drop_index('ix_ticket_sla_response_sweep', table_name='ticket_sla')
+    op.drop_index('ix_ticket_sla_resolution_sweep', table_name='ticket_sla')
+    op.create_index(
+        'ix_ticket_sla_response_effective', 'ticket_sla',
+        ['response_breached', 'response_met_at', 'effective_response_deadline'],
+    )
+    op.create_index(
+        'ix_ticket_sla_resolution_effective', 'ticket_sla',
+        ['resolution_breached', 'resolution_met_at', 'effective_resolution_deadline'],
+    )
+
+
+def downgrade():
+    op.drop_index('ix_ticket_sla_resolution_effective', table_name='ticket_sla')
+    op.drop_index('ix_ticket_sla_response_effective', table_name='ticket_sla')
+    op.create_index(
+        'ix_ticket_sla_response_sweep', 'ticket_sla',
+        ['response_breached', 'response_met_at', 'response_deadline'],
+    )
+    op.create_index(
+        'ix_ticket_sla_resolution_sweep', 'ticket_sla',
+        ['resolution_breached', 'resolution_met_at', 'resolution_deadline'],
+    )
+    op.drop_column('ticket_sla', 'effective_resolution_deadline')
+    op.drop_column('ticket_sla', 'effective_response_deadline')
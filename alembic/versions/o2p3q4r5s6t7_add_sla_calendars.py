@@ -0,0 +1,76 @@
+"""add sla calendars (business hours and holidays)
+
+Revision ID: o2p3q4r5s6t7
+Revises: n1o2p3q4r5s6
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'o2p3q4r5s6t7'
+down_revision = 'n1o2p3q4r5s6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'sla_calendars',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('timezone', sa.String(length=64), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name'),
+    )
+    op.create_table(
+        'sla_calendar_hours',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('calendar_id', sa.Integer(), nullable=False),
+        sa.Column('weekday', sa.Integer(), nullable=False),
+        sa.Column('start_minute', sa.Integer(), nullable=False),
+        sa.Column('end_minute', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['calendar_id'], ['sla_calendars.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_sla_calendar_hours_calendar_id', 'sla_calendar_hours', ['calendar_id'])
+    op.create_table(
+        'sla_calendar_holidays',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('calendar_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=True),
+        sa.ForeignKeyConstraint(['calendar_id'], ['sla_calendars.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('calendar_id', 'date', name='uq_sla_calendar_holiday'),
+    )
+
+    # NULL em todos: SLAs existentes continuam em tempo corrido
+    op.add_column('hotels', sa.Column('sla_calendar_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'fk_hotels_sla_calendar_id', 'hotels', 'sla_calendars',
+        ['sla_calendar_id'], ['id'], ondelete='SET NULL',
+    )
+    op.add_column('sla_policies', sa.Column('calendar_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'fk_sla_policies_calendar_id', 'sla_policies', 'sla_calendars',
+        ['calendar_id'], ['id'], ondelete='SET NULL',
+    )
+    op.add_column('ticket_sla', sa.Column('calendar_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'fk_ticket_sla_calendar_id', 'ticket_sla', 'sla_calendars',
+        ['calendar_id'], ['id'], ondelete='SET NULL',
+    )
+
+
+def downgrade():
+    op.drop_constraint('fk_ticket_sla_calendar_id', 'ticket_sla', type_='foreignkey')
+    op.drop_column('ticket_sla', 'calendar_id')
+    op.drop_constraint('fk_sla_policies_calendar_id', 'sla_policies', type_='foreignkey')
+    op.drop_column('sla_policies', 'calendar_id')
+    op.drop_constraint('fk_hotels_sla_calendar_id', 'hotels', type_='foreignkey')
+    op.drop_column('hotels', 'sla_calendar_id')
+    op.drop_table('sla_calendar_holidays')
+    op.drop_index('ix_sla_calendar_hours_calendar_id', table_name='sla_calendar_hours')
+    op.drop_table('sla_calendar_hours')
+    op.drop_table('sla_calendars')
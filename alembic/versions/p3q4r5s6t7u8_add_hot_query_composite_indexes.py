@@ -0,0 +1,65 @@
+"""add composite indexes for the hot query shapes
+
+Revision ID: p3q4r5s6t7u8
+Revises: o2p3q4r5s6t7
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'p3q4r5s6t7u8'
+down_revision = 'o2p3q4r5s6t7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # list_tickets_service (agent): status = ? AND assigned_team_id IN (times) AND hotel_id IN (hotéis)
+    op.create_index(
+        'ix_tickets_status_team_hotel_created_at', 'tickets',
+        ['status', 'assigned_team_id', 'hotel_id', 'created_at'],
+    )
+
+    # /notifications (user_id = ? ORDER BY created_at) e /unread-count (user_id = ? AND read = 0);
+    # substitui ix_notifications_user_id, que vira prefixo redundante
+    op.create_index(
+        'ix_notifications_user_read_created_at', 'notifications',
+        ['user_id', 'read', 'created_at'],
+    )
+    op.drop_index('ix_notifications_user_id', table_name='notifications')
+
+    # /reports/activity: user_id = ? AND created_at BETWEEN ...
+    op.create_index('ix_ticket_logs_user_id_created_at', 'ticket_logs', ['user_id', 'created_at'])
+    # /ticket-logs/{id}: ticket_id = ? ORDER BY created_at
+    op.create_index('ix_ticket_logs_ticket_id_created_at', 'ticket_logs', ['ticket_id', 'created_at'])
+
+    # Vínculos repetidos não mudam a visibilidade; remove antes de tornar o par único (fica o menor id)
+    bind = op.get_bind()
+    bind.execute(sa.text(
+        "DELETE a FROM user_hotels a JOIN user_hotels b "
+        "ON a.user_id = b.user_id AND a.hotel_id = b.hotel_id AND a.id > b.id"
+    ))
+    bind.execute(sa.text(
+        "DELETE a FROM user_teams a JOIN user_teams b "
+        "ON a.user_id = b.user_id AND a.team_id = b.team_id AND a.id > b.id"
+    ))
+    # Únicos e cobrindo o par: os subselects de escopo (hotel_id/team_id por user_id) leem só o índice
+    op.create_unique_constraint('uq_user_hotels_user_hotel', 'user_hotels', ['user_id', 'hotel_id'])
+    op.create_unique_constraint('uq_user_teams_user_team', 'user_teams', ['user_id', 'team_id'])
+
+
+def downgrade():
+    # O InnoDB pode ter descartado os índices implícitos das FKs ao ganhar os compostos;
+    # recria índices simples antes, senão o DROP falha com "needed in a foreign key constraint"
+    op.create_index('ix_user_teams_user_id', 'user_teams', ['user_id'])
+    op.create_index('ix_user_hotels_user_id', 'user_hotels', ['user_id'])
+    op.create_index('ix_ticket_logs_ticket_id', 'ticket_logs', ['ticket_id'])
+    op.create_index('ix_ticket_logs_user_id', 'ticket_logs', ['user_id'])
+    op.drop_constraint('uq_user_teams_user_team', 'user_teams', type_='unique')
+    op.drop_constraint('uq_user_hotels_user_hotel', 'user_hotels', type_='unique')
+    op.drop_index('ix_ticket_logs_ticket_id_created_at', table_name='ticket_logs')
+    op.drop_index('ix_ticket_logs_user_id_created_at', table_name='ticket_logs')
+    op.create_index('ix_notifications_user_id', 'notifications', ['user_id'])
+    op.drop_index('ix_notifications_user_read_created_at', table_name='notifications')
+    op.drop_index('ix_tickets_status_team_hotel_created_at', table_name='tickets')
@@ -0,0 +1,26 @@
+"""add sla calendar versions (snapshot on ticket_sla)
+
+Revision ID: q4r5s6t7u8v9
+Revises: p3q4r5s6t7u8
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'q4r5s6t7u8v9'
+down_revision = 'p3q4r5s6t7u8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('sla_calendars', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+    op.add_column('ticket_sla', sa.Column('calendar_version', sa.Integer(), nullable=True))
+    # SLAs já aplicados usaram o calendário como está hoje: versão 1
+    op.execute("UPDATE ticket_sla SET calendar_version = 1 WHERE calendar_id IS NOT NULL")
+
+
+def downgrade():
+    op.drop_column('ticket_sla', 'calendar_version')
+    op.drop_column('sla_calendars', 'version')
@@ -7,19 +7,19 @@ from dotenv import load_dotenv
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 from database import get_db
 from models import User as UserModel, Ticket as TicketModel
-from models import Hotel as HotelModel
 from models import UserHotel as UserHotelModel
-from models import Team as TeamModel, UserTeam as UserTeamModel, Category as CategoryModel, SubCategory as SubCategoryModel
+from models import UserTeam as UserTeamModel
 
 # Times que existem só para controle de acesso ao Qualitor — não afetam chamados do helpdesk
 QUALITOR_TEAM_NAMES = {"RM1", "RM1 SAP", "ATRIO - SISTEMAS"}
 from schemas import User
 from models import RoleEnum
+from services.principal_cache import Principal, principal_cache
+from services.password_hasher import password_hasher, pwd_context  # noqa: F401
 
 # Carregar variáveis de ambiente
 load_dotenv()
@@ -28,15 +28,15 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 40))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 #funcoes de hash
+# bcrypt roda no pool dedicado de services/password_hasher.py
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify(plain_password, hashed_password)
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
 #funcoes de autenticacao
 def authenticate_user(db: Session, email: str, password: str) -> Optional[UserModel]:
@@ -69,6 +69,14 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Principal em cache evita o SELECT em users a cada request autenticado
+    principal = principal_cache.get(int(user_id))
+    if principal is not None:
+        return _attach_principal(principal, db)
+
+    # Antes de qualquer leitura: uma invalidação durante a carga impede o put() dos dados antigos
+    generation = principal_cache.generation(int(user_id))
+
     # Busca o usuário no banco usando o ID do token
     user = db.query(UserModel).filter(UserModel.id == int(user_id)).first()
     
@@ -79,99 +87,59 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             detail="Usuário não encontrado",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
+
+    principal_cache.put(_load_principal(user, db), generation)
+
     # Retorna o usuário autenticado
     return user    
-    
-def create_access_token(user: UserModel, db: Session) -> str:
-    now = datetime.now(timezone.utc)
-    expire = now + timedelta(minutes=int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES")))
 
-    if user.role in ["admin", "agent"]:
-        user_hotels_query = db.query(HotelModel.id, HotelModel.code, HotelModel.name).all()
-    else:
-        user_hotels_query = (
-            db.query(HotelModel.id, HotelModel.code, HotelModel.name)
-            .join(UserHotelModel, UserHotelModel.hotel_id == HotelModel.id)
-            .filter(UserHotelModel.user_id == user.id)
-            .all()
-        )
 
-    user_hotels = [
-        {"id": h.id, "code": h.code, "name": h.name} for h in user_hotels_query
-    ]
+# password_hash fica fora do cache; se alguém acessar, o atributo expirado é carregado sob demanda
+_PRINCIPAL_COLUMNS = [
+    attr.key for attr in UserModel.__mapper__.column_attrs if attr.key != "password_hash"
+]
 
-    # Times do próprio usuário (não todos os times do sistema)
-    user_team_rows = (
-        db.query(TeamModel.id, TeamModel.name)
-        .join(UserTeamModel, UserTeamModel.team_id == TeamModel.id)
-        .filter(UserTeamModel.user_id == user.id)
-        .all()
+
+def _load_principal(user: UserModel, db: Session) -> Principal:
+    hotel_ids = frozenset(
+        hid for (hid,) in db.query(UserHotelModel.hotel_id).filter(UserHotelModel.user_id == user.id).all()
     )
-    # Separa times de helpdesk (usados no filtro de chamados) dos times exclusivos do Qualitor
-    teams = [{"id": t.id, "name": t.name} for t in user_team_rows if t.name not in QUALITOR_TEAM_NAMES]
-    user_qualitor_teams = [t.name for t in user_team_rows if t.name in QUALITOR_TEAM_NAMES]
-
-    # Admin vê todos os times Qualitor sem precisar ser membro; agentes só veem os seus
-    has_qualitor_access = (user.role == "admin") or bool(user_qualitor_teams)
-    qualitor_teams = sorted(QUALITOR_TEAM_NAMES) if user.role == "admin" else user_qualitor_teams
-
-    categories = [
-        {"id": c.id, "name": c.name, "team_id": c.team_id}
-        for c in db.query(CategoryModel.id, CategoryModel.name, CategoryModel.team_id).order_by(CategoryModel.id).all()
-    ]
-
-    subcategories = [
-        {"id": s.id, "name": s.name, "category_id": s.category_id}
-        for s in db.query(SubCategoryModel.id, SubCategoryModel.name, SubCategoryModel.category_id).order_by(SubCategoryModel.id).all()
-    ]
-
-
-    qualitor_menu = [{"label": "Qualitor", "page": "qualitor"}] if has_qualitor_access else []
-
-    role_menus = {
-        "admin": [
-            {"label": "Dashboard", "page": "dashboard"},
-            {"label": "Chamados", "page": "tickets"},
-            *qualitor_menu,
-            {"label": "Mural", "page": "mural"},
-            {"label": "Equipes", "page": "teams"},
-            {"label": "Gerenciar usuários", "page": "manage-users"},
-            {"label": "Gerenciar hotéis", "page": "manage-hotels"},
-            {"label": "Categorias & SLA", "page": "manage-categories"},
-            {"label": "Relatório de Atividades", "page": "activity-report"},
-        ],
-        "agent": [
-            {"label": "Dashboard", "page": "dashboard"},
-            {"label": "Chamados", "page": "tickets"},
-            *qualitor_menu,
-            {"label": "Mural", "page": "mural"},
-            {"label": "Equipes", "page": "teams"},
-            {"label": "Gerenciar usuários", "page": "manage-users"},
-        ],
-        "client_manager": [
-            {"label": "Meus chamados", "page": "tickets"},
-            {"label": "Gerenciar usuários", "page": "manage-users"},
-        ],
-        "client_receptionist": [
-            {"label": "Meus chamados", "page": "tickets"},
-        ],
-    }
+    team_ids = frozenset(
+        tid for (tid,) in db.query(UserTeamModel.team_id).filter(UserTeamModel.user_id == user.id).all()
+    )
+    return Principal(
+        user_id=user.id,
+        role=user.role,
+        columns={key: getattr(user, key) for key in _PRINCIPAL_COLUMNS},
+        hotel_ids=hotel_ids,
+        team_ids=team_ids,
+    )
+
+
+def _attach_principal(principal: Principal, db: Session) -> UserModel:
+    """Reconstrói o UserModel a partir do cache e o anexa à sessão sem emitir SELECT.
+
+    Relacionamentos (hotels, teams...) continuam com lazy load normal e alterações
+    como last_seen_at/avatar_url são persistidas no commit da sessão.
+    """
+    user = UserModel(**principal.columns)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+# Versão do formato do token: 2 = token enxuto; dados de sessão em GET /auth/bootstrap
+TOKEN_VERSION = 2
+
+
+def create_access_token(user: UserModel) -> str:
+    now = datetime.now(timezone.utc)
+    expire = now + timedelta(minutes=int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES")))
 
     to_encode = {
         "sub": str(user.id),
-        "name": user.name,
-        "role": user.role,
-        "email": user.email,
-        "avatar_url": user.avatar_url or "",
+        "role": user.role.value if hasattr(user.role, "value") else user.role,
+        "ver": TOKEN_VERSION,
         "iat": now,
         "exp": expire,
-        "hotels": user_hotels,
-        "teams": teams,
-        "qualitor_teams": qualitor_teams,
-        "categories": categories,
-        "subcategories": subcategories,
-        "menus": role_menus.get(user.role, [])
     }
 
     encoded_jwt = jwt.encode(
@@ -0,0 +1,114 @@
+"""
+Benchmark: latência de cauda do polling quando rotas async fazem I/O síncrono de banco.
+
+Reproduz o padrão das rotas `async def` (dashboard unificado, qualitor, upload de anexo):
+um handler que espera o "MySQL" (time.sleep) convive com clientes fazendo polling em
+um endpoint barato (ex.: /notifications/unread-count).
+
+  - inline:     a espera síncrona roda direto no event loop (comportamento antigo)
+  - threadpool: a espera roda via run_in_threadpool (comportamento atual)
+
+Uso:
+    python benchmarks/bench_event_loop_blocking.py [--db-ms 50] [--pollers 20] [--slow 5] [--seconds 5]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+
+POLL_INTERVAL = 0.02  # cada poller dispara a cada 20 ms
+
+
+def _build_app(db_ms: float) -> FastAPI:
+    app = FastAPI()
+
+    def _fake_query():
+        time.sleep(db_ms / 1000)
+        return {"ok": True}
+
+    @app.get("/slow/inline")
+    async def slow_inline():
+        return _fake_query()
+
+    @app.get("/slow/threadpool")
+    async def slow_threadpool():
+        return await run_in_threadpool(_fake_query)
+
+    @app.get("/poll")
+    async def poll():
+        return {"count": 0}
+
+    return app
+
+
+def _percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pct(p):
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000, 2)
+
+    return {
+        "n": len(ordered),
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "mean_ms": round(statistics.mean(ordered) * 1000, 2),
+    }
+
+
+async def _run(mode: str, app: FastAPI, pollers: int, slow: int, seconds: float) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    poll_latencies: list[float] = []
+    deadline = time.perf_counter() + seconds
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def poller():
+            # Latência medida a partir do instante planejado de envio, para que o tempo
+            # em que o loop ficou travado (e o poll nem pôde sair) também entre na conta.
+            scheduled = time.perf_counter()
+            while scheduled < deadline:
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await client.get("/poll")
+                poll_latencies.append(time.perf_counter() - scheduled)
+                scheduled += POLL_INTERVAL
+
+        async def slow_caller():
+            while time.perf_counter() < deadline:
+                await client.get(f"/slow/{mode}")
+
+        await asyncio.gather(
+            *[poller() for _ in range(pollers)],
+            *[slow_caller() for _ in range(slow)],
+        )
+
+    return {"mode": mode, "poll": _percentiles(poll_latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-ms", type=float, default=50, help="tempo simulado de cada query (ms)")
+    parser.add_argument("--pollers", type=int, default=20, help="clientes fazendo polling")
+    parser.add_argument("--slow", type=int, default=5, help="clientes chamando a rota pesada")
+    parser.add_argument("--seconds", type=float, default=5, help="duração de cada cenário")
+    args = parser.parse_args()
+
+    app = _build_app(args.db_ms)
+    results = [
+        asyncio.run(_run(mode, app, args.pollers, args.slow, args.seconds))
+        for mode in ("inline", "threadpool")
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Medição: tamanho do header Authorization e custo de jwt.decode, token antigo vs enxuto.
+
+  - fat:  payload antigo (hotéis, times, categorias, subcategorias e menus dentro do JWT)
+  - slim: create_access_token atual (sub, role, ver, iat, exp); o resto vem de GET /auth/bootstrap
+
+O catálogo é sintético e dimensionado pelos argumentos; nenhum banco é usado.
+
+Uso:
+    python benchmarks/bench_jwt_size.py [--hotels 150] [--categories 60] [--subcategories 400] [--repeat 2000]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "40")
+# database.py monta a URL do MySQL no import; valores fictícios bastam
+for _var in ("DB_USER", "DB_PASSWORD", "DB_HOST", "DB_NAME"):
+    os.environ.setdefault(_var, "bench")
+
+from jose import jwt  # noqa: E402
+
+from auth_utils import ALGORITHM, SECRET_KEY, create_access_token  # noqa: E402
+from services.session_bootstrap import _role_menus  # noqa: E402
+
+
+def _fat_token(args) -> str:
+    now = datetime.now(timezone.utc)
+    payload = {
+        "sub": "1",
+        "name": "Administrador do Sistema",
+        "role": "admin",
+        "email": "admin@example.com",
+        "avatar_url": "/uploads/avatars/1_avatar.png",
+        "iat": now,
+        "exp": now + timedelta(minutes=40),
+        "hotels": [{"id": i, "code": f"H{i:03d}", "name": f"Hotel Exemplo {i}"} for i in range(args.hotels)],
+        "teams": [{"id": i, "name": f"Equipe {i}"} for i in range(5)],
+        "qualitor_teams": ["ATRIO - SISTEMAS", "RM1", "RM1 SAP"],
+        "categories": [{"id": i, "name": f"Categoria {i}", "team_id": i % 5} for i in range(args.categories)],
+        "subcategories": [
+            {"id": i, "name": f"Subcategoria de atendimento {i}", "category_id": i % args.categories}
+            for i in range(args.subcategories)
+        ],
+        "menus": _role_menus("admin", True),
+    }
+    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def _measure(token: str, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        samples.append(time.perf_counter() - t0)
+    return {
+        "header_bytes": len(f"Authorization: Bearer {token}"),
+        "decode_p50_us": round(statistics.median(samples) * 1e6, 1),
+        "decode_mean_us": round(statistics.mean(samples) * 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hotels", type=int, default=150)
+    parser.add_argument("--categories", type=int, default=60)
+    parser.add_argument("--subcategories", type=int, default=400)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    slim = create_access_token(SimpleNamespace(id=1, role="admin"))
+    print(json.dumps({
+        "catalog": {"hotels": args.hotels, "categories": args.categories, "subcategories": args.subcategories},
+        "fat": _measure(_fat_token(args), args.repeat),
+        "slim": _measure(slim, args.repeat),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Microbenchmark: resolução de @menções com 5k usuários e 10 menções por texto.
+
+  - scan:  SELECT de todos os usuários + laço menções × usuários (comportamento antigo)
+  - index: extract_mentioned_users atual — índice primeiro nome → ids em memória e
+           SELECT só dos usuários mencionados
+
+Confere que as duas versões devolvem os mesmos usuários. SQLite em memória.
+
+Uso:
+    python benchmarks/bench_mentions.py [--users 5000] [--mentions 10] [--repeat 50]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# database.py monta a URL do MySQL no import; valores fictícios bastam, o engine do benchmark é outro
+for _var in ("DB_USER", "DB_PASSWORD", "DB_HOST", "DB_NAME"):
+    os.environ.setdefault(_var, "bench")
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import models  # noqa: E402
+from models import User  # noqa: E402
+from services.notification_service import extract_mentioned_users  # noqa: E402
+
+FIRST_NAMES = [
+    "Ana", "Bruno", "Carla", "Diego", "Eduarda", "Felipe", "Gabriela", "Henrique", "Isabela", "João",
+    "Karina", "Lucas", "Mariana", "Nicolas", "Olivia", "Pedro", "Rafaela", "Samuel", "Tatiane", "Vitor",
+]
+
+
+def _scan(text, db, exclude_user_id=None):
+    matches = re.findall(r'@(\w+)', text)
+    if not matches:
+        return []
+    all_users = db.query(User).all()
+    mentioned, seen_ids = [], set()
+    for match in matches:
+        match_lower = match.lower()
+        for user in all_users:
+            if user.id in seen_ids:
+                continue
+            if exclude_user_id and user.id == exclude_user_id:
+                continue
+            first_name = user.name.split()[0].lower() if user.name else ''
+            if first_name == match_lower:
+                mentioned.append(user)
+                seen_ids.add(user.id)
+                break
+    return mentioned
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--mentions", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    # Primeiros nomes únicos na maior parte (Nome123 Sobrenome) e alguns repetidos de propósito
+    names = [f"{rng.choice(FIRST_NAMES)}{i if i % 10 else ''} Silva" for i in range(args.users)]
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {
+                "name": name,
+                "email": f"user{i}@example.com",
+                "password_hash": "$2b$12$" + "x" * 53,
+                "role": "agent",
+            }
+            for i, name in enumerate(names)
+        ])
+    Session = sessionmaker(bind=engine)
+
+    # Metade dos tokens com nome repetido (vários candidatos), metade com nome único
+    tokens = ["@" + (rng.choice(FIRST_NAMES) if k % 2 else rng.choice(names).split()[0]) for k in range(args.mentions)]
+    text = "Pessoal, " + " ".join(tokens) + " podem verificar o chamado?"
+
+    results = {"users": args.users, "mentions": len(tokens)}
+    with Session() as db:
+        expected = [u.id for u in _scan(text, db, exclude_user_id=1)]
+        got = [u.id for u in extract_mentioned_users(text, db, exclude_user_id=1)]
+        results["same_result"] = expected == got
+        results["resolved"] = len(got)
+
+        for mode, fn in (("scan", _scan), ("index", extract_mentioned_users)):
+            samples = []
+            for _ in range(args.repeat):
+                db.expunge_all()
+                t0 = time.perf_counter()
+                fn(text, db, exclude_user_id=1)
+                samples.append(time.perf_counter() - t0)
+            results[mode] = {
+                "p50_ms": round(statistics.median(samples) * 1000, 3),
+                "min_ms": round(min(samples) * 1000, 3),
+            }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark: fan-out de notificação para N destinatários (padrão 500).
+
+  - per_row: carrega UserModel completos e cria um Notification ORM por destinatário
+             (comportamento antigo de notify_all_staff)
+  - bulk:    notify_all_staff atual — SELECT só de ids + INSERT multi-row
+
+Mede tempo até o commit e número de statements enviados ao banco. Por padrão usa SQLite
+em memória; --db-url aponta para um MySQL de teste (com as tabelas já migradas).
+
+Uso:
+    python benchmarks/bench_notification_fanout.py [--recipients 500] [--repeat 10] [--db-url sqlite://]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# database.py monta a URL do MySQL no import; valores fictícios bastam, o engine do benchmark é outro
+for _var in ("DB_USER", "DB_PASSWORD", "DB_HOST", "DB_NAME"):
+    os.environ.setdefault(_var, "bench")
+
+from sqlalchemy import create_engine, delete, event, insert  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+import models  # noqa: E402
+from models import Notification, RoleEnum, User  # noqa: E402
+from services.notification_service import notify_all_staff  # noqa: E402
+
+
+def _per_row(db, exclude_user_id, type, title, body=None):
+    staff = (
+        db.query(User)
+        .filter(User.role.in_([RoleEnum.admin, RoleEnum.agent]), User.id != exclude_user_id)
+        .all()
+    )
+    for u in staff:
+        db.add(Notification(user_id=u.id, type=type, title=title, body=body))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipients", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--db-url", default="sqlite://")
+    args = parser.parse_args()
+
+    kwargs = {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}} if args.db_url == "sqlite://" else {}
+    engine = create_engine(args.db_url, **kwargs)
+    models.Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"name": f"Agente {i}", "email": f"bench{i}@example.com", "password_hash": "x", "role": "agent"}
+            for i in range(args.recipients + 1)
+        ])
+        actor_id = conn.execute(User.__table__.select().limit(1)).first().id
+
+    statements = 0
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(*_):
+        nonlocal statements
+        statements += 1
+
+    modes = {
+        "per_row": lambda db: _per_row(db, actor_id, "mural_post", "Novo aviso", "@all"),
+        "bulk": lambda db: notify_all_staff(db, actor_id, "mural_post", "Novo aviso", "@all"),
+    }
+    results = []
+    for mode, fn in modes.items():
+        samples, stmt_counts = [], []
+        for _ in range(args.repeat):
+            with Session() as db:
+                statements = 0
+                t0 = time.perf_counter()
+                fn(db)
+                db.commit()
+                samples.append(time.perf_counter() - t0)
+                stmt_counts.append(statements)
+                created = db.query(Notification).count()
+                db.execute(delete(Notification))
+                db.commit()
+        results.append({
+            "mode": mode,
+            "recipients": created,
+            "p50_ms": round(statistics.median(samples) * 1000, 2),
+            "min_ms": round(min(samples) * 1000, 2),
+            "statements": stmt_counts[0],
+        })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
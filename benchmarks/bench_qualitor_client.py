@@ -0,0 +1,111 @@
+"""
+Benchmark: client httpx novo por chamada vs client compartilhado (services.qualitor_client).
+
+Sobe um stub local da API do Qualitor (uvicorn em thread) e mede o custo por chamada:
+
+  - per_call: `async with httpx.AsyncClient()` a cada request (comportamento antigo)
+  - shared:   get_qualitor_client() com pool keep-alive (comportamento atual)
+
+Uso:
+    python benchmarks/bench_qualitor_client.py [--calls 500] [--concurrency 10] [--port 8913]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _start_stub(port: int):
+    import uvicorn
+    from fastapi import FastAPI
+
+    stub = FastAPI()
+
+    @stub.get("/qualitor/stats/{path}")
+    async def stats(path: str):
+        return {"total_abertos": 1, "path": path}
+
+    config = uvicorn.Config(stub, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def _summary(samples: list[float], wall: float) -> dict:
+    ordered = sorted(samples)
+
+    def pct(p):
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000, 3)
+
+    return {
+        "calls": len(ordered),
+        "mean_ms": round(statistics.mean(ordered) * 1000, 3),
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "throughput_rps": round(len(ordered) / wall, 1),
+    }
+
+
+async def _run(mode: str, base_url: str, calls: int, concurrency: int) -> dict:
+    import httpx
+    from services import qualitor_client
+
+    samples: list[float] = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            t0 = time.perf_counter()
+            if mode == "per_call":
+                async with httpx.AsyncClient(timeout=15.0) as client:
+                    r = await client.get(f"{base_url}/qualitor/stats/summary")
+            else:
+                r = await qualitor_client.get_qualitor_client().get("/qualitor/stats/summary")
+            r.raise_for_status()
+            samples.append(time.perf_counter() - t0)
+
+    if mode == "shared":
+        await qualitor_client.startup()
+    t0 = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(calls)])
+    wall = time.perf_counter() - t0
+    if mode == "shared":
+        await qualitor_client.shutdown()
+
+    return {"mode": mode, **_summary(samples, wall)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8913)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    # Precisa ser definido antes de importar services.qualitor_client
+    os.environ["QUALITOR_API_URL"] = base_url
+
+    server = _start_stub(args.port)
+    try:
+        results = [
+            asyncio.run(_run(mode, base_url, args.calls, args.concurrency))
+            for mode in ("per_call", "shared")
+        ]
+    finally:
+        server.should_exit = True
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Microbenchmark: cálculo de prazos SLA em horas úteis (services/sla_calendar).
+
+Calendário de hotel: seg–sex 08:00–12:00 e 13:00–18:00, sábado 08:00–12:00, turno noturno
+de domingo 22:00 a segunda 06:00, feriados nacionais; fuso America/Sao_Paulo.
+
+  - table: BusinessCalendar.add — busca binária na tabela de tempo útil acumulado
+  - step:  referência minuto a minuto (só numa amostra; é ordens de grandeza mais lenta)
+
+Confere que as duas dão o mesmo prazo na amostra e mede a vazão de --deadlines prazos
+com início e orçamento (1–168 h) aleatórios. Não usa banco.
+
+Uso:
+    python benchmarks/bench_sla_calendar.py [--deadlines 100000] [--sample 300]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# database.py monta a URL do MySQL no import; valores fictícios bastam, o benchmark não usa banco
+for _var in ("DB_USER", "DB_PASSWORD", "DB_HOST", "DB_NAME"):
+    os.environ.setdefault(_var, "bench")
+
+from services.sla_calendar import BusinessCalendar  # noqa: E402
+
+TZ = "America/Sao_Paulo"
+WEEKLY = {
+    0: [(0, 360), (480, 720), (780, 1080)],
+    1: [(480, 720), (780, 1080)],
+    2: [(480, 720), (780, 1080)],
+    3: [(480, 720), (780, 1080)],
+    4: [(480, 720), (780, 1080)],
+    5: [(480, 720)],
+    6: [(1320, 1440)],
+}
+HOLIDAYS = {
+    date(y, m, d)
+    for y in (2025, 2026, 2027)
+    for m, d in ((1, 1), (4, 21), (5, 1), (9, 7), (10, 12), (11, 2), (11, 15), (11, 20), (12, 25))
+}
+
+
+def _step(calendar: BusinessCalendar, start: datetime, seconds: int) -> datetime:
+    """Referência: anda minuto a minuto contando só os minutos de expediente."""
+    zone = calendar._zone
+    t = start
+    remaining = seconds
+    # Avança até o próximo minuto cheio; o trecho só conta se estiver em expediente
+    while remaining > 0:
+        local = t.astimezone(zone)
+        minute = local.hour * 60 + local.minute
+        open_now = local.date() not in HOLIDAYS and any(
+            a <= minute < b for a, b in WEEKLY.get(local.weekday(), ())
+        )
+        step = 60 - local.second - local.microsecond / 1e6
+        if open_now:
+            if remaining <= step:
+                return t + timedelta(seconds=remaining)
+            remaining -= step
+        t += timedelta(seconds=step)
+    return t
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--deadlines", type=int, default=100_000)
+    parser.add_argument("--sample", type=int, default=300)
+    args = parser.parse_args()
+
+    rng = random.Random(22)
+    t0 = time.perf_counter()
+    calendar = BusinessCalendar(1, TZ, WEEKLY, HOLIDAYS)
+    build_ms = (time.perf_counter() - t0) * 1000
+
+    base = datetime.now(timezone.utc) - timedelta(days=180)
+    inputs = [
+        (base + timedelta(seconds=rng.randrange(365 * 86400)), rng.choice((1, 2, 4, 8, 24, 72, 168)) * 3600)
+        for _ in range(args.deadlines)
+    ]
+
+    t0 = time.perf_counter()
+    deadlines = [calendar.add(start, seconds) for start, seconds in inputs]
+    table_s = time.perf_counter() - t0
+
+    # Ida e volta: o tempo útil entre início e prazo é exatamente o orçamento
+    t0 = time.perf_counter()
+    roundtrip_ok = all(
+        calendar.working_seconds(start, deadline) == seconds
+        for (start, seconds), deadline in zip(inputs, deadlines)
+    )
+    between_s = time.perf_counter() - t0
+
+    sample = inputs[:args.sample]
+    t0 = time.perf_counter()
+    reference = [_step(calendar, start, seconds) for start, seconds in sample]
+    step_s = time.perf_counter() - t0
+    mismatches = sum(
+        1 for ref, got in zip(reference, deadlines) if abs((ref - got).total_seconds()) > 1e-3
+    )
+
+    print(json.dumps({
+        "deadlines": args.deadlines,
+        "table": {
+            "build_ms": round(build_ms, 1),
+            "intervals": calendar.stats()["intervals"],
+            "total_ms": round(table_s * 1000, 1),
+            "per_deadline_us": round(table_s / args.deadlines * 1e6, 2),
+            "deadlines_per_s": round(args.deadlines / table_s),
+            "working_seconds_per_s": round(args.deadlines / between_s),
+        },
+        "step": {
+            "sample": len(sample),
+            "per_deadline_us": round(step_s / len(sample) * 1e6, 1),
+        },
+        "speedup": round((step_s / len(sample)) / (table_s / args.deadlines), 1),
+        "same_result": mismatches == 0,
+        "roundtrip_ok": roundtrip_ok,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
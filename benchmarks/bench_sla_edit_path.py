@@ -0,0 +1,217 @@
+"""
+Microbenchmark: instruções SQL dos hooks SLA no caminho de edição de ticket.
+
+Ciclo por ticket: waiting → in_progress → feedback → in_progress → awaiting_confirmation e,
+antes disso, troca de subcategoria (reaplica o SLA). Cada passo é uma transação: leitura do
+ticket com lock, transições, commit.
+
+  - query: comportamento antigo — ticket sem o TicketSLA, cada hook com seu SELECT e
+           apply_sla_to_ticket com SELECT da subcategoria, lazy load da política,
+           DELETE + flush + INSERT
+  - clock: sla_service.SLAClock atual — TicketSLA no joinedload da leitura com lock,
+           transições em memória e um flush no commit
+
+Conta as instruções com um listener before_cursor_execute. SQLite em memória.
+
+Uso:
+    python benchmarks/bench_sla_edit_path.py [--tickets 200]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# database.py monta a URL do MySQL no import; valores fictícios bastam, o engine do benchmark é outro
+for _var in ("DB_USER", "DB_PASSWORD", "DB_HOST", "DB_NAME"):
+    os.environ.setdefault(_var, "bench")
+
+from sqlalchemy import create_engine, event, insert  # noqa: E402
+from sqlalchemy.orm import joinedload, sessionmaker  # noqa: E402
+
+import models  # noqa: E402
+from models import (  # noqa: E402
+    Ticket, TicketSLA, TicketLog, SubCategory, SLAPolicy, LogActionEnum, ProgressEnum,
+)
+from services import sla_service  # noqa: E402
+
+STEPS = (
+    ("start", ProgressEnum.in_progress.value),
+    ("pause", ProgressEnum.feedback.value),
+    ("resume", ProgressEnum.in_progress.value),
+    ("resolve", ProgressEnum.awaiting_confirmation.value),
+)
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _legacy_sla(ticket, db):
+    return db.query(TicketSLA).filter(TicketSLA.ticket_id == ticket.id).first()
+
+
+def _legacy_apply(ticket, db):
+    subcategory = db.query(SubCategory).filter(SubCategory.id == ticket.subcategory_id).first()
+    policy = subcategory.sla_policy
+    existing = _legacy_sla(ticket, db)
+    if existing:
+        db.delete(existing)
+        db.flush()
+    started_at = ticket.created_at or _now()
+    record = TicketSLA(
+        ticket_id=ticket.id, policy_id=policy.id,
+        first_response_hours=policy.first_response_hours, resolution_hours=policy.resolution_hours,
+        started_at=started_at,
+        response_deadline=started_at + timedelta(hours=policy.first_response_hours),
+        resolution_deadline=started_at + timedelta(hours=policy.resolution_hours),
+        total_paused_seconds=0, response_breached=False, resolution_breached=False,
+    )
+    sla_service.refresh_effective_deadlines(record)
+    db.add(record)
+    ticket.priority = policy.priority
+    db.add(TicketLog(ticket_id=ticket.id, action=LogActionEnum.sla_started.value, value=policy.name))
+
+
+def _legacy_progress(ticket, db, progress):
+    def log(action, value=None):
+        db.add(TicketLog(ticket_id=ticket.id, action=action.value, value=value))
+
+    def response_met():
+        sla = _legacy_sla(ticket, db)
+        if sla and not sla.response_met_at:
+            sla.response_met_at = _now()
+            log(LogActionEnum.sla_started, "response_met")
+
+    if progress == ProgressEnum.feedback.value:
+        sla = _legacy_sla(ticket, db)
+        if sla and not sla.paused_at:
+            sla.paused_at = _now()
+            sla_service.refresh_effective_deadlines(sla)
+            log(LogActionEnum.sla_paused)
+    elif progress == ProgressEnum.in_progress.value:
+        sla = _legacy_sla(ticket, db)
+        if sla and sla.paused_at:
+            sla.total_paused_seconds += 1
+            sla.paused_at = None
+            sla_service.refresh_effective_deadlines(sla)
+            log(LogActionEnum.sla_resumed, "1")
+        response_met()
+    else:
+        sla = _legacy_sla(ticket, db)
+        if sla and not sla.resolution_met_at:
+            sla.paused_at = None
+            sla.resolution_met_at = _now()
+            log(LogActionEnum.sla_stopped)
+
+
+def _run(Session, ticket_ids, mode, counter):
+    options = [joinedload(Ticket.sla)] if mode == "clock" else []
+    statements = {}
+    t0 = time.perf_counter()
+    for label, step in (("subcategory", None),) + STEPS:
+        before = counter[0]
+        for ticket_id in ticket_ids:
+            with Session() as db:
+                ticket = db.query(Ticket).options(*options).filter(Ticket.id == ticket_id).with_for_update().first()
+                if step is None:
+                    ticket.subcategory_id = 2 if ticket.subcategory_id == 1 else 1
+                    if mode == "clock":
+                        sla_service.apply_sla_to_ticket(ticket, db)
+                    else:
+                        _legacy_apply(ticket, db)
+                else:
+                    ticket.progress = step
+                    if mode == "clock":
+                        sla_service.SLAClock(ticket, db).on_progress(step)
+                    else:
+                        _legacy_progress(ticket, db, step)
+                db.commit()
+        statements[label] = counter[0] - before
+    elapsed = time.perf_counter() - t0
+    total = sum(statements.values())
+    return {
+        "statements_per_ticket": round(total / len(ticket_ids), 2),
+        "by_step": {step: round(n / len(ticket_ids), 2) for step, n in statements.items()},
+        "elapsed_ms": round(elapsed * 1000, 1),
+    }
+
+
+def _seed(engine, tickets):
+    now = _now()
+    with engine.begin() as conn:
+        conn.execute(insert(models.Hotel), [{"id": 1, "code": "H1", "name": "Hotel"}])
+        conn.execute(insert(models.Team), [{"id": 1, "name": "Manutenção"}])
+        conn.execute(insert(models.Category), [{"id": 1, "name": "Manutenção", "team_id": 1}])
+        conn.execute(insert(SLAPolicy), [
+            {"id": 1, "name": "P2", "priority": "high", "first_response_hours": 2, "resolution_hours": 8},
+            {"id": 2, "name": "P3", "priority": "medium", "first_response_hours": 4, "resolution_hours": 24},
+        ])
+        conn.execute(insert(SubCategory), [
+            {"id": 1, "name": "Ar-condicionado", "category_id": 1, "sla_policy_id": 1},
+            {"id": 2, "name": "Elétrica", "category_id": 1, "sla_policy_id": 2},
+        ])
+        conn.execute(insert(models.User), [{
+            "id": 1, "name": "Cliente", "email": "c@example.com",
+            "password_hash": "$2b$12$" + "x" * 53, "role": "client_manager",
+        }])
+        conn.execute(insert(Ticket), [
+            {
+                "id": i, "title": f"Chamado {i}", "description": "-",
+                "hotel_id": 1, "category_id": 1, "subcategory_id": 1, "created_by": 1,
+                "status": "open", "progress": "waiting", "priority": "high", "created_at": now,
+            }
+            for i in range(1, tickets + 1)
+        ])
+        conn.execute(insert(TicketSLA), [
+            {
+                "ticket_id": i, "policy_id": 1, "first_response_hours": 2, "resolution_hours": 8,
+                "started_at": now, "response_deadline": now + timedelta(hours=2),
+                "resolution_deadline": now + timedelta(hours=8), "total_paused_seconds": 0,
+                "response_breached": False, "resolution_breached": False,
+                "effective_response_deadline": now + timedelta(hours=2),
+                "effective_resolution_deadline": now + timedelta(hours=8),
+            }
+            for i in range(1, tickets + 1)
+        ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=200)
+    args = parser.parse_args()
+
+    results = {"tickets": args.tickets}
+    final_state = {}
+    for mode in ("query", "clock"):
+        engine = create_engine("sqlite://")
+        models.Base.metadata.create_all(engine)
+        _seed(engine, args.tickets)
+        counter = [0]
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            if not statement.lstrip().upper().startswith(("BEGIN", "COMMIT", "ROLLBACK")):
+                counter[0] += 1
+
+        results[mode] = _run(sessionmaker(bind=engine), list(range(1, args.tickets + 1)), mode, counter)
+        with engine.connect() as conn:
+            final_state[mode] = [
+                (r.ticket_id, r.policy_id, r.paused_at is None, r.response_met_at is not None,
+                 r.resolution_met_at is not None, r.resolution_breached)
+                for r in conn.execute(TicketSLA.__table__.select().order_by(TicketSLA.ticket_id))
+            ]
+        engine.dispose()
+
+    results["same_state"] = final_state["query"] == final_state["clock"]
+    results["statement_reduction"] = round(
+        1 - results["clock"]["statements_per_ticket"] / results["query"]["statements_per_ticket"], 3
+    )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Benchmark: paginação OFFSET vs cursor (keyset) em list_tickets_service.
+
+Popula uma base com N tickets (padrão 1M) e mede a latência da página 1 e da página 500
+nos dois modos, como admin com status=all (pior caso da listagem):
+
+  - offset: ORDER BY created_at DESC LIMIT/OFFSET + COUNT(*) (comportamento antigo, ainda o padrão)
+  - cursor: (created_at, id) < cursor, sem COUNT (pagination=cursor)
+
+Por padrão usa um SQLite local; aponte --db-url para um MySQL de teste para números reais
+(rode as migrations antes — o índice ix_tickets_created_at_id é o que o modo cursor usa).
+
+Uso:
+    python benchmarks/bench_ticket_pagination.py [--tickets 1000000] [--db-url sqlite:////tmp/bench_tickets.db]
+                                                 [--page-size 50] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# database.py monta a URL do MySQL no import; valores fictícios bastam, o engine do benchmark é outro
+for _var in ("DB_USER", "DB_PASSWORD", "DB_HOST", "DB_NAME"):
+    os.environ.setdefault(_var, "bench")
+
+from sqlalchemy import create_engine, func, insert, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import models  # noqa: E402
+from models import Hotel, RoleEnum, Ticket, User  # noqa: E402
+from services.ticket_service import _encode_cursor, list_tickets_service  # noqa: E402
+
+BATCH = 20_000
+
+
+def _seed(engine, total: int) -> None:
+    models.Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        existing = conn.execute(text("SELECT COUNT(*) FROM tickets")).scalar()
+        if existing >= total:
+            return
+        if not conn.execute(text("SELECT COUNT(*) FROM hotels")).scalar():
+            conn.execute(insert(Hotel), [{"name": f"Hotel {i}", "code": f"H{i:03d}"} for i in range(1, 21)])
+            conn.execute(insert(User), [{
+                "name": "bench", "email": "bench@example.com", "password_hash": "x", "role": "admin",
+            }])
+        if engine.dialect.name == "sqlite":
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_tickets_created_at_id ON tickets (created_at, id)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_tickets_status_created_at ON tickets (status, created_at)"))
+
+    rng = random.Random(42)
+    start = datetime(2020, 1, 1)
+    seconds = int((datetime(2026, 1, 1) - start).total_seconds())
+    remaining = total - existing
+    while remaining > 0:
+        n = min(BATCH, remaining)
+        rows = []
+        for _ in range(n):
+            created = start + timedelta(seconds=rng.randrange(seconds))
+            rows.append({
+                "title": "Chamado de teste",
+                "description": "Descrição gerada pelo benchmark",
+                "status": rng.choices(["open", "closed", "cancelled"], [15, 80, 5])[0],
+                "progress": "waiting",
+                "priority": rng.choice(["low", "medium", "high"]),
+                "created_by": 1,
+                "hotel_id": rng.randint(1, 20),
+                "created_at": created,
+                "updated_at": created,
+            })
+        with engine.begin() as conn:
+            conn.execute(insert(Ticket), rows)
+        remaining -= n
+        print(f"seed: {total - remaining}/{total}", file=sys.stderr)
+
+
+def _time(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return {
+        "p50_ms": round(statistics.median(samples) * 1000, 2),
+        "min_ms": round(min(samples) * 1000, 2),
+        "max_ms": round(max(samples) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=1_000_000)
+    parser.add_argument("--db-url", default="sqlite:////tmp/bench_tickets.db")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine(args.db_url)
+    _seed(engine, args.tickets)
+    Session = sessionmaker(bind=engine)
+    admin = SimpleNamespace(id=1, role=RoleEnum.admin)
+    deep_page = 500
+
+    with Session() as db:
+        # Cursor equivalente à página 500: último item da página 499 (obtido fora da medição)
+        boundary = (
+            db.query(Ticket)
+            .order_by(Ticket.created_at.desc(), Ticket.id.desc())
+            .offset((deep_page - 1) * args.page_size - 1)
+            .limit(1)
+            .one()
+        )
+        deep_cursor = _encode_cursor(boundary)
+
+        def offset(page):
+            return lambda: list_tickets_service(admin, db, page=page, page_size=args.page_size, status="all")
+
+        def keyset(cursor):
+            return lambda: list_tickets_service(
+                admin, db, page_size=args.page_size, status="all", pagination="cursor", cursor=cursor,
+            )
+
+        # Confere que as duas estratégias devolvem a mesma página profunda
+        same = (
+            [t.id for t in offset(deep_page)()["items"]] == [t.id for t in keyset(deep_cursor)()["items"]]
+        )
+
+        results = {
+            "tickets": db.query(func.count(Ticket.id)).scalar(),
+            "dialect": engine.dialect.name,
+            "page_size": args.page_size,
+            "deep_page_matches": same,
+            "offset": {"page_1": _time(offset(1), args.repeat), f"page_{deep_page}": _time(offset(deep_page), args.repeat)},
+            "cursor": {"page_1": _time(keyset(None), args.repeat), f"page_{deep_page}": _time(keyset(deep_cursor), args.repeat)},
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
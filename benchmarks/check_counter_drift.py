@@ -0,0 +1,97 @@
+"""
+Checagem de drift: exclui uma equipe e um usuário com tickets vinculados e confere ticket_counters.
+
+As exclusões passam pelas funções reais (rota delete_team e delete_user_service). Sem cascade,
+o flush desvincula os tickets (assigned_team_id/assigned_to = NULL); os contadores precisam
+acompanhar na mesma transação. Ao final, reconcile_ticket_counters(apply=False) deve reportar
+zero linhas divergentes.
+
+Por padrão usa SQLite em memória com o schema de seed_dataset.prepare_schema. Com --db-url
+aponte para uma base de teste descartável (as exclusões são gravadas). Sai com código 1 se
+houver drift.
+
+Uso:
+    python benchmarks/check_counter_drift.py [--db-url mysql+mysqlconnector://...] [--tickets 5000]
+                                             [--reassign 200]
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# database.py monta a URL do MySQL no import; valores fictícios bastam, o engine da checagem é outro
+for _var in ("DB_USER", "DB_PASSWORD", "DB_HOST", "DB_NAME"):
+    os.environ.setdefault(_var, "bench")
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from models import RoleEnum, Team, Ticket, User  # noqa: E402
+from routes.teams import delete_team  # noqa: E402
+from services.ticket_counters import reconcile_ticket_counters  # noqa: E402
+from services.user_service import delete_user_service  # noqa: E402
+from seed_dataset import BENCH_PASSWORD_HASH, prepare_schema, seed_dataset, sqlite_engine  # noqa: E402
+
+
+def _drift(db) -> list:
+    db.expire_all()
+    return reconcile_ticket_counters(db, apply=False)["drift"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", default="sqlite://")
+    parser.add_argument("--tickets", type=int, default=5_000)
+    parser.add_argument("--reassign", type=int, default=200, help="tickets vinculados à equipe/usuário excluídos")
+    args = parser.parse_args()
+
+    engine = sqlite_engine(args.db_url) if args.db_url.startswith("sqlite") else create_engine(args.db_url)
+    prepare_schema(engine)
+    with engine.connect() as conn:
+        empty = not conn.execute(text("SELECT COUNT(*) FROM users")).scalar()
+    if empty:
+        seed_dataset(engine, seed=6, tickets=args.tickets, log=lambda msg: print(msg, file=sys.stderr))
+    Session = sessionmaker(bind=engine)
+
+    steps = []
+    with Session() as db:
+        admin = db.query(User).filter(User.role == RoleEnum.admin).first()
+        steps.append({"step": "baseline", "drift": _drift(db)})
+
+        # Equipe e usuário novos: os da base têm categorias e tickets criados (FKs NOT NULL)
+        team = Team(name="Drift check")
+        user = User(
+            name="Drift check", email="drift-check@bench.local", password_hash=BENCH_PASSWORD_HASH,
+            role=RoleEnum.agent,
+        )
+        db.add_all([team, user])
+        db.flush()
+        tickets = db.query(Ticket).order_by(Ticket.id.desc()).limit(args.reassign).all()
+        for i, ticket in enumerate(tickets):
+            if i % 2:
+                ticket.assigned_team_id = team.id
+            else:
+                ticket.assigned_to = user.id
+        db.commit()
+        steps.append({"step": "reassign", "tickets": len(tickets), "drift": _drift(db)})
+
+        delete_team(team_id=team.id, db=db, current_user=admin)
+        steps.append({"step": "delete_team", "drift": _drift(db)})
+
+        delete_user_service(target_user_id=user.id, current_user=admin, db=db)
+        steps.append({"step": "delete_user", "drift": _drift(db)})
+
+    failures = [s["step"] for s in steps if s["drift"]]
+    print(json.dumps({
+        "dialect": engine.dialect.name,
+        "ok": not failures,
+        "failures": failures,
+        "steps": steps,
+    }, indent=2, default=str))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Checagem de planos: roda EXPLAIN nas consultas quentes e falha se alguma cair em full scan.
+
+As consultas não são reescritas aqui: o script chama as funções reais (list_tickets_service,
+inclusive uma página profunda do modo cursor, rotas de notificações, /reports/activity, /ticket-logs, escopo de hotéis/times do usuário),
+captura os SELECTs com um listener before_cursor_execute e roda EXPLAIN em cada um.
+
+  - MySQL:  EXPLAIN; full scan = type ALL numa tabela do schema
+  - SQLite: EXPLAIN QUERY PLAN; full scan = "SCAN <tabela>" sem índice
+
+Tabelas derivadas/subconsultas materializadas não contam, nem tabelas com menos de
+--min-rows linhas (varrer teams ou hotels inteiros é o plano certo).
+
+Por padrão usa SQLite em memória com o schema de seed_dataset.prepare_schema (models, índices
+das migrations e um índice por FK, como o InnoDB). Para o resultado que vale, aponte --db-url
+para um MySQL de teste já migrado (alembic upgrade head); a base vazia é populada por
+seed_dataset. Sai com código 1 se houver full scan.
+
+Uso:
+    python benchmarks/check_query_plans.py [--db-url mysql+mysqlconnector://...] [--tickets 20000]
+                                           [--min-rows 1000]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# database.py monta a URL do MySQL no import; valores fictícios bastam, o engine da checagem é outro
+for _var in ("DB_USER", "DB_PASSWORD", "DB_HOST", "DB_NAME"):
+    os.environ.setdefault(_var, "bench")
+
+from sqlalchemy import create_engine, event, func, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import models  # noqa: E402
+from models import RoleEnum, Ticket, TicketLog, User  # noqa: E402
+from routes.notifications import get_notifications, get_unread_count  # noqa: E402
+from routes.reports import get_activity_report  # noqa: E402
+from routes.ticket_logs import list_ticket_logs  # noqa: E402
+from services.authorization import get_user_accessible_hotel_ids, get_user_accessible_team_ids  # noqa: E402
+from services.ticket_service import _encode_cursor, list_tickets_service  # noqa: E402
+from seed_dataset import prepare_schema, seed_dataset, sqlite_engine  # noqa: E402
+
+
+def _hot_queries(db, admin, agent, report_from: date, report_to: date, ticket_id: int, cursor: str) -> dict:
+    return {
+        "tickets_agent_scope": lambda: list_tickets_service(agent, db, status="open"),
+        "tickets_admin_deep_cursor": lambda: list_tickets_service(
+            admin, db, status="all", pagination="cursor", cursor=cursor,
+        ),
+        "notifications_list": lambda: get_notifications(db=db, current_user=agent),
+        "notifications_unread_count": lambda: get_unread_count(db=db, current_user=agent),
+        "reports_activity": lambda: get_activity_report(
+            user_id=agent.id, start_date=report_from, end_date=report_to, db=db, current_user=admin,
+        ),
+        "ticket_logs": lambda: list_ticket_logs(ticket_id=ticket_id, db=db, current_user=admin),
+        "user_hotels_scope": lambda: get_user_accessible_hotel_ids(agent.id, db),
+        "user_teams_scope": lambda: get_user_accessible_team_ids(agent.id, db),
+    }
+
+
+def _base_table(name: str, tables) -> str | None:
+    # Aliases do ORM (hotels_1, users_2) apontam para a tabela base; anon_1/<derived2> não
+    if name in tables:
+        return name
+    stripped = re.sub(r"_\d+$", "", name)
+    return stripped if stripped in tables else None
+
+
+def _explain(conn, statement: str, parameters, tables) -> tuple[list, list[str]]:
+    """Plano do statement e lista das tabelas base lidas por full scan."""
+    scans = []
+    if conn.dialect.name == "mysql":
+        rows = conn.exec_driver_sql(f"EXPLAIN {statement}", parameters).mappings().all()
+        plan = [
+            {"table": r["table"], "type": r["type"], "key": r["key"], "rows": r["rows"], "extra": r["Extra"]}
+            for r in rows
+        ]
+        for r in plan:
+            table = _base_table(r["table"] or "", tables)
+            if table and r["type"] == "ALL":
+                scans.append(table)
+    else:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+        plan = [r[3] for r in rows]
+        for detail in plan:
+            match = re.match(r"SCAN (\S+)(.*)$", detail)
+            if match and "INDEX" not in match.group(2):
+                table = _base_table(match.group(1), tables)
+                if table:
+                    scans.append(table)
+    return plan, scans
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", default="sqlite://")
+    parser.add_argument("--tickets", type=int, default=20_000)
+    parser.add_argument("--min-rows", type=int, default=1_000)
+    args = parser.parse_args()
+
+    engine = sqlite_engine(args.db_url) if args.db_url.startswith("sqlite") else create_engine(args.db_url)
+    prepare_schema(engine)
+    with engine.connect() as conn:
+        empty = not conn.execute(text("SELECT COUNT(*) FROM users")).scalar()
+    if empty:
+        seed_dataset(engine, seed=24, tickets=args.tickets, log=lambda msg: print(msg, file=sys.stderr))
+    Session = sessionmaker(bind=engine)
+
+    tables = set(models.Base.metadata.tables)
+    with engine.connect() as conn:
+        row_counts = {t: conn.execute(text(f"SELECT COUNT(*) FROM {t}")).scalar() for t in sorted(tables)}
+
+    captured: list[tuple[str, object]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    results = []
+    with Session() as db:
+        admin = db.query(User).filter(User.role == RoleEnum.admin).first()
+        # Agente com mais logs: o relatório de atividade do pior caso
+        agent = (
+            db.query(User)
+            .join(TicketLog, TicketLog.user_id == User.id)
+            .filter(User.role == RoleEnum.agent)
+            .group_by(User.id)
+            .order_by(text("COUNT(*) DESC"))
+            .first()
+        )
+        ticket_id = db.query(TicketLog.ticket_id).order_by(TicketLog.id.desc()).limit(1).scalar()
+        # Janela dos últimos 90 dias da base (a âncora do seed pode não ser hoje)
+        last_day = db.query(func.max(TicketLog.created_at)).scalar().date()
+        # Cursor no meio da base: página profunda do keyset
+        middle = db.query(Ticket).order_by(Ticket.created_at.desc(), Ticket.id.desc()).offset(
+            db.query(Ticket).count() // 2
+        ).first()
+        queries = _hot_queries(
+            db, admin, agent, last_day - timedelta(days=90), last_day, ticket_id, _encode_cursor(middle),
+        )
+
+        for name, run in queries.items():
+            captured.clear()
+            event.listen(engine, "before_cursor_execute", capture)
+            try:
+                run()
+            finally:
+                event.remove(engine, "before_cursor_execute", capture)
+
+            conn = db.connection()
+            for statement, parameters in captured:
+                plan, scans = _explain(conn, statement, parameters, tables)
+                full_scans = sorted({t for t in scans if row_counts.get(t, 0) >= args.min_rows})
+                results.append({
+                    "query": name,
+                    "sql": " ".join(statement.split())[:160],
+                    "plan": plan,
+                    "full_scans": full_scans,
+                })
+
+    failures = [r for r in results if r["full_scans"]]
+    print(json.dumps({
+        "dialect": engine.dialect.name,
+        "rows": {t: n for t, n in row_counts.items() if n},
+        "min_rows": args.min_rows,
+        "statements": len(results),
+        "ok": not failures,
+        "failures": [{"query": r["query"], "full_scans": r["full_scans"], "sql": r["sql"]} for r in failures],
+        "plans": results,
+    }, indent=2, default=str))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+Carga ponta a ponta nas rotas reais da API, com p50/p95/p99 e vazão gravados em JSON.
+
+Cenários (cada um roda --duration segundos com --concurrency clientes em laço fechado):
+
+  - tickets_agent:          GET /tickets/?status=open (agente: escopo por times e hotéis)
+  - tickets_client:         GET /tickets/ (recepcionista: escopo por hotel)
+  - tickets_admin_cursor:   GET /tickets/?status=all&pagination=cursor
+  - dashboard_operational:  GET /dashboard/operational
+  - dashboard_productivity: GET /dashboard/productivity
+  - dashboard_sla:          GET /dashboard/sla (SQL do MySQL; pulado no SQLite)
+  - dashboard_bottlenecks:  GET /dashboard/bottlenecks (SQL do MySQL; pulado no SQLite)
+  - notifications_poll:     GET /notifications/unread-count e, a cada 5, GET /notifications
+  - comment_mention:        POST /comments/ de um agente com @menção ao cliente do chamado
+
+Por padrão sobe a app (main.app) no próprio processo via httpx.ASGITransport, com
+database.SessionLocal apontado para --db-url (o lifespan não roda: sem sweeper e sem
+Qualitor). Com --base-url, manda as requisições para um uvicorn já rodando; --db-url deve
+ser a mesma base do servidor (o harness lê usuários e chamados dela) e SECRET_KEY/ALGORITHM
+do ambiente precisam ser os do servidor, porque os tokens são emitidos aqui.
+
+A base vazia é populada por seed_dataset (âncora = hoje, para as janelas relativas a agora
+dos painéis); uma base já populada é reaproveitada. comment_mention grava comentários e
+notificações, então rodadas seguidas não partem exatamente da mesma base. Painéis em cache
+(dashboard_cache) são medidos como servidos, com o cache.
+
+O JSON de saída tem chaves ordenadas, para diff entre commits:
+
+    python benchmarks/load_routes.py --output antes.json
+    git checkout outro-commit && python benchmarks/load_routes.py --output depois.json
+
+Uso:
+    python benchmarks/load_routes.py [--db-url sqlite:////tmp/helpdesk_load.db] [--tickets 50000]
+                                     [--seed 42] [--concurrency 8] [--duration 10] [--warmup 20]
+                                     [--scenarios tickets_agent,comment_mention] [--base-url URL]
+                                     [--output load_routes.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Callable, NamedTuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# database.py e config.validate_env exigem estas variáveis; o engine de verdade é o do --db-url
+for _var in ("DB_USER", "DB_PASSWORD", "DB_HOST", "DB_NAME"):
+    os.environ.setdefault(_var, "bench")
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "600")
+
+import httpx  # noqa: E402
+from sqlalchemy import create_engine, func, text  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+import database  # noqa: E402
+from auth_utils import create_access_token  # noqa: E402
+from models import ProgressEnum, RoleEnum, StatusEnum, Ticket, User, UserTeam  # noqa: E402
+from seed_dataset import prepare_schema, seed_dataset, sqlite_engine  # noqa: E402
+
+COMMENT_TICKETS_PER_AGENT = 200
+
+
+class _Context(NamedTuple):
+    admin: str                                  # token
+    agents: list[str]
+    clients: list[str]
+    pollers: list[str]
+    # token do agente → [(ticket_id, primeiro nome do cliente)]
+    commentable: dict[str, list[tuple[int, str]]]
+
+
+class _Scenario(NamedTuple):
+    name: str
+    mysql_only: bool
+    # (contexto, rng, nº da requisição) → (método, caminho, corpo JSON, token)
+    request: Callable
+
+
+def _bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _tickets_agent(ctx, rng, i):
+    return "GET", "/tickets/?status=open&page_size=50", None, rng.choice(ctx.agents)
+
+
+def _tickets_client(ctx, rng, i):
+    return "GET", "/tickets/?status=open&page_size=50", None, rng.choice(ctx.clients)
+
+
+def _tickets_admin_cursor(ctx, rng, i):
+    return "GET", "/tickets/?status=all&pagination=cursor&page_size=50", None, ctx.admin
+
+
+def _dashboard(path):
+    return lambda ctx, rng, i: ("GET", path, None, ctx.admin)
+
+
+def _notifications_poll(ctx, rng, i):
+    # O front faz polling do contador e abre a lista de vez em quando
+    path = "/notifications" if i % 5 == 4 else "/notifications/unread-count"
+    return "GET", path, None, rng.choice(ctx.pollers)
+
+
+def _comment_mention(ctx, rng, i):
+    token = rng.choice([t for t in ctx.agents if ctx.commentable.get(t)])
+    ticket_id, first_name = rng.choice(ctx.commentable[token])
+    body = {"ticket_id": ticket_id, "comment": f"@{first_name} verificado no local, pode testar? (carga {i})"}
+    return "POST", "/comments/", body, token
+
+
+SCENARIOS = (
+    _Scenario("tickets_agent", False, _tickets_agent),
+    _Scenario("tickets_client", False, _tickets_client),
+    _Scenario("tickets_admin_cursor", False, _tickets_admin_cursor),
+    _Scenario("dashboard_operational", False, _dashboard("/dashboard/operational")),
+    _Scenario("dashboard_productivity", False, _dashboard("/dashboard/productivity")),
+    _Scenario("dashboard_sla", True, _dashboard("/dashboard/sla")),
+    _Scenario("dashboard_bottlenecks", True, _dashboard("/dashboard/bottlenecks")),
+    _Scenario("notifications_poll", False, _notifications_poll),
+    _Scenario("comment_mention", False, _comment_mention),
+)
+
+
+def _context(engine, rng: random.Random, users_per_role: int) -> _Context:
+    with Session(engine) as db:
+        def tokens(role: RoleEnum) -> dict[int, str]:
+            users = db.query(User).filter(User.role == role).order_by(User.id).all()
+            picked = rng.sample(users, min(users_per_role, len(users)))
+            return {u.id: create_access_token(u) for u in picked}
+
+        admin = tokens(RoleEnum.admin)
+        agents = tokens(RoleEnum.agent)
+        clients = tokens(RoleEnum.client_receptionist)
+
+        # Chamados abertos e em andamento dos times de cada agente (agentes têm todos os hotéis)
+        commentable = {}
+        creator = db.query(User.id, User.name).subquery()
+        for agent_id, token in agents.items():
+            team_ids = [t for (t,) in db.query(UserTeam.team_id).filter(UserTeam.user_id == agent_id)]
+            rows = (
+                db.query(Ticket.id, creator.c.name)
+                .join(creator, creator.c.id == Ticket.created_by)
+                .filter(
+                    Ticket.status == StatusEnum.open,
+                    Ticket.progress.in_([ProgressEnum.in_progress, ProgressEnum.feedback]),
+                    Ticket.assigned_team_id.in_(team_ids),
+                )
+                .order_by(Ticket.id)
+                .limit(COMMENT_TICKETS_PER_AGENT)
+                .all()
+            ) if team_ids else []
+            commentable[token] = [(ticket_id, name.split()[0]) for ticket_id, name in rows]
+
+        return _Context(
+            admin=next(iter(admin.values())),
+            agents=list(agents.values()),
+            clients=list(clients.values()),
+            pollers=list(agents.values()) + list(clients.values()),
+            commentable=commentable,
+        )
+
+
+def _percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pct(p):
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000, 2)
+
+    return {
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "mean_ms": round(statistics.mean(ordered) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+async def _run_scenario(client: httpx.AsyncClient, scenario: _Scenario, ctx: _Context, *,
+                        concurrency: int, duration: float, warmup: int, seed: int) -> dict:
+    async def send(rng, i):
+        method, path, body, token = scenario.request(ctx, rng, i)
+        return await client.request(method, path, json=body, headers=_bearer(token))
+
+    # Aquecimento fora da medição: pool de conexões, principal_cache, caches de painel
+    rng = random.Random(seed)
+    for i in range(warmup):
+        await send(rng, i)
+
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    deadline = time.perf_counter() + duration
+
+    async def worker(n: int):
+        rng = random.Random(seed * 1000 + n)
+        i = 0
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                response = await send(rng, i)
+                statuses[str(response.status_code)] += 1
+            except httpx.HTTPError as exc:
+                statuses[type(exc).__name__] += 1
+            latencies.append(time.perf_counter() - t0)
+            i += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+
+    ok = sum(n for code, n in statuses.items() if code.startswith("2"))
+    return {
+        "requests": len(latencies),
+        "errors": len(latencies) - ok,
+        "status": dict(sorted(statuses.items())),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        **_percentiles(latencies),
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _main(args) -> dict:
+    if args.db_url.startswith("sqlite"):
+        engine = sqlite_engine(args.db_url)
+    else:
+        engine = create_engine(args.db_url, pool_size=args.concurrency, max_overflow=args.concurrency)
+    prepare_schema(engine)
+    with engine.connect() as conn:
+        empty = not conn.execute(text("SELECT COUNT(*) FROM users")).scalar()
+    if empty:
+        seed_dataset(
+            engine, seed=args.seed, tickets=args.tickets, anchor=datetime.now(timezone.utc).date(),
+            log=lambda msg: print(msg, file=sys.stderr),
+        )
+
+    with Session(engine) as db:
+        dataset = {
+            "tickets": db.query(func.count(Ticket.id)).scalar(),
+            "users": db.query(func.count(User.id)).scalar(),
+            "last_ticket_at": db.query(func.max(Ticket.created_at)).scalar(),
+        }
+    ctx = _context(engine, random.Random(args.seed), args.users)
+
+    if args.base_url:
+        mode = "http"
+        client = httpx.AsyncClient(
+            base_url=args.base_url, timeout=60,
+            limits=httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency),
+        )
+    else:
+        mode = "asgi"
+        # get_db, dashboard e stream abrem sessões por database.SessionLocal
+        database.SessionLocal.configure(bind=engine)
+        from main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+    selected = set(args.scenarios.split(",")) if args.scenarios else None
+    results = {}
+    async with client:
+        for scenario in SCENARIOS:
+            if selected is not None and scenario.name not in selected:
+                continue
+            if scenario.mysql_only and engine.dialect.name != "mysql":
+                results[scenario.name] = {"skipped": "mysql_only"}
+                continue
+            print(f"load: {scenario.name}", file=sys.stderr)
+            results[scenario.name] = await _run_scenario(
+                client, scenario, ctx, concurrency=args.concurrency, duration=args.duration,
+                warmup=args.warmup, seed=args.seed,
+            )
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "mode": mode,
+            "dialect": engine.dialect.name,
+            "python": platform.python_version(),
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup": args.warmup,
+            "seed": args.seed,
+        },
+        "dataset": dataset,
+        "scenarios": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", default="sqlite:////tmp/helpdesk_load.db")
+    parser.add_argument("--base-url", default=None, help="uvicorn já rodando (padrão: app no processo)")
+    parser.add_argument("--tickets", type=int, default=50_000, help="volume do seed, se a base estiver vazia")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--users", type=int, default=20, help="usuários sorteados por perfil")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="segundos por cenário")
+    parser.add_argument("--warmup", type=int, default=20, help="requisições por cenário antes de medir")
+    parser.add_argument("--scenarios", default=None, help="lista separada por vírgula (padrão: todos)")
+    parser.add_argument("--output", default="load_routes.json")
+    args = parser.parse_args()
+
+    report = asyncio.run(_main(args))
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2, sort_keys=True, default=str)
+        fh.write("\n")
+    print(json.dumps(report["scenarios"], indent=2, sort_keys=True))
+    print(f"resultado gravado em {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,554 @@
+"""
+Gerador de base sintética com volumes de produção, determinístico pela semente.
+
+Preenche o schema de models.py: hotéis (parte com calendário de expediente), times, categorias,
+subcategorias e políticas SLA, usuários com vínculos de hotel/time, tickets com histórico
+coerente (logs, comentários com @menções, ticket_sla, notificações) e o mural (posts,
+comentários, confirmações de leitura). No fim reconstrói ticket_counters.
+
+Mesma semente + mesma âncora + mesmos volumes = mesma base, com os mesmos ids (todos
+explícitos). As datas vão de --days dias antes da âncora até ela; a âncora padrão é fixa
+para a base não mudar de um dia para o outro — use --anchor today quando os painéis com
+janela relativa a agora (últimas 24 h, mês corrente) importarem.
+
+Inserções em lote pelo Core (sem ORM), em blocos de CHUNK_TICKETS tickets com seus filhos.
+No SQLite cria o schema (models + índices das migrations); num MySQL o schema vem das
+migrations (alembic upgrade head) e a base precisa estar vazia. Todos os usuários têm a
+senha BENCH_PASSWORD.
+
+Uso:
+    python benchmarks/seed_dataset.py [--db-url sqlite:////tmp/helpdesk_seed.db] [--seed 42]
+                                      [--tickets 1000000] [--anchor 2026-10-01|today] [--days 730]
+                                      [--reset]
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# database.py monta a URL do MySQL no import; valores fictícios bastam, o engine do seed é outro
+for _var in ("DB_USER", "DB_PASSWORD", "DB_HOST", "DB_NAME"):
+    os.environ.setdefault(_var, "bench")
+
+from sqlalchemy import create_engine, event, insert, inspect, text  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+import models  # noqa: E402
+from models import (  # noqa: E402
+    Category, Hotel, LogActionEnum, MuralAck, MuralComment, MuralPost, Notification, SLACalendar,
+    SLACalendarHoliday, SLACalendarHours, SLAPolicy, SubCategory, Team, Ticket, TicketComment,
+    TicketLog, TicketSLA, User, UserHotel, UserTeam,
+)
+from services.sla_calendar import BusinessCalendar, add_working_time  # noqa: E402
+from services.ticket_counters import reconcile_ticket_counters  # noqa: E402
+
+DEFAULT_ANCHOR = date(2026, 10, 1)
+CHUNK_TICKETS = 2_000
+
+BENCH_PASSWORD = "bench123"
+# bcrypt de BENCH_PASSWORD, fixo: gerar a cada execução quebraria o determinismo
+BENCH_PASSWORD_HASH = "$2b$12$a2lGacidBrR84abPZCp1FeAlFuNS3OZHAdb7WnD3C6T5y5BeSpM2K"
+
+FIRST_NAMES = (
+    "Ana", "Bruno", "Carla", "Diego", "Eduarda", "Felipe", "Gabriela", "Henrique", "Isabela", "João",
+    "Karina", "Lucas", "Mariana", "Nicolas", "Olívia", "Paulo", "Rafaela", "Sérgio", "Tatiane", "Vitor",
+    "Amanda", "Caio", "Débora", "Fábio", "Helena", "Igor", "Juliana", "Leonardo", "Márcia", "Renato",
+)
+LAST_NAMES = (
+    "Silva", "Santos", "Oliveira", "Souza", "Lima", "Pereira", "Costa", "Rodrigues", "Almeida", "Nascimento",
+    "Carvalho", "Gomes", "Martins", "Araújo", "Ribeiro", "Barbosa", "Rocha", "Dias", "Teixeira", "Moreira",
+)
+CITIES = (
+    "São Paulo", "Rio de Janeiro", "Belo Horizonte", "Curitiba", "Porto Alegre", "Salvador", "Recife",
+    "Fortaleza", "Brasília", "Florianópolis", "Goiânia", "Campinas", "Vitória", "Natal", "Manaus",
+)
+
+# Time → categoria → subcategorias (os times do Qualitor não recebem chamados do helpdesk)
+CATALOG = {
+    "TI": {
+        "Rede e Wi-Fi": ("Wi-Fi do hóspede sem conexão", "Switch sem link", "Lentidão na internet"),
+        "Computadores": ("Computador não liga", "Impressora fiscal", "Troca de periférico"),
+        "Sistemas": ("Erro no PMS", "Acesso bloqueado", "Integração de reservas", "Relatório não gera"),
+    },
+    "Manutenção": {
+        "Elétrica": ("Tomada sem energia", "Lâmpada queimada", "Disjuntor desarmando"),
+        "Hidráulica": ("Vazamento", "Chuveiro sem água quente", "Descarga com defeito"),
+        "Ar-condicionado": ("Ar não gela", "Ruído no equipamento", "Controle remoto"),
+    },
+    "Governança": {
+        "Enxoval": ("Falta de toalhas", "Troca de roupa de cama"),
+        "Limpeza": ("Limpeza extra", "Dedetização", "Odor no apartamento"),
+    },
+    "Recepção": {
+        "Telefonia": ("Ramal mudo", "Central telefônica"),
+        "Fechaduras": ("Cartão não abre a porta", "Codificador de cartões"),
+    },
+}
+QUALITOR_TEAMS = ("RM1", "RM1 SAP")
+
+# nome, 1ª resposta (h), resolução (h), prioridade
+SLA_POLICIES = (
+    ("Crítico", 1, 4, "high"),
+    ("Alta", 2, 8, "high"),
+    ("Normal", 4, 24, "medium"),
+    ("Baixa", 8, 72, "low"),
+)
+
+# Expediente do calendário "Comercial": seg–sex 08–18, sábado 08–12
+COMMERCIAL_HOURS = {d: [(480, 1080)] for d in range(5)} | {5: [(480, 720)]}
+HOLIDAYS = ((1, 1), (4, 21), (5, 1), (9, 7), (10, 12), (11, 2), (11, 15), (11, 20), (12, 25))
+
+# Abertura de chamados por hora do dia (pico na manhã e no começo da tarde)
+HOUR_WEIGHTS = (1, 1, 1, 1, 1, 2, 4, 8, 12, 14, 13, 11, 8, 10, 12, 11, 9, 7, 5, 4, 3, 2, 2, 1)
+OPEN_PROGRESS = (("waiting", 25), ("in_progress", 35), ("feedback", 15), ("awaiting_confirmation", 15),
+                 ("scheduled_visit", 10))
+
+# Índices das migrations (o SQLite sai só do create_all); a lista inclui os das tabelas quentes
+MIGRATION_INDEXES = (
+    ("ix_tickets_status_created_at", "tickets", ("status", "created_at")),
+    ("ix_tickets_progress", "tickets", ("progress",)),
+    ("ix_tickets_priority", "tickets", ("priority",)),
+    ("ix_tickets_updated_at", "tickets", ("updated_at",)),
+    ("ix_tickets_created_at_id", "tickets", ("created_at", "id")),
+    ("ix_tickets_status_team_hotel_created_at", "tickets", ("status", "assigned_team_id", "hotel_id", "created_at")),
+    ("ix_ticket_logs_action_created_at", "ticket_logs", ("action", "created_at")),
+    ("ix_ticket_logs_user_id_created_at", "ticket_logs", ("user_id", "created_at")),
+    ("ix_ticket_logs_ticket_id_created_at", "ticket_logs", ("ticket_id", "created_at")),
+    ("ix_ticket_comments_ticket_id_created_at", "ticket_comments", ("ticket_id", "created_at")),
+    ("ix_ticket_sla_resolution_breached", "ticket_sla", ("resolution_breached",)),
+    ("ix_ticket_sla_response_sweep", "ticket_sla", ("response_breached", "response_met_at", "response_deadline")),
+    ("ix_ticket_sla_resolution_sweep", "ticket_sla",
+     ("resolution_breached", "resolution_met_at", "resolution_deadline")),
+    ("ix_notifications_read", "notifications", ("read",)),
+    ("ix_notifications_user_read_created_at", "notifications", ("user_id", "read", "created_at")),
+)
+
+
+def prepare_schema(engine) -> None:
+    """SQLite: schema dos models + índices das migrations + um índice por FK (como o InnoDB)."""
+    if engine.dialect.name != "sqlite":
+        return
+    models.Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for name, table, columns in MIGRATION_INDEXES:
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"))
+
+        # Equivalente aos índices implícitos do InnoDB: FK sem índice que a tenha como prefixo
+        insp = inspect(conn)
+        for table in models.Base.metadata.sorted_tables:
+            leading = {idx["column_names"][0] for idx in insp.get_indexes(table.name)}
+            leading |= {uq["column_names"][0] for uq in insp.get_unique_constraints(table.name)}
+            leading |= set(insp.get_pk_constraint(table.name)["constrained_columns"][:1])
+            for fk in table.foreign_keys:
+                column = fk.parent.name
+                if column not in leading:
+                    conn.execute(text(f"CREATE INDEX fk_{table.name}_{column} ON {table.name} ({column})"))
+                    leading.add(column)
+
+
+def sqlite_engine(url: str):
+    """Engine SQLite utilizável por várias threads (rotas síncronas rodam no threadpool)."""
+    if url in ("sqlite://", "sqlite:///:memory:"):
+        return create_engine(url, poolclass=StaticPool, connect_args={"check_same_thread": False})
+    engine = create_engine(url, connect_args={"check_same_thread": False, "timeout": 30})
+
+    # WAL: leituras não esperam pela escrita em andamento (carga mista do load_routes)
+    @event.listens_for(engine, "connect")
+    def _wal(dbapi_connection, _record):
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+    return engine
+
+
+def _insert(conn, model, rows: list[dict]) -> None:
+    if rows:
+        conn.execute(insert(model.__table__), rows)
+
+
+class _Generator:
+    def __init__(self, rng: random.Random, anchor: datetime, days: int, tickets: int):
+        self.rng = rng
+        self.anchor = anchor
+        self.days = days
+        self.tickets = tickets
+        self.ids = {}
+        self.counts = {}
+
+    def _next_id(self, table: str) -> int:
+        self.ids[table] = self.ids.get(table, 0) + 1
+        return self.ids[table]
+
+    def _emit(self, rows: dict, model, row: dict) -> None:
+        table = model.__tablename__
+        rows.setdefault(model, []).append(row)
+        self.counts[table] = self.counts.get(table, 0) + 1
+
+    def _person(self) -> str:
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    # ── Cadastros ──────────────────────────────────────────────────────────────
+
+    def reference_rows(self) -> dict:
+        rng = self.rng
+        rows: dict = {}
+
+        self._emit(rows, SLACalendar, {"id": 1, "name": "Comercial", "timezone": "America/Sao_Paulo", "version": 1})
+        for weekday, intervals in COMMERCIAL_HOURS.items():
+            for start, end in intervals:
+                self._emit(rows, SLACalendarHours, {
+                    "id": self._next_id("sla_calendar_hours"), "calendar_id": 1,
+                    "weekday": weekday, "start_minute": start, "end_minute": end,
+                })
+        years = range(self.anchor.year - math.ceil(self.days / 365) - 1, self.anchor.year + 3)
+        holidays = {date(y, m, d) for y in years for m, d in HOLIDAYS}
+        for day in sorted(holidays):
+            self._emit(rows, SLACalendarHoliday, {
+                "id": self._next_id("sla_calendar_holidays"), "calendar_id": 1, "date": day, "name": "Feriado",
+            })
+        self.calendar = BusinessCalendar(1, "America/Sao_Paulo", COMMERCIAL_HOURS, holidays)
+
+        # Tamanho da rede proporcional ao volume de chamados; peso de Zipf: poucos hotéis grandes
+        n_hotels = max(5, min(400, self.tickets // 8_000))
+        self.hotels = []
+        for i in range(1, n_hotels + 1):
+            calendar_id = 1 if i % 3 == 0 else None
+            self._emit(rows, Hotel, {
+                "id": i, "code": f"H{i:04d}", "name": f"Hotel {rng.choice(CITIES)} {i}", "sla_calendar_id": calendar_id,
+            })
+            self.hotels.append((i, calendar_id))
+        self.hotel_weights = [1 / (rank ** 0.8) for rank in range(1, n_hotels + 1)]
+
+        self.teams = {}
+        for name in (*CATALOG, *QUALITOR_TEAMS):
+            team_id = self._next_id("teams")
+            self.teams[name] = team_id
+            self._emit(rows, Team, {"id": team_id, "name": name})
+
+        self.policies = {}
+        for name, response, resolution, priority in SLA_POLICIES:
+            policy_id = self._next_id("sla_policies")
+            self.policies[policy_id] = (name, response, resolution, priority)
+            self._emit(rows, SLAPolicy, {
+                "id": policy_id, "name": name, "first_response_hours": response,
+                "resolution_hours": resolution, "priority": priority,
+            })
+
+        # (subcategory_id, category_id, team_id, nome, policy_id); ~15% sem política
+        self.subcategories = []
+        for team_name, categories in CATALOG.items():
+            for category_name, subcategories in categories.items():
+                category_id = self._next_id("categories")
+                self._emit(rows, Category, {"id": category_id, "name": category_name, "team_id": self.teams[team_name]})
+                for sub_name in subcategories:
+                    sub_id = self._next_id("subcategories")
+                    policy_id = None if rng.random() < 0.15 else rng.choice(list(self.policies))
+                    self._emit(rows, SubCategory, {
+                        "id": sub_id, "name": sub_name, "category_id": category_id, "sla_policy_id": policy_id,
+                    })
+                    self.subcategories.append((sub_id, category_id, self.teams[team_name], sub_name, policy_id))
+
+        # Usuários: admins, agentes (todos os hotéis, 1–2 times) e, por hotel, gerente + recepcionistas
+        self.users = {}
+        self.admins, self.agents_by_team, self.clients_by_hotel = [], {}, {}
+
+        def user(role: str) -> int:
+            user_id = self._next_id("users")
+            name = self._person()
+            self.users[user_id] = name
+            self._emit(rows, User, {
+                "id": user_id, "name": name, "email": f"user{user_id}@bench.example.com",
+                "password_hash": BENCH_PASSWORD_HASH, "role": role,
+                "created_at": self.anchor - timedelta(days=self.days + rng.randint(1, 90)),
+            })
+            return user_id
+
+        for _ in range(3):
+            self.admins.append(user("admin"))
+        helpdesk_teams = [self.teams[name] for name in CATALOG]
+        for _ in range(max(len(helpdesk_teams) * 2, self.tickets // 12_000)):
+            agent_id = user("agent")
+            teams = rng.sample(helpdesk_teams, rng.choice((1, 1, 2)))
+            if rng.random() < 0.2:
+                teams.append(self.teams[rng.choice(QUALITOR_TEAMS)])
+            for team_id in teams:
+                self.agents_by_team.setdefault(team_id, []).append(agent_id)
+                self._emit(rows, UserTeam, {"id": self._next_id("user_teams"), "user_id": agent_id, "team_id": team_id})
+            for hotel_id, _ in self.hotels:
+                self._emit(rows, UserHotel, {"id": self._next_id("user_hotels"), "user_id": agent_id, "hotel_id": hotel_id})
+        for hotel_id, _ in self.hotels:
+            staff = [user("client_manager")] + [user("client_receptionist") for _ in range(rng.randint(2, 4))]
+            self.clients_by_hotel[hotel_id] = staff
+            for user_id in staff:
+                self._emit(rows, UserHotel, {"id": self._next_id("user_hotels"), "user_id": user_id, "hotel_id": hotel_id})
+        return rows
+
+    # ── Chamados ───────────────────────────────────────────────────────────────
+
+    def _created_at(self) -> datetime:
+        day = self.anchor - timedelta(days=self.rng.randrange(self.days) + 1)
+        hour = self.rng.choices(range(24), HOUR_WEIGHTS)[0]
+        return day.replace(hour=hour, minute=self.rng.randrange(60), second=self.rng.randrange(60))
+
+    def _after(self, start: datetime, mean_hours: float) -> datetime:
+        return start + timedelta(seconds=int(self.rng.expovariate(1 / (mean_hours * 3600))) + 60)
+
+    def _status(self, age_days: float) -> str:
+        if age_days > 30:
+            weights = (3, 92, 5)
+        elif age_days > 7:
+            weights = (25, 70, 5)
+        else:
+            weights = (75, 22, 3)
+        return self.rng.choices(("open", "closed", "cancelled"), weights)[0]
+
+    def ticket_rows(self, ticket_id: int) -> dict:
+        rng = self.rng
+        rows: dict = {}
+        anchor = self.anchor
+
+        hotel_id, calendar_id = rng.choices(self.hotels, self.hotel_weights)[0]
+        sub_id, category_id, team_id, sub_name, policy_id = rng.choice(self.subcategories)
+        clients = self.clients_by_hotel[hotel_id]
+        creator = rng.choice(clients)
+        created = self._created_at()
+        status = self._status((anchor - created).total_seconds() / 86400)
+
+        if status == "closed":
+            progress = "done"
+        elif status == "cancelled":
+            progress = "waiting"
+        else:
+            progress = rng.choices(*zip(*OPEN_PROGRESS))[0]
+
+        assignee = None
+        started = resolved = finished = paused_at = None
+        paused_seconds = 0
+        if progress != "waiting":
+            assignee = rng.choice(self.agents_by_team[team_id])
+            started = min(self._after(created, 2), anchor)
+            if progress in ("awaiting_confirmation", "done"):
+                resolved = min(self._after(started, 20), anchor)
+            if progress == "done":
+                finished = min(self._after(resolved, 24), anchor)
+            if progress == "feedback":
+                paused_at = min(self._after(started, 6), anchor)
+            elif rng.random() < 0.2:
+                # Passou por feedback e voltou: pausa já contabilizada
+                paused_seconds = int(rng.expovariate(1 / 14_400)) + 300
+        elif status == "cancelled":
+            finished = min(self._after(created, 12), anchor)
+        updated = finished or resolved or paused_at or started or created
+
+        priority = self.policies[policy_id][3] if policy_id else rng.choice(("low", "medium", "medium", "high"))
+        self._emit(rows, Ticket, {
+            "id": ticket_id,
+            "title": f"{sub_name} — {self._room()}"[:100],
+            "description": f"{sub_name}. Aberto pela recepção do hotel {hotel_id}.",
+            "status": status, "progress": progress, "priority": priority,
+            "created_by": creator, "assigned_to": assignee, "hotel_id": hotel_id,
+            "assigned_team_id": team_id, "category_id": category_id, "subcategory_id": sub_id,
+            "created_at": created, "updated_at": updated,
+        })
+
+        def log(action: str, at: datetime, user_id=None, value=None):
+            self._emit(rows, TicketLog, {
+                "id": self._next_id("ticket_logs"), "ticket_id": ticket_id, "user_id": user_id,
+                "action": action, "value": value, "created_at": at,
+            })
+
+        def notify(user_id: int, type_: str, title: str, at: datetime):
+            fresh = (anchor - at).days < 7
+            self._emit(rows, Notification, {
+                "id": self._next_id("notifications"), "user_id": user_id, "type": type_, "title": title,
+                "ticket_id": ticket_id, "read": rng.random() < (0.4 if fresh else 0.97), "created_at": at,
+            })
+
+        log(LogActionEnum.created.value, created, creator)
+
+        if policy_id:
+            name, response_h, resolution_h, _ = self.policies[policy_id]
+            calendar = self.calendar if calendar_id else None
+            start = created.replace(tzinfo=timezone.utc)
+            response_deadline = add_working_time(calendar, start, response_h * 3600).replace(tzinfo=None)
+            resolution_deadline = add_working_time(calendar, start, resolution_h * 3600).replace(tzinfo=None)
+            eff_response = add_working_time(calendar, response_deadline, paused_seconds).replace(tzinfo=None)
+            eff_resolution = add_working_time(calendar, resolution_deadline, paused_seconds).replace(tzinfo=None)
+            self._emit(rows, TicketSLA, {
+                "id": self._next_id("ticket_sla"), "ticket_id": ticket_id, "policy_id": policy_id,
+                "calendar_id": calendar_id, "calendar_version": 1 if calendar_id else None,
+                "first_response_hours": response_h, "resolution_hours": resolution_h,
+                "started_at": created, "response_deadline": response_deadline,
+                "resolution_deadline": resolution_deadline, "response_met_at": started,
+                "resolution_met_at": resolved, "paused_at": paused_at, "total_paused_seconds": paused_seconds,
+                "response_breached": (started or anchor) > eff_response,
+                "resolution_breached": (resolved or anchor) > eff_resolution,
+                "effective_response_deadline": None if paused_at else eff_response,
+                "effective_resolution_deadline": None if paused_at else eff_resolution,
+            })
+            log(LogActionEnum.sla_started.value, created, None, name)
+
+        if started:
+            log(LogActionEnum.ticket_started.value, started, assignee)
+            self._comments(rows, ticket_id, creator, assignee, started, resolved or paused_at or updated, notify)
+        if paused_at:
+            log(LogActionEnum.progress_changed.value, paused_at, assignee, "feedback")
+            log(LogActionEnum.sla_paused.value, paused_at)
+        if resolved:
+            log(LogActionEnum.progress_changed.value, resolved, assignee, "awaiting_confirmation")
+            notify(creator, "awaiting_confirmation", f"Chamado #{ticket_id} aguardando sua confirmação", resolved)
+        if status == "closed":
+            log(LogActionEnum.ticket_closed.value, finished, creator)
+        elif status == "cancelled":
+            log(LogActionEnum.ticket_cancelled.value, finished, rng.choice((creator, *self.admins)))
+        return rows
+
+    def _room(self) -> str:
+        return f"apto {self.rng.randint(1, 20)}{self.rng.randint(1, 40):02d}"
+
+    def _comments(self, rows, ticket_id, client_id, agent_id, start, end, notify) -> None:
+        rng = self.rng
+        n = min(8, int(rng.expovariate(1 / 2.5)))
+        span = max(60, int((end - start).total_seconds()))
+        for at in sorted(start + timedelta(seconds=rng.randrange(span)) for _ in range(n)):
+            from_agent = rng.random() < 0.55
+            author, other = (agent_id, client_id) if from_agent else (client_id, agent_id)
+            mention = rng.random() < 0.25
+            first_name = self.users[other].split()[0]
+            body = rng.choice((
+                "Verificado no local, seguimos acompanhando.",
+                "Pode confirmar se o problema continua?",
+                "Peça já solicitada ao fornecedor.",
+                "O hóspede relatou novamente agora há pouco.",
+                "Ajuste feito, favor testar.",
+            ))
+            self._emit(rows, TicketComment, {
+                "id": self._next_id("ticket_comments"), "ticket_id": ticket_id, "user_id": author,
+                "comment": f"@{first_name} {body}" if mention else body, "created_at": at,
+            })
+            if mention:
+                notify(other, "mention", f"@{self.users[author].split()[0]} mencionou você", at)
+            elif from_agent:
+                notify(other, "staff_comment", f"Atualização no chamado #{ticket_id}", at)
+            else:
+                notify(other, "client_reply", f"Resposta do cliente no chamado #{ticket_id}", at)
+
+    # ── Mural ──────────────────────────────────────────────────────────────────
+
+    def mural_rows(self) -> dict:
+        rng = self.rng
+        rows: dict = {}
+        authors = self.admins + [a for team in self.agents_by_team.values() for a in team]
+        readers = list(self.users)
+        for _ in range(int(self.days * 1.5)):
+            post_id = self._next_id("mural_posts")
+            at = self._created_at()
+            self._emit(rows, MuralPost, {
+                "id": post_id, "author_id": rng.choice(authors), "created_at": at,
+                "body": rng.choice((
+                    "Manutenção programada do PMS nesta madrugada.",
+                    "Novo procedimento para troca de enxoval.",
+                    "Lembrete: registrar todos os chamados pelo portal.",
+                    "Atualização da rede Wi-Fi concluída.",
+                )),
+            })
+            for _ in range(int(rng.expovariate(1 / 1.5))):
+                self._emit(rows, MuralComment, {
+                    "id": self._next_id("mural_comments"), "post_id": post_id, "author_id": rng.choice(readers),
+                    "body": "Ciente.", "created_at": self._after(at, 4),
+                })
+            for user_id in rng.sample(readers, min(len(readers), int(rng.expovariate(1 / 25)))):
+                self._emit(rows, MuralAck, {
+                    "id": self._next_id("mural_acks"), "post_id": post_id, "user_id": user_id,
+                    "created_at": self._after(at, 8),
+                })
+        return rows
+
+
+def seed_dataset(engine, *, seed: int = 42, tickets: int = 1_000_000, anchor: date = DEFAULT_ANCHOR,
+                 days: int = 730, log=None) -> dict:
+    """Popula uma base vazia; devolve as contagens por tabela e o tempo gasto."""
+    with engine.connect() as conn:
+        if conn.execute(text("SELECT COUNT(*) FROM users")).scalar():
+            raise SystemExit("A base já tem dados; use uma base vazia (ou --reset no SQLite)")
+
+    t0 = time.perf_counter()
+    anchor_dt = datetime(anchor.year, anchor.month, anchor.day)
+    gen = _Generator(random.Random(seed), anchor_dt, days, tickets)
+
+    # A ordem dos lotes segue as FKs: pais antes dos filhos
+    order = (
+        SLACalendar, SLACalendarHours, SLACalendarHoliday, Hotel, Team, SLAPolicy, Category, SubCategory,
+        User, UserTeam, UserHotel, Ticket, TicketSLA, TicketLog, TicketComment, Notification,
+        MuralPost, MuralComment, MuralAck,
+    )
+
+    def flush(rows: dict) -> None:
+        with engine.begin() as conn:
+            for model in order:
+                _insert(conn, model, rows.get(model, ()))
+
+    flush(gen.reference_rows())
+    for first in range(1, tickets + 1, CHUNK_TICKETS):
+        rows: dict = {}
+        for ticket_id in range(first, min(first + CHUNK_TICKETS, tickets + 1)):
+            for model, batch in gen.ticket_rows(ticket_id).items():
+                rows.setdefault(model, []).extend(batch)
+        flush(rows)
+        if log:
+            log(f"seed: {min(first + CHUNK_TICKETS - 1, tickets)}/{tickets} tickets")
+    flush(gen.mural_rows())
+
+    with Session(engine) as db:
+        reconcile_ticket_counters(db, apply=True)
+    with engine.begin() as conn:
+        if engine.dialect.name == "mysql":
+            conn.execute(text(f"ANALYZE TABLE {', '.join(t.name for t in models.Base.metadata.sorted_tables)}"))
+        else:
+            conn.execute(text("ANALYZE"))
+
+    return {
+        "seed": seed,
+        "anchor": anchor.isoformat(),
+        "days": days,
+        "rows": dict(sorted(gen.counts.items())),
+        "elapsed_s": round(time.perf_counter() - t0, 1),
+    }
+
+
+def parse_anchor(value: str) -> date:
+    return datetime.now(timezone.utc).date() if value == "today" else date.fromisoformat(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", default="sqlite:////tmp/helpdesk_seed.db")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tickets", type=int, default=1_000_000)
+    parser.add_argument("--anchor", type=parse_anchor, default=DEFAULT_ANCHOR)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--reset", action="store_true", help="SQLite: apaga e recria o schema antes")
+    args = parser.parse_args()
+
+    if args.db_url.startswith("sqlite"):
+        engine = sqlite_engine(args.db_url)
+        if args.reset:
+            models.Base.metadata.drop_all(engine)
+        prepare_schema(engine)
+    else:
+        engine = create_engine(args.db_url)
+    report = seed_dataset(
+        engine, seed=args.seed, tickets=args.tickets, anchor=args.anchor, days=args.days,
+        log=lambda msg: print(msg, file=sys.stderr),
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
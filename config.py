@@ -36,4 +36,6 @@ UPLOADS_DIR = os.getenv(
 )
 
 AVATAR_DIR  = os.path.join(UPLOADS_DIR, "avatars")
-TICKETS_DIR = os.path.join(UPLOADS_DIR, "tickets")
\ No newline at end of file
+TICKETS_DIR = os.path.join(UPLOADS_DIR, "tickets")
+# Anexos endereçados por conteúdo: blobs/<sha256[:2]>/<sha256>, compartilhados entre chamados
+ATTACHMENT_BLOBS_DIR = os.path.join(UPLOADS_DIR, "blobs")
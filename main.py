@@ -6,15 +6,16 @@ from fastapi.security import OAuth2PasswordBearer
 from fastapi.staticfiles import StaticFiles
 from fastapi.openapi.utils import get_openapi
 
-from routes import users, tickets, comments, auth, hotels, teams, categories, subcategories, ticket_logs, attachments, dashboard, sla, reports, notifications, todos, mural, qualitor, admin_health
+from routes import users, tickets, comments, auth, hotels, teams, categories, subcategories, ticket_logs, attachments, dashboard, sla, reports, notifications, todos, mural, qualitor, admin_health, sla_calendars
 
-from config import validate_env, UPLOADS_DIR, AVATAR_DIR, TICKETS_DIR
+from config import validate_env, UPLOADS_DIR, AVATAR_DIR, TICKETS_DIR, ATTACHMENT_BLOBS_DIR
 
 validate_env()
 
 # Garante que os diretórios de upload existem antes de montar o StaticFiles
 os.makedirs(AVATAR_DIR,  exist_ok=True)
 os.makedirs(TICKETS_DIR, exist_ok=True)
+os.makedirs(ATTACHMENT_BLOBS_DIR, exist_ok=True)
 
 from database import Base, engine
 
@@ -42,8 +43,23 @@ async def lifespan(app: FastAPI):
     with ThreadPoolExecutor(max_workers=5) as ex:
         await asyncio.gather(*[loop.run_in_executor(ex, _ping) for _ in range(5)])
 
+    # Client HTTP compartilhado com a API do Qualitor (pool keep-alive entre requests)
+    from services import qualitor_client
+    await qualitor_client.startup()
+
+    # Marca violações de SLA vencidas sem depender de alguém mexer no chamado
+    from services.sla_sweeper import sla_sweeper
+    sla_sweeper.start()
+
     yield
 
+    await sla_sweeper.stop()
+
+    await qualitor_client.shutdown()
+
+    from services.thumbnails import thumbnail_pool
+    thumbnail_pool.shutdown()
+
 # Inicializa app
 app = FastAPI(
     title="Helpdesk Portal",
@@ -101,6 +117,7 @@ app.include_router(ticket_logs.router)
 app.include_router(attachments.router)
 app.include_router(dashboard.router)
 app.include_router(sla.router)
+app.include_router(sla_calendars.router)
 app.include_router(reports.router)
 app.include_router(notifications.router)
 app.include_router(todos.router)
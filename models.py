@@ -75,6 +75,8 @@ class Hotel(Base):
     id = Column(Integer, primary_key=True, index=True)
     code = Column(String(10), unique=True, index=True, nullable=False)
     name = Column(String(100), nullable=False)
+    # Expediente do hotel para os prazos de SLA (None = tempo corrido)
+    sla_calendar_id = Column(Integer, ForeignKey("sla_calendars.id", ondelete="SET NULL"), nullable=True)
 
     #relação com hotel.tickets
     tickets = relationship("Ticket", back_populates="hotel", cascade="all, delete-orphan")
@@ -210,6 +212,7 @@ class TicketTimeLog(Base):
 
 class UserHotel(Base):
     __tablename__ = "user_hotels"
+    __table_args__ = (UniqueConstraint("user_id", "hotel_id", name="uq_user_hotels_user_hotel"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -230,6 +233,7 @@ class Team(Base):
     
 class UserTeam(Base):
     __tablename__ = "user_teams"
+    __table_args__ = (UniqueConstraint("user_id", "team_id", name="uq_user_teams_user_team"),)
     
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -247,17 +251,60 @@ class SLAPolicy(Base):
     first_response_hours = Column(Integer, nullable=False)
     resolution_hours = Column(Integer, nullable=False)
     priority = Column(SAEnum(PriorityEnum, native_enum=False), nullable=False, default=PriorityEnum.medium)
+    # Calendário próprio da política; tem precedência sobre o do hotel (ex.: crítico 24x7)
+    calendar_id = Column(Integer, ForeignKey("sla_calendars.id", ondelete="SET NULL"), nullable=True)
 
     subcategories = relationship("SubCategory", back_populates="sla_policy")
     ticket_sla_records = relationship("TicketSLA", back_populates="policy")
 
 
+class SLACalendar(Base):
+    __tablename__ = "sla_calendars"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False, unique=True)
+    timezone = Column(String(64), nullable=False, default="America/Sao_Paulo")
+    # Incrementada a cada edição de expediente, feriados ou fuso; ticket_sla guarda a usada
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    hours = relationship(
+        "SLACalendarHours", cascade="all, delete-orphan",
+        order_by="(SLACalendarHours.weekday, SLACalendarHours.start_minute)",
+    )
+    holidays = relationship("SLACalendarHoliday", cascade="all, delete-orphan", order_by="SLACalendarHoliday.date")
+
+
+class SLACalendarHours(Base):
+    __tablename__ = "sla_calendar_hours"
+
+    id = Column(Integer, primary_key=True)
+    calendar_id = Column(Integer, ForeignKey("sla_calendars.id", ondelete="CASCADE"), nullable=False, index=True)
+    # 0 = segunda ... 6 = domingo; minutos desde a meia-noite local, end_minute até 1440
+    weekday = Column(Integer, nullable=False)
+    start_minute = Column(Integer, nullable=False)
+    end_minute = Column(Integer, nullable=False)
+
+
+class SLACalendarHoliday(Base):
+    __tablename__ = "sla_calendar_holidays"
+    __table_args__ = (UniqueConstraint("calendar_id", "date", name="uq_sla_calendar_holiday"),)
+
+    id = Column(Integer, primary_key=True)
+    calendar_id = Column(Integer, ForeignKey("sla_calendars.id", ondelete="CASCADE"), nullable=False)
+    date = Column(Date, nullable=False)
+    name = Column(String(100), nullable=True)
+
+
 class TicketSLA(Base):
     __tablename__ = "ticket_sla"
 
     id = Column(Integer, primary_key=True)
     ticket_id = Column(Integer, ForeignKey("tickets.id", ondelete="CASCADE"), nullable=False, unique=True)
     policy_id = Column(Integer, ForeignKey("sla_policies.id"), nullable=True)
+    # Calendário usado nos prazos (política ou hotel, na aplicação); None = tempo corrido
+    calendar_id = Column(Integer, ForeignKey("sla_calendars.id", ondelete="SET NULL"), nullable=True)
+    # Versão do calendário nos prazos; diferente da atual = snapshot desatualizado (sla_reapply)
+    calendar_version = Column(Integer, nullable=True)
 
     # Snapshots da política no momento da aplicação
     first_response_hours = Column(Integer, nullable=False)
@@ -274,7 +321,8 @@ class TicketSLA(Base):
     response_met_at = Column(DateTime(timezone=True), nullable=True)
     resolution_met_at = Column(DateTime(timezone=True), nullable=True)
 
-    # Controle de pausa (progress = feedback)
+    # Controle de pausa (progress = feedback); total em segundos do relógio do SLA
+    # (só expediente quando há calendário)
     paused_at = Column(DateTime(timezone=True), nullable=True)
     total_paused_seconds = Column(Integer, default=0, nullable=False)
 
@@ -282,6 +330,10 @@ class TicketSLA(Base):
     response_breached = Column(Boolean, default=False, nullable=False)
     resolution_breached = Column(Boolean, default=False, nullable=False)
 
+    # Prazo + total_paused_seconds (no calendário), mantidos por sla_service; NULL enquanto pausado
+    effective_response_deadline = Column(DateTime(timezone=True), nullable=True)
+    effective_resolution_deadline = Column(DateTime(timezone=True), nullable=True)
+
     ticket = relationship("Ticket", back_populates="sla")
     policy = relationship("SLAPolicy", back_populates="ticket_sla_records")
 
@@ -314,6 +366,9 @@ class Attachment(Base):
     
     file_name = Column(String(255), nullable=False)
     stored_name = Column(String(255), nullable=False)
+    # SHA-256 do conteúdo: o arquivo fica em ATTACHMENT_BLOBS_DIR e é compartilhado por todos os
+    # anexos com o mesmo hash (contagem de referências). NULL = legado em TICKETS_DIR/<ticket_id>
+    content_sha256 = Column(String(64), index=True)
     
     mime_type = Column(String(100))
     file_size = Column(Integer)
@@ -394,4 +449,24 @@ class SystemBackupReport(Base):
     total_size   = Column(String(20))
     disk_free    = Column(String(20))
     report_lines = Column(Text)  # JSON array de strings
-    received_at  = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    received_at  = Column(DateTime(timezone=True), server_default=func.now())
+
+class TicketCounter(Base):
+    """Contagem de tickets por combinação de dimensões, mantida a cada flush (services/ticket_counters.py)."""
+    __tablename__ = "ticket_counters"
+
+    id               = Column(Integer, primary_key=True, autoincrement=True)
+    hotel_id         = Column(Integer, nullable=False)
+    assigned_team_id = Column(Integer, nullable=False, default=0)  # 0 = sem equipe
+    status           = Column(String(20), nullable=False)
+    progress         = Column(String(30), nullable=False)
+    priority         = Column(String(10), nullable=False)
+    unassigned       = Column(Boolean, nullable=False, default=False)  # assigned_to IS NULL
+    count            = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "hotel_id", "assigned_team_id", "status", "progress", "priority", "unassigned",
+            name="uq_ticket_counters_dims",
+        ),
+    )
@@ -1,10 +1,9 @@
 import json
-import os
 import subprocess
 from datetime import date, datetime
 
-import httpx
 from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import desc
 from sqlalchemy.orm import Session
 
@@ -13,11 +12,18 @@ from config import BACKUP_REPORT_SECRET
 from database import get_db
 from models import SystemBackupReport, User as UserModel
 from services.authorization import ensure_admin
+from services.principal_cache import principal_cache
+from services.dashboard_cache import dashboard_cache
+from services.notification_bus import notification_bus
+from services.password_hasher import password_hasher
+from services.thumbnails import thumbnail_pool
+from services.sla_sweeper import sla_sweeper
+from services.sla_calendar import calendar_registry
+from services.sla_reapply import sla_reapply_jobs
+from services.qualitor_client import get_qualitor_client, TIMEOUT_HEALTH
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
-QUALITOR_API_URL = os.getenv("QUALITOR_API_URL", "http://localhost:8003")
-
 
 def _service_status(name: str) -> str:
     try:
@@ -36,24 +42,23 @@ async def get_health(
     db: Session = Depends(get_db),
 ):
     services = {
-        "qualitor_api":  _service_status("qualitor-api"),
-        "qualitor_sync": _service_status("qualitor-sync"),
+        "qualitor_api":  await run_in_threadpool(_service_status, "qualitor-api"),
+        "qualitor_sync": await run_in_threadpool(_service_status, "qualitor-sync"),
         "helpdesk_api":  "active",  # se chegou aqui, está ativo
     }
 
     qualitor_stats = {}
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            r = await client.get(f"{QUALITOR_API_URL}/admin/stats")
-            if r.status_code == 200:
-                qualitor_stats = r.json()
-            else:
-                qualitor_stats = {"error": f"HTTP {r.status_code}"}
+        r = await get_qualitor_client().get("/admin/stats", timeout=TIMEOUT_HEALTH)
+        if r.status_code == 200:
+            qualitor_stats = r.json()
+        else:
+            qualitor_stats = {"error": f"HTTP {r.status_code}"}
     except Exception as e:
         qualitor_stats = {"error": str(e)}
 
-    reports = (
-        db.query(SystemBackupReport)
+    reports = await run_in_threadpool(
+        lambda: db.query(SystemBackupReport)
         .order_by(desc(SystemBackupReport.report_date), desc(SystemBackupReport.received_at))
         .limit(14)
         .all()
@@ -78,6 +83,14 @@ async def get_health(
         "services":      services,
         "qualitor":      qualitor_stats,
         "backups":       backups,
+        "principal_cache": principal_cache.stats(),
+        "dashboard_cache": dashboard_cache.stats(),
+        "notification_streams": notification_bus.stats(),
+        "password_hasher": password_hasher.stats(),
+        "thumbnails": thumbnail_pool.stats(),
+        "sla_sweeper": sla_sweeper.stats(),
+        "sla_calendars": calendar_registry.stats(),
+        "sla_reapply": sla_reapply_jobs.stats(),
         "generated_at":  datetime.now().isoformat(),
     }
 
@@ -1,20 +1,27 @@
 import os
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from types import SimpleNamespace
+from typing import Literal, Optional
+
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session, load_only
 
 from models import User as UserModel, Ticket as TicketModel, Attachment as AttachmentModel
 from models import RoleEnum
 from schemas import AttachmentOut
 
 from database import get_db
-from services.attachment_service import save_attachment_service
+from services.attachment_service import save_attachment_service, delete_attachment_service, attachment_file_path
+from services.attachment_service import attachment_thumbnail_path, enqueue_attachment_thumbnail
 from services.authorization import ensure_user_can_access_ticket
+from services.file_responses import file_response, strong_etag
 from auth_utils import get_current_user
-from config import TICKETS_DIR as UPLOAD_DIR
+from config import UPLOADS_DIR
 
 router = APIRouter(prefix="/tickets", tags=["attachments"])
 
+# Anexos exigem autenticação: só o cache do próprio navegador guarda a cópia
+ATTACHMENT_CACHE_CONTROL = f"private, max-age={int(os.getenv('ATTACHMENT_CACHE_MAX_AGE', 3600))}"
+
 
 def _attachment_url(attachment: AttachmentModel) -> str:
     return f"/api/tickets/{attachment.ticket_id}/attachments/{attachment.id}/download"
@@ -72,44 +79,73 @@ def list_attachments(
     ]
 
 
+def _load_download(ticket_id: int, attachment_id: int, current_user: UserModel, db: Session):
+    """Anexo + campos do chamado usados na permissão, numa consulta só."""
+    row = (
+        db.query(AttachmentModel, TicketModel.hotel_id, TicketModel.assigned_team_id)
+        .join(TicketModel, TicketModel.id == AttachmentModel.ticket_id)
+        .options(load_only(
+            AttachmentModel.id, AttachmentModel.ticket_id, AttachmentModel.file_name,
+            AttachmentModel.stored_name, AttachmentModel.content_sha256, AttachmentModel.mime_type,
+        ))
+        .filter(AttachmentModel.id == attachment_id, AttachmentModel.ticket_id == ticket_id)
+        .first()
+    )
+    if row is None:
+        # Caminho raro: mantém as respostas anteriores (404 do chamado, 403 sem acesso, 404 do anexo)
+        ticket = db.query(TicketModel).filter(TicketModel.id == ticket_id).first()
+        if not ticket:
+            raise HTTPException(status_code=404, detail="Ticket não encontrado")
+        ensure_user_can_access_ticket(ticket, current_user, db)
+        raise HTTPException(status_code=404, detail="Anexo não encontrado")
+    attachment, hotel_id, assigned_team_id = row
+    ticket = SimpleNamespace(id=ticket_id, hotel_id=hotel_id, assigned_team_id=assigned_team_id)
+    return attachment, ticket
+
+
 @router.get("/{ticket_id}/attachments/{attachment_id}/download")
 def download_attachment(
     ticket_id: int,
     attachment_id: int,
+    request: Request,
+    size: Optional[Literal["thumb"]] = Query(None, description="thumb: miniatura WebP de imagens"),
     current_user: UserModel = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    ticket = db.query(TicketModel).filter(TicketModel.id == ticket_id).first()
-    if not ticket:
-        raise HTTPException(status_code=404, detail="Ticket não encontrado")
-
+    attachment, ticket = _load_download(ticket_id, attachment_id, current_user, db)
     ensure_user_can_access_ticket(ticket, current_user, db)
 
-    attachment = (
-        db.query(AttachmentModel)
-        .filter(
-            AttachmentModel.id == attachment_id,
-            AttachmentModel.ticket_id == ticket_id
-        )
-        .first()
-    )
-    if not attachment:
-        raise HTTPException(status_code=404, detail="Anexo não encontrado")
-
-    file_path = os.path.abspath(
-        os.path.join(UPLOAD_DIR, str(ticket_id), attachment.stored_name)
-    )
-    uploads_root = os.path.abspath(UPLOAD_DIR)
+    file_path = os.path.abspath(attachment_file_path(attachment))
+    uploads_root = os.path.abspath(UPLOADS_DIR)
     if not file_path.startswith(uploads_root + os.sep):
         raise HTTPException(status_code=403, detail="Acesso negado")
 
-    if not os.path.isfile(file_path):
-        raise HTTPException(status_code=404, detail="Arquivo não encontrado no servidor")
-
-    return FileResponse(
-        path=file_path,
+    etag_key = attachment.content_sha256 or attachment.stored_name
+    cache_control = ATTACHMENT_CACHE_CONTROL
+    if size == "thumb":
+        thumb_path = attachment_thumbnail_path(attachment)
+        if os.path.isfile(thumb_path):
+            return file_response(
+                request,
+                thumb_path,
+                etag=strong_etag(f"{etag_key}-thumb"),
+                cache_control=ATTACHMENT_CACHE_CONTROL,
+                media_type="image/webp",
+            )
+        # Ainda não gerada (ou anexo anterior ao pipeline): agenda e serve o original sem
+        # deixar o navegador guardá-lo como se fosse a miniatura
+        enqueue_attachment_thumbnail(attachment)
+        cache_control = "private, no-cache"
+
+    # Conteúdo imutável por anexo: ETag forte do hash (ou do nome único legado); 304 e Range
+    # são resolvidos em services/file_responses sem reler o arquivo
+    return file_response(
+        request,
+        file_path,
+        etag=strong_etag(etag_key),
+        cache_control=cache_control,
+        media_type=attachment.mime_type or "application/octet-stream",
         filename=attachment.file_name,
-        media_type=attachment.mime_type or "application/octet-stream"
     )
 
 
@@ -134,12 +170,5 @@ def delete_attachment(
     if current_user.role != RoleEnum.admin and attachment.uploaded_by != current_user.id:
         raise HTTPException(status_code=403, detail="Sem permissão para excluir este anexo")
 
-    file_path = os.path.abspath(
-        os.path.join(UPLOAD_DIR, str(ticket_id), attachment.stored_name)
-    )
-    if os.path.isfile(file_path):
-        os.remove(file_path)
-
-    db.delete(attachment)
-    db.commit()
+    delete_attachment_service(attachment, db)
     return {"message": "Anexo excluído com sucesso"}
@@ -1,13 +1,16 @@
 # routes/auth.py
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordRequestForm
 
 from database import get_db
 from models import User as UserModel
-from auth_utils import create_access_token, verify_password, get_current_user  # funções auxiliares
+from auth_utils import create_access_token, get_current_user  # funções auxiliares
+from services.session_bootstrap import build_session_bootstrap, bootstrap_etag
+from services.password_hasher import password_hasher
 
 from schemas import Token
 from schemas import User
@@ -17,12 +20,21 @@ router = APIRouter(
     tags=["auth"]
 )
 
+def _find_login_user(email: str, db: Session) -> UserModel | None:
+    return db.query(UserModel).filter(UserModel.email == email).first()
+
+
+def _rehash_password(user: UserModel, new_hash: str, db: Session) -> None:
+    user.password_hash = new_hash
+    db.commit()
+
+
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     
     print("Tentando autenticar:", form_data.username)
 
-    user = db.query(UserModel).filter(UserModel.email == form_data.username).first()
+    user = await run_in_threadpool(_find_login_user, form_data.username, db)
 
     if not user:
         raise HTTPException(
@@ -30,15 +42,20 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
             detail="Usuário e/ou senha inválidos"
         )
 
-    # Verifica a senha
-    if not verify_password(form_data.password, user.password_hash):
+    # Verifica a senha no pool do bcrypt, sem ocupar threads de request
+    valid, new_hash = await password_hasher.verify_and_update(form_data.password, user.password_hash)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Usuário e/ou senha inválidos",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    access_token = create_access_token(user, db)
+    # Hash com custo diferente de BCRYPT_ROUNDS: regrava com o custo atual
+    if new_hash:
+        await run_in_threadpool(_rehash_password, user, new_hash, db)
+
+    access_token = create_access_token(user)
 
     return {
         "access_token": access_token,
@@ -54,12 +71,30 @@ def read_current_user(
     db.commit()
     return current_user
     
+@router.get("/bootstrap")
+def session_bootstrap(
+    request: Request,
+    response: Response,
+    current_user: UserModel = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Hotéis, times, categorias, subcategorias e menus do usuário (antes embutidos no JWT)."""
+    payload = build_session_bootstrap(current_user, db)
+    etag = bootstrap_etag(payload)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return payload
+
 @router.post("/refresh", response_model=Token)
 def refresh_token(
     current_user: UserModel = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    new_token = create_access_token(current_user, db)
+    new_token = create_access_token(current_user)
     return {
         "access_token": new_token,
         "token_type": "bearer"
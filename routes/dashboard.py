@@ -1,6 +1,8 @@
+import asyncio
 import os
-import httpx
+
 from fastapi import APIRouter, Depends, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from typing import List
@@ -10,7 +12,7 @@ from schemas import (
     DashboardOverview, DashboardOperational, DashboardProductivity,
     DashboardBottlenecks, DashboardVolume, DashboardHistory, DashboardSLA,
 )
-from database import get_db
+from database import get_db, SessionLocal
 from auth_utils import get_current_user
 from services.dashboard_service import (
     dashboard_overview_service,
@@ -21,18 +23,38 @@ from services.dashboard_service import (
     history_dashboard_service,
     sla_dashboard_service,
 )
-
-QUALITOR_API_URL = os.getenv("QUALITOR_API_URL", "http://localhost:8003")
+from services.qualitor_client import get_qualitor_client, TIMEOUT_READ
+from services.dashboard_cache import dashboard_cache, endpoint_ttl
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
+# TTL padrão (segundos) por endpoint; sobrescrevível via DASHBOARD_CACHE_TTL_<ENDPOINT>
+DASHBOARD_TTLS = {
+    "overview": 30,
+    "bottlenecks": 60,
+    "volume": 60,
+    "history": 60,
+    "sla": 30,
+    "unified": 45,
+}
+
+
+def _cached(endpoint: str, compute, *key_parts, cacheable=None):
+    key = ":".join([endpoint, *(str(p) for p in key_parts)])
+    ttl = endpoint_ttl(endpoint, DASHBOARD_TTLS.get(endpoint.split("_")[0], DASHBOARD_TTLS["unified"]))
+    return dashboard_cache.get_or_compute(key, ttl, compute, cacheable)
+
+
+def _cached_service(endpoint: str, service, current_user):
+    # O cálculo pode rodar em background (stale-while-revalidate), por isso usa sessão própria
+    return _cached(endpoint, lambda: run_in_threadpool(_run_hd, service, current_user))
+
 
 @router.get("/overview", response_model=DashboardOverview)
-def get_dashboard_overview(
+async def get_dashboard_overview(
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
 ):
-    return dashboard_overview_service(current_user, db)
+    return await _cached_service("overview", dashboard_overview_service, current_user)
 
 
 @router.get("/operational", response_model=DashboardOperational)
@@ -52,35 +74,31 @@ def get_productivity(
 
 
 @router.get("/bottlenecks", response_model=DashboardBottlenecks)
-def get_bottlenecks(
+async def get_bottlenecks(
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
 ):
-    return bottlenecks_dashboard_service(current_user, db)
+    return await _cached_service("bottlenecks", bottlenecks_dashboard_service, current_user)
 
 
 @router.get("/volume", response_model=DashboardVolume)
-def get_volume(
+async def get_volume(
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
 ):
-    return volume_dashboard_service(current_user, db)
+    return await _cached_service("volume", volume_dashboard_service, current_user)
 
 
 @router.get("/history", response_model=DashboardHistory)
-def get_history(
+async def get_history(
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
 ):
-    return history_dashboard_service(current_user, db)
+    return await _cached_service("history", history_dashboard_service, current_user)
 
 
 @router.get("/sla", response_model=DashboardSLA)
-def get_sla_dashboard(
+async def get_sla_dashboard(
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
 ):
-    return sla_dashboard_service(current_user, db)
+    return await _cached_service("sla", sla_dashboard_service, current_user)
 
 
 @router.get("/bottlenecks/hotels")
@@ -120,16 +138,74 @@ def get_bottlenecks_hotels_paginated(
 # DASHBOARD UNIFICADO (helpdesk + qualitor com toggle de fonte)
 # ─────────────────────────────────────────────────────────────────────────────
 
+# Prazo máximo de cada fonte no dashboard unificado; estourou → resposta parcial com degraded=True
+HD_DEADLINE = float(os.getenv("DASHBOARD_HD_DEADLINE", 20))
+QT_DEADLINE = float(os.getenv("DASHBOARD_QT_DEADLINE", 10))
+
+
+async def _fetch_qualitor_stats(path: str, params: dict) -> dict:
+    r = await get_qualitor_client().get(f"/qualitor/stats/{path}", params=params, timeout=TIMEOUT_READ)
+    r.raise_for_status()
+    return r.json()
+
+
 async def _qualitor_stats(path: str, params: dict) -> dict:
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            r = await client.get(f"{QUALITOR_API_URL}/qualitor/stats/{path}", params=params)
-            r.raise_for_status()
-            return r.json()
+        return await _fetch_qualitor_stats(path, params)
     except Exception:
         return {}
 
 
+def _run_hd(fn, *args, **kwargs):
+    # Sessão própria: se o deadline estourar, a thread segue sozinha e fecha a sua sessão,
+    # sem concorrer com a sessão do request (que é fechada pelo get_db ao final).
+    with SessionLocal() as db:
+        return fn(*args, db, **kwargs)
+
+
+async def _fan_out(source: str, hd_call: tuple, qt_call: tuple) -> tuple[dict, dict, list[str]]:
+    """Roda a agregação do helpdesk (thread) e a chamada ao Qualitor em paralelo.
+
+    hd_call = (fn, args, kwargs) e qt_call = (path, params). Cada fonte tem seu deadline;
+    fontes que falham ou estouram o prazo voltam vazias e entram na lista de degradadas.
+    O resultado é cacheado por (endpoint, parâmetros, source); respostas degradadas não entram no cache.
+    """
+    path, params = qt_call
+    hd, qt, degraded = await _cached(
+        "unified_" + path.replace("-", "_"),
+        lambda: _fan_out_uncached(source, hd_call, qt_call),
+        *(f"{k}={v}" for k, v in sorted(params.items())),
+        source,
+        cacheable=lambda result: not result[2],
+    )
+    return hd, qt, degraded
+
+
+async def _fan_out_uncached(source: str, hd_call: tuple, qt_call: tuple) -> tuple[dict, dict, list[str]]:
+    pending = {}
+    if source in ("helpdesk", "all"):
+        fn, args, kwargs = hd_call
+        pending["helpdesk"] = asyncio.wait_for(run_in_threadpool(_run_hd, fn, *args, **kwargs), HD_DEADLINE)
+    if source in ("qualitor", "all"):
+        path, params = qt_call
+        pending["qualitor"] = asyncio.wait_for(_fetch_qualitor_stats(path, params), QT_DEADLINE)
+
+    results = await asyncio.gather(*pending.values(), return_exceptions=True)
+
+    data = {"helpdesk": {}, "qualitor": {}}
+    degraded = []
+    for name, result in zip(pending.keys(), results):
+        if isinstance(result, BaseException):
+            degraded.append(name)
+        else:
+            data[name] = result
+    return data["helpdesk"], data["qualitor"], degraded
+
+
+def _degraded_fields(degraded: list[str]) -> dict:
+    return {"degraded": bool(degraded), "degraded_sources": degraded}
+
+
 def _hd_summary(period: str, db: Session) -> dict:
     days = {"7d": 7, "30d": 30, "90d": 90}.get(period, 30)
     rows = db.execute(text(f"""
@@ -259,6 +335,28 @@ def _hd_stalled(days_stalled: int, db: Session, limit: int = 25) -> dict:
     ], "has_more": has_more}
 
 
+def _hd_sla(period: str, db: Session) -> dict:
+    days = {"7d": 7, "30d": 30, "90d": 90}.get(period, 30)
+    rows = db.execute(text(f"""
+        SELECT
+          SUM(CASE WHEN response_breached=0 AND resolution_breached=0 THEN 1 ELSE 0 END) AS ok,
+          SUM(CASE WHEN response_breached=1 OR resolution_breached=1 THEN 1 ELSE 0 END) AS violado,
+          COUNT(*) AS total
+        FROM ticket_sla ts
+        JOIN tickets t ON t.id = ts.ticket_id
+        WHERE t.created_at >= NOW() - INTERVAL {days} DAY
+    """)).fetchone()
+    total = rows.total or 1
+    return {
+        "ok": rows.ok or 0,
+        "violado": rows.violado or 0,
+        "total": rows.total or 0,
+        "ok_pct": round((rows.ok or 0) / total * 100, 1),
+        "violado_pct": round((rows.violado or 0) / total * 100, 1),
+        "formal": True,
+    }
+
+
 def _merge_lists(key: str, *lists) -> list:
     merged: dict[str, int] = {}
     for lst in lists:
@@ -288,18 +386,15 @@ async def unified_summary(
     source: str = Query("all"),
     period: str = Query("30d"),
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db),
 ):
-    hd, qt = {}, {}
-    if source in ("helpdesk", "all"):
-        hd = _hd_summary(period, db)
-    if source in ("qualitor", "all"):
-        qt = await _qualitor_stats("summary", {"period": period})
+    hd, qt, degraded = await _fan_out(
+        source, (_hd_summary, (period,), {}), ("summary", {"period": period})
+    )
 
     if source == "helpdesk":
-        return {**hd, "source": "helpdesk", "period": period}
+        return {**hd, "source": "helpdesk", "period": period, **_degraded_fields(degraded)}
     if source == "qualitor":
-        return {**qt, "source": "qualitor"}
+        return {**qt, "source": "qualitor", **_degraded_fields(degraded)}
 
     return {
         "total_abertos":        (hd.get("total_abertos") or 0) + (qt.get("total_abertos") or 0),
@@ -311,6 +406,7 @@ async def unified_summary(
         "qt_tempo_medio":       qt.get("tempo_medio_resolucao_horas"),
         "source": "all",
         "period": period,
+        **_degraded_fields(degraded),
     }
 
 
@@ -319,18 +415,15 @@ async def unified_volume(
     source: str = Query("all"),
     period: str = Query("30d"),
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db),
 ):
-    hd, qt = {"abertos": [], "fechados": [], "by_category": [], "by_subcategory": []}, {"abertos": [], "fechados": [], "by_category": [], "by_subcategory": []}
-    if source in ("helpdesk", "all"):
-        hd = _hd_volume(period, db)
-    if source in ("qualitor", "all"):
-        qt = await _qualitor_stats("volume", {"period": period})
+    hd, qt, degraded = await _fan_out(
+        source, (_hd_volume, (period,), {}), ("volume", {"period": period})
+    )
 
     if source == "helpdesk":
-        return {**hd, "source": "helpdesk", "period": period}
+        return {**hd, "source": "helpdesk", "period": period, **_degraded_fields(degraded)}
     if source == "qualitor":
-        return {**qt, "source": "qualitor", "period": period}
+        return {**qt, "source": "qualitor", "period": period, **_degraded_fields(degraded)}
 
     merged = _merge_volume(
         (hd.get("abertos", []), hd.get("fechados", [])),
@@ -345,6 +438,7 @@ async def unified_volume(
         "by_hotel":       qt.get("by_hotel", []),
         "source": "all",
         "period": period,
+        **_degraded_fields(degraded),
     }
 
 
@@ -353,18 +447,15 @@ async def unified_top_technicians(
     source: str = Query("all"),
     period: str = Query("30d"),
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db),
 ):
-    hd, qt = {}, {}
-    if source in ("helpdesk", "all"):
-        hd = _hd_top_tech(period, db)
-    if source in ("qualitor", "all"):
-        qt = await _qualitor_stats("top-technicians", {"period": period})
+    hd, qt, degraded = await _fan_out(
+        source, (_hd_top_tech, (period,), {}), ("top-technicians", {"period": period})
+    )
 
     if source == "helpdesk":
-        return {**hd, "source": "helpdesk", "period": period}
+        return {**hd, "source": "helpdesk", "period": period, **_degraded_fields(degraded)}
     if source == "qualitor":
-        return {**qt, "source": "qualitor", "period": period}
+        return {**qt, "source": "qualitor", "period": period, **_degraded_fields(degraded)}
 
     return {
         "fechamentos": _merge_lists("nome", hd.get("fechamentos", []), qt.get("fechamentos", []))[:10],
@@ -372,6 +463,7 @@ async def unified_top_technicians(
         "carga_atual": _merge_lists("nome", hd.get("carga_atual", []), qt.get("carga_atual", []))[:10],
         "source": "all",
         "period": period,
+        **_degraded_fields(degraded),
     }
 
 
@@ -380,13 +472,10 @@ async def unified_by_team(
     source: str = Query("all"),
     period: str = Query("30d"),
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db),
 ):
-    hd, qt = {}, {}
-    if source in ("helpdesk", "all"):
-        hd = _hd_by_team(period, db)
-    if source in ("qualitor", "all"):
-        qt = await _qualitor_stats("by-team", {"period": period})
+    hd, qt, degraded = await _fan_out(
+        source, (_hd_by_team, (period,), {}), ("by-team", {"period": period})
+    )
 
     all_equipes: dict[str, dict] = {}
     for item in hd.get("equipes", []):
@@ -403,6 +492,7 @@ async def unified_by_team(
         "equipes": sorted(all_equipes.values(), key=lambda x: -x["abertos"]),
         "source": source,
         "period": period,
+        **_degraded_fields(degraded),
     }
 
 
@@ -412,28 +502,26 @@ async def unified_stalled(
     days: int = Query(5),
     limit: int = Query(25, ge=5, le=500),
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db),
 ):
-    hd_tickets, qt_tickets = [], []
-    has_more = False
-    if source in ("helpdesk", "all"):
-        hd_result = _hd_stalled(days, db, limit=limit)
-        hd_tickets = hd_result.get("tickets", [])
-        has_more = has_more or hd_result.get("has_more", False)
-        for t in hd_tickets:
-            t["portal"] = "helpdesk"
-    if source in ("qualitor", "all"):
-        qt_data = await _qualitor_stats("stalled", {"days": days, "limit": limit})
-        qt_tickets = qt_data.get("tickets", [])
-        has_more = has_more or qt_data.get("has_more", False)
-        for t in qt_tickets:
-            t["portal"] = "qualitor"
+    hd_result, qt_data, degraded = await _fan_out(
+        source,
+        (_hd_stalled, (days,), {"limit": limit}),
+        ("stalled", {"days": days, "limit": limit}),
+    )
+
+    # Cópias: hd_result/qt_data podem ser objetos compartilhados do cache
+    hd_tickets = [{**t, "portal": "helpdesk"} for t in hd_result.get("tickets", [])]
+    qt_tickets = [{**t, "portal": "qualitor"} for t in qt_data.get("tickets", [])]
+    has_more = hd_result.get("has_more", False) or qt_data.get("has_more", False)
 
     all_tickets = sorted(
         hd_tickets + qt_tickets,
         key=lambda x: (x.get("ultimo_acomp") or "0000"),
     )
-    return {"tickets": all_tickets, "total": len(all_tickets), "has_more": has_more, "days": days, "source": source}
+    return {
+        "tickets": all_tickets, "total": len(all_tickets), "has_more": has_more, "days": days, "source": source,
+        **_degraded_fields(degraded),
+    }
 
 
 @router.get("/unified/sla")
@@ -441,34 +529,16 @@ async def unified_sla(
     source: str = Query("helpdesk"),
     period: str = Query("30d"),
     current_user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db),
 ):
     """SLA: helpdesk tem dados formais; qualitor usa estimativa por severidade."""
-    days = {"7d": 7, "30d": 30, "90d": 90}.get(period, 30)
-    result = {"source": source, "period": period, "portais": {}}
+    hd, qt, degraded = await _fan_out(
+        source, (_hd_sla, (period,), {}), ("sla", {"period": period})
+    )
+    result = {"source": source, "period": period, "portais": {}, **_degraded_fields(degraded)}
 
     if source in ("helpdesk", "all"):
-        rows = db.execute(text(f"""
-            SELECT
-              SUM(CASE WHEN response_breached=0 AND resolution_breached=0 THEN 1 ELSE 0 END) AS ok,
-              SUM(CASE WHEN response_breached=1 OR resolution_breached=1 THEN 1 ELSE 0 END) AS violado,
-              COUNT(*) AS total
-            FROM ticket_sla ts
-            JOIN tickets t ON t.id = ts.ticket_id
-            WHERE t.created_at >= NOW() - INTERVAL {days} DAY
-        """)).fetchone()
-        total = rows.total or 1
-        result["portais"]["helpdesk"] = {
-            "ok": rows.ok or 0,
-            "violado": rows.violado or 0,
-            "total": rows.total or 0,
-            "ok_pct": round((rows.ok or 0) / total * 100, 1),
-            "violado_pct": round((rows.violado or 0) / total * 100, 1),
-            "formal": True,
-        }
-
+        result["portais"]["helpdesk"] = hd
     if source in ("qualitor", "all"):
-        qt = await _qualitor_stats("sla", {"period": period})
         result["portais"]["qualitor"] = {**qt, "formal": False, "estimado": True}
 
     return result
@@ -9,11 +9,13 @@ from models import RoleEnum, StatusEnum, ProgressEnum
 from models import Hotel as HotelModel
 from models import User as UserModel
 from models import Ticket as TicketModel
+from models import SLACalendar as SLACalendarModel
 
 from schemas import HotelCreate, Hotel, HotelUpdate, HotelOut
 
 from auth_utils import get_current_user
 from services.authorization import ensure_admin
+from services.principal_cache import invalidate_all_principals
 
 router = APIRouter(prefix="/hotels", tags=["hotels"])
 
@@ -62,9 +64,13 @@ def create_hotel(
         raise HTTPException(status_code=400, detail="There is already an hotel registered with the same name")
     
     
+    if hotel.sla_calendar_id is not None and not db.get(SLACalendarModel, hotel.sla_calendar_id):
+        raise HTTPException(status_code=404, detail="SLA calendar not found")
+    
     db_hotel = HotelModel(
         code=hotel.code, 
-        name=hotel.name
+        name=hotel.name,
+        sla_calendar_id=hotel.sla_calendar_id
     )
     
     db.add(db_hotel)
@@ -86,6 +92,9 @@ def update_hotel(
     
     data = hotel_update.model_dump(exclude_unset=True)
     
+    if data.get("sla_calendar_id") is not None and not db.get(SLACalendarModel, data["sla_calendar_id"]):
+        raise HTTPException(status_code=404, detail="SLA calendar not found")
+    
     for field, new_value in data.items():
         
         old_value = getattr(hotel, field)
@@ -159,5 +168,6 @@ def delete_hotel(
     
     db.delete(hotel)
     db.commit()
+    invalidate_all_principals()
     
     return { "message": f"Hotel: {hotel.name} - {hotel.code} - Deletado com sucesso." }
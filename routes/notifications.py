@@ -1,12 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import json
+import os
+import time
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from database import get_db
+from database import get_db, SessionLocal
 from auth_utils import get_current_user
 from models import Notification as NotificationModel, User as UserModel
+from services.notification_bus import notification_bus, publish_after_commit
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
+# Comentário SSE periódico para manter proxies/balanceadores com a conexão aberta
+STREAM_HEARTBEAT = float(os.getenv("NOTIFICATION_STREAM_HEARTBEAT", 15))
+# Releitura periódica do banco: pega notificações publicadas por outro worker
+STREAM_RESYNC = float(os.getenv("NOTIFICATION_STREAM_RESYNC", 60))
+# Máximo de notificações reenviadas numa reconexão (Last-Event-ID)
+STREAM_REPLAY_LIMIT = 100
+
+# EventSource não envia header Authorization; o stream aceita também ?access_token=
+_optional_bearer = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
+
 
 def _serialize(n: NotificationModel):
     return {
@@ -50,6 +70,104 @@ def get_unread_count(
     return {"count": count}
 
 
+def _stream_user_id(token: str | None) -> int:
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    # Sessão curta: o stream fica aberto por horas e não pode segurar uma conexão do pool
+    with SessionLocal() as db:
+        return get_current_user(token, db).id
+
+
+def _stream_updates(user_id: int, after_id: int | None) -> tuple[list[dict], int, int]:
+    """Notificações com id > after_id (ou nenhuma, na primeira conexão) + contagem de não lidas."""
+    with SessionLocal() as db:
+        if after_id is None:
+            after_id = (
+                db.query(func.max(NotificationModel.id))
+                .filter(NotificationModel.user_id == user_id)
+                .scalar()
+            ) or 0
+            notifs = []
+        else:
+            notifs = (
+                db.query(NotificationModel)
+                .filter(NotificationModel.user_id == user_id, NotificationModel.id > after_id)
+                .order_by(NotificationModel.id.asc())
+                .limit(STREAM_REPLAY_LIMIT)
+                .all()
+            )
+        unread = (
+            db.query(func.count(NotificationModel.id))
+            .filter(NotificationModel.user_id == user_id, NotificationModel.read == False)
+            .scalar()
+        )
+        last_id = notifs[-1].id if notifs else after_id
+        return [_serialize(n) for n in notifs], unread, last_id
+
+
+def _sse(event: str, data: str, event_id: int | None = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {data}\n\n"
+
+
+@router.get("/stream")
+async def notifications_stream(
+    request: Request,
+    token: str | None = Depends(_optional_bearer),
+    access_token: str | None = Query(default=None),
+    last_event_id: str | None = Header(default=None),
+):
+    """SSE: eventos `notification` (id = id da notificação) e `unread-count`; heartbeat em comentário."""
+    user_id = await run_in_threadpool(_stream_user_id, token or access_token)
+
+    try:
+        after_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        after_id = None
+
+    sub = notification_bus.subscribe(user_id)
+    if sub is None:
+        raise HTTPException(status_code=429, detail="Limite de conexões de notificação atingido para este usuário")
+
+    async def events():
+        nonlocal after_id
+        last_unread = None
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                # Limpa antes de ler o banco: um publish durante a leitura dispara nova leitura
+                sub.wake.clear()
+                notifs, unread, after_id = await run_in_threadpool(_stream_updates, user_id, after_id)
+                last_sync = time.monotonic()
+                for n in notifs:
+                    yield _sse("notification", json.dumps(n), n["id"])
+                if unread != last_unread:
+                    last_unread = unread
+                    yield _sse("unread-count", json.dumps({"count": unread}))
+                if len(notifs) == STREAM_REPLAY_LIMIT:
+                    continue  # replay maior que o lote: segue lendo sem esperar
+
+                # Espera um publish; a cada heartbeat sem novidade manda um comentário,
+                # e depois de STREAM_RESYNC sem publish relê o banco mesmo assim
+                while not sub.wake.is_set():
+                    try:
+                        await asyncio.wait_for(sub.wake.wait(), STREAM_HEARTBEAT)
+                    except asyncio.TimeoutError:
+                        if await request.is_disconnected():
+                            return
+                        yield ": ping\n\n"
+                        if time.monotonic() - last_sync >= STREAM_RESYNC:
+                            break
+        finally:
+            notification_bus.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.put("/read-all")
 def mark_all_read(
     db: Session = Depends(get_db),
@@ -59,6 +177,7 @@ def mark_all_read(
         NotificationModel.user_id == current_user.id,
         NotificationModel.read == False,
     ).update({"read": True})
+    publish_after_commit(db, current_user.id)
     db.commit()
     return {"ok": True}
 
@@ -76,6 +195,7 @@ def mark_read(
     if not notif:
         raise HTTPException(status_code=404, detail="Notificação não encontrada")
     notif.read = True
+    publish_after_commit(db, current_user.id)
     db.commit()
     return {"ok": True}
 
@@ -93,5 +213,6 @@ def delete_notification(
     if not notif:
         raise HTTPException(status_code=404, detail="Notificação não encontrada")
     db.delete(notif)
+    publish_after_commit(db, current_user.id)
     db.commit()
     return {"ok": True}
@@ -1,7 +1,8 @@
-import os
 import httpx
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from typing import Optional
 from sqlalchemy.orm import Session
 
@@ -10,11 +11,10 @@ from database import get_db
 from models import User as UserModel, UserTeam as UserTeamModel, Team as TeamModel
 from schemas import RoleEnum
 from services.notification_service import create_notification, extract_mentioned_users
+from services.qualitor_client import get_qualitor_client, get_qualitor_transfer_client, TIMEOUT_READ, TIMEOUT_ACTION, TIMEOUT_TRANSFER, QUALITOR_TRANSFER_MAX_BYTES
 
 router = APIRouter(prefix="/qualitor", tags=["qualitor"])
 
-QUALITOR_API_URL = os.getenv("QUALITOR_API_URL", "http://localhost:8003")
-
 
 def ensure_qualitor_access(
     current_user: UserModel = Depends(get_current_user),
@@ -37,24 +37,22 @@ def ensure_qualitor_access(
     return current_user
 
 
-async def _proxy_get(path: str, params: dict = None):
+async def _proxy_get(path: str, params: dict = None, timeout: float = TIMEOUT_READ):
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            r = await client.get(f"{QUALITOR_API_URL}{path}", params=params)
-            r.raise_for_status()
-            return r.json()
+        r = await get_qualitor_client().get(path, params=params, timeout=timeout)
+        r.raise_for_status()
+        return r.json()
     except httpx.HTTPStatusError as e:
         raise HTTPException(status_code=e.response.status_code, detail="Erro na API Qualitor")
     except httpx.RequestError:
         raise HTTPException(status_code=503, detail="API Qualitor indisponível")
 
 
-async def _proxy_post(path: str, body: dict):
+async def _proxy_post(path: str, body: dict, timeout: float = TIMEOUT_ACTION):
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            r = await client.post(f"{QUALITOR_API_URL}{path}", json=body)
-            r.raise_for_status()
-            return r.json()
+        r = await get_qualitor_client().post(path, json=body, timeout=timeout)
+        r.raise_for_status()
+        return r.json()
     except httpx.HTTPStatusError as e:
         detail = "Erro na API Qualitor"
         try:
@@ -109,16 +107,7 @@ async def qualitor_tickets(
             params["equipe"] = equipe
     else:
         # Resolve which Qualitor teams this user is allowed to see
-        allowed_rows = (
-            db.query(TeamModel.name)
-            .join(UserTeamModel, UserTeamModel.team_id == TeamModel.id)
-            .filter(
-                UserTeamModel.user_id == current_user.id,
-                TeamModel.name.in_(QUALITOR_TEAM_NAMES),
-            )
-            .all()
-        )
-        allowed_teams = {row.name for row in allowed_rows}
+        allowed_teams = await run_in_threadpool(_allowed_qualitor_teams, current_user.id, db)
 
         if len(allowed_teams) == 1:
             # Single team — always force it regardless of frontend param
@@ -132,6 +121,19 @@ async def qualitor_tickets(
     return await _proxy_get("/qualitor/tickets", params)
 
 
+def _allowed_qualitor_teams(user_id: int, db: Session) -> set[str]:
+    allowed_rows = (
+        db.query(TeamModel.name)
+        .join(UserTeamModel, UserTeamModel.team_id == TeamModel.id)
+        .filter(
+            UserTeamModel.user_id == user_id,
+            TeamModel.name.in_(QUALITOR_TEAM_NAMES),
+        )
+        .all()
+    )
+    return {row.name for row in allowed_rows}
+
+
 @router.post("/tickets/{ticket_id}/force-import")
 async def qualitor_force_import(ticket_id: int, user=Depends(ensure_qualitor_access)):
     """Força importação de um ticket que não está no banco local (ex: encerrado antes do primeiro sync)."""
@@ -176,19 +178,23 @@ async def qualitor_refresh_ticket(
 
     # Notifica o responsável interno quando o cliente confirma o encerramento
     if data.get("confirmed_closed") and data.get("responsavel_interno_id"):
-        create_notification(
-            db,
-            user_id=data["responsavel_interno_id"],
-            type="ticket_closed",
-            title=f"Chamado Qualitor #{ticket_id} encerrado pelo cliente",
-            body=f"O cliente confirmou o encerramento do chamado #{ticket_id}.",
-            qualitor_ticket_id=ticket_id,
-        )
-        db.commit()
+        await run_in_threadpool(_notify_confirmed_closed, ticket_id, data["responsavel_interno_id"], db)
 
     return data
 
 
+def _notify_confirmed_closed(ticket_id: int, user_id: int, db: Session) -> None:
+    create_notification(
+        db,
+        user_id=user_id,
+        type="ticket_closed",
+        title=f"Chamado Qualitor #{ticket_id} encerrado pelo cliente",
+        body=f"O cliente confirmou o encerramento do chamado #{ticket_id}.",
+        qualitor_ticket_id=ticket_id,
+    )
+    db.commit()
+
+
 @router.get("/teams")
 async def qualitor_teams(_=Depends(ensure_qualitor_access)):
     return await _proxy_get("/qualitor/teams")
@@ -216,23 +222,27 @@ async def qualitor_add_history(
 
     descricao = body.get("descricao", "")
     if descricao:
-        first_name = user.name.split()[0] if user.name else user.name
-        mentioned = extract_mentioned_users(descricao, db, exclude_user_id=user.id)
-        for u in mentioned:
-            create_notification(
-                db,
-                user_id=u.id,
-                type="mention",
-                title=f"@{first_name} mencionou você em um chamado Qualitor",
-                body=f"Chamado #{ticket_id}: {descricao[:120]}",
-                qualitor_ticket_id=ticket_id,
-            )
-        if mentioned:
-            db.commit()
+        await run_in_threadpool(_notify_history_mentions, ticket_id, descricao, user, db)
 
     return result
 
 
+def _notify_history_mentions(ticket_id: int, descricao: str, user: UserModel, db: Session) -> None:
+    first_name = user.name.split()[0] if user.name else user.name
+    mentioned = extract_mentioned_users(descricao, db, exclude_user_id=user.id)
+    for u in mentioned:
+        create_notification(
+            db,
+            user_id=u.id,
+            type="mention",
+            title=f"@{first_name} mencionou você em um chamado Qualitor",
+            body=f"Chamado #{ticket_id}: {descricao[:120]}",
+            qualitor_ticket_id=ticket_id,
+        )
+    if mentioned:
+        db.commit()
+
+
 @router.post("/tickets/{ticket_id}/assign-interno")
 async def qualitor_assign_interno(
     ticket_id: int,
@@ -248,19 +258,23 @@ async def qualitor_assign_interno(
 
     assigned_id = body["user_id"]
     if assigned_id != user.id:
-        create_notification(
-            db,
-            user_id=assigned_id,
-            type="ticket_assigned",
-            title=f"Chamado Qualitor #{ticket_id} atribuído a você",
-            body=f"Atribuído por {user.name}",
-            qualitor_ticket_id=ticket_id,
-        )
-        db.commit()
+        await run_in_threadpool(_notify_assigned_interno, ticket_id, assigned_id, user, db)
 
     return result
 
 
+def _notify_assigned_interno(ticket_id: int, assigned_id: int, user: UserModel, db: Session) -> None:
+    create_notification(
+        db,
+        user_id=assigned_id,
+        type="ticket_assigned",
+        title=f"Chamado Qualitor #{ticket_id} atribuído a você",
+        body=f"Atribuído por {user.name}",
+        qualitor_ticket_id=ticket_id,
+    )
+    db.commit()
+
+
 @router.post("/tickets/{ticket_id}/schedule-visit")
 async def qualitor_schedule_visit(
     ticket_id: int,
@@ -289,7 +303,9 @@ async def qualitor_reports_activity(
     data = await _proxy_get("/qualitor/reports/activity", params)
 
     # Enriquece o campo agent com name/email/role do DB do helpdesk
-    agent_user = db.query(UserModel).filter(UserModel.id == interno_user_id).first()
+    agent_user = await run_in_threadpool(
+        lambda: db.query(UserModel).filter(UserModel.id == interno_user_id).first()
+    )
     if agent_user and isinstance(data, dict) and "agent" in data:
         data["agent"]["name"]  = agent_user.name
         data["agent"]["email"] = agent_user.email
@@ -303,6 +319,18 @@ async def qualitor_list_attachments(ticket_id: int, _=Depends(get_current_user))
     return await _proxy_get(f"/qualitor/tickets/{ticket_id}/attachments")
 
 
+class _TransferTooLarge(Exception):
+    pass
+
+
+def _transfer_limit_detail() -> str:
+    return f"Anexo excede o limite de {QUALITOR_TRANSFER_MAX_BYTES // 1024 // 1024} MB"
+
+
+# Cabeçalhos do Qualitor repassados no download (content-length só vale junto com o encoding original)
+_DOWNLOAD_HEADERS = ("content-length", "content-disposition", "content-encoding", "etag", "last-modified")
+
+
 @router.get("/tickets/{ticket_id}/attachments/{nrsequencia}/download")
 async def qualitor_download_attachment(
     ticket_id: int,
@@ -311,39 +339,101 @@ async def qualitor_download_attachment(
     cdclassificacao: str = Query(""),
     _=Depends(get_current_user),
 ):
+    # Repassa o corpo em blocos conforme o cliente consome (sem juntar tudo em memória)
+    client = get_qualitor_transfer_client()
+    upstream_request = client.build_request(
+        "GET",
+        f"/qualitor/tickets/{ticket_id}/attachments/{nrsequencia}/download",
+        params={"nmanexo": nmanexo, "cdclassificacao": cdclassificacao},
+        timeout=TIMEOUT_TRANSFER,
+    )
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            r = await client.get(
-                f"{QUALITOR_API_URL}/qualitor/tickets/{ticket_id}/attachments/{nrsequencia}/download",
-                params={"nmanexo": nmanexo, "cdclassificacao": cdclassificacao},
-            )
-            r.raise_for_status()
-            return Response(
-                content=r.content,
-                media_type=r.headers.get("content-type", "application/octet-stream"),
-                headers={"Content-Disposition": r.headers.get("content-disposition", "")},
-            )
-    except httpx.HTTPStatusError as e:
-        raise HTTPException(status_code=e.response.status_code, detail="Erro ao baixar anexo")
+        upstream = await client.send(upstream_request, stream=True)
     except httpx.RequestError:
         raise HTTPException(status_code=503, detail="API Qualitor indisponível")
 
+    if upstream.is_error:
+        await upstream.aclose()
+        raise HTTPException(status_code=upstream.status_code, detail="Erro ao baixar anexo")
+
+    declared = upstream.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > QUALITOR_TRANSFER_MAX_BYTES:
+        await upstream.aclose()
+        raise HTTPException(status_code=502, detail=_transfer_limit_detail())
+
+    async def body():
+        sent = 0
+        async for chunk in upstream.aiter_raw():
+            sent += len(chunk)
+            if sent > QUALITOR_TRANSFER_MAX_BYTES:
+                # Sem content-length o limite só aparece no meio: interrompe a resposta
+                raise _TransferTooLarge(_transfer_limit_detail())
+            yield chunk
+
+    headers = {name: upstream.headers[name] for name in _DOWNLOAD_HEADERS if name in upstream.headers}
+    return StreamingResponse(
+        body(),
+        media_type=upstream.headers.get("content-type", "application/octet-stream"),
+        headers=headers,
+        # Fecha a conexão com o Qualitor mesmo se o cliente desistir antes do fim
+        background=BackgroundTask(upstream.aclose),
+    )
+
 
-@router.post("/tickets/{ticket_id}/attachments")
+_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"],
+                }
+            }
+        },
+    }
+}
+
+
+@router.post("/tickets/{ticket_id}/attachments", openapi_extra=_UPLOAD_OPENAPI)
 async def qualitor_upload_attachment(
     ticket_id: int,
-    file: UploadFile = File(...),
+    request: Request,
     _=Depends(get_current_user),
 ):
-    content = await file.read()
+    # O multipart do navegador (campo "file") segue para o Qualitor como chega, em blocos,
+    # sem passar pelo parser do Starlette nem ser gravado em disco aqui
+    content_type = request.headers.get("content-type", "")
+    if not content_type.startswith("multipart/form-data"):
+        raise HTTPException(status_code=400, detail="Envie o arquivo como multipart/form-data")
+
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > QUALITOR_TRANSFER_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=_transfer_limit_detail())
+
+    async def body():
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > QUALITOR_TRANSFER_MAX_BYTES:
+                raise _TransferTooLarge()
+            yield chunk
+
+    headers = {"content-type": content_type}
+    if declared:
+        headers["content-length"] = declared
     try:
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            r = await client.post(
-                f"{QUALITOR_API_URL}/qualitor/tickets/{ticket_id}/attachments",
-                files={"file": (file.filename, content, file.content_type or "application/octet-stream")},
-            )
-            r.raise_for_status()
-            return r.json()
+        r = await get_qualitor_transfer_client().post(
+            f"/qualitor/tickets/{ticket_id}/attachments",
+            content=body(),
+            headers=headers,
+            timeout=TIMEOUT_TRANSFER,
+        )
+        r.raise_for_status()
+        return r.json()
+    except _TransferTooLarge:
+        raise HTTPException(status_code=413, detail=_transfer_limit_detail())
     except httpx.HTTPStatusError as e:
         detail = "Erro ao fazer upload"
         try:
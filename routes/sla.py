@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
 
 from database import get_db
 from auth_utils import get_current_user
 from models import User as UserModel, SLAPolicy as SLAPolicyModel, SubCategory as SubCategoryModel, RoleEnum
+from models import SLACalendar as SLACalendarModel
 from schemas import SLAPolicyCreate, SLAPolicyUpdate, SLAPolicyOut
+from services.sla_reapply import sla_reapply_jobs
 
 router = APIRouter(prefix="/sla-policies", tags=["sla"])
 
@@ -15,6 +17,11 @@ def _require_admin(current_user: UserModel) -> None:
         raise HTTPException(status_code=403, detail="Apenas administradores podem gerenciar políticas de SLA")
 
 
+def _ensure_calendar(calendar_id: int | None, db: Session) -> None:
+    if calendar_id is not None and not db.get(SLACalendarModel, calendar_id):
+        raise HTTPException(status_code=404, detail="Calendário não encontrado")
+
+
 @router.get("", response_model=List[SLAPolicyOut])
 def list_policies(
     db: Session = Depends(get_db),
@@ -33,6 +40,7 @@ def create_policy(
 
     if db.query(SLAPolicyModel).filter(SLAPolicyModel.name == payload.name).first():
         raise HTTPException(status_code=400, detail="Já existe uma política com esse nome")
+    _ensure_calendar(payload.calendar_id, db)
 
     policy = SLAPolicyModel(**payload.model_dump())
     db.add(policy)
@@ -53,6 +61,7 @@ def update_policy(
     policy = db.query(SLAPolicyModel).filter(SLAPolicyModel.id == policy_id).first()
     if not policy:
         raise HTTPException(status_code=404, detail="Política não encontrada")
+    _ensure_calendar(payload.calendar_id, db)
 
     for field, value in payload.model_dump(exclude_unset=True).items():
         setattr(policy, field, value)
@@ -90,7 +99,10 @@ def assign_policy_to_subcategory(
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_user),
 ):
-    """Associa (ou remove) uma política SLA de uma subcategoria."""
+    """
+    Associa (ou remove) uma política SLA de uma subcategoria. Vale para novos chamados; os
+    abertos são recalculados com POST /sla-policies/reapply?subcategory_id=...
+    """
     _require_admin(current_user)
 
     subcategory = db.query(SubCategoryModel).filter(SubCategoryModel.id == subcategory_id).first()
@@ -105,3 +117,45 @@ def assign_policy_to_subcategory(
     subcategory.sla_policy_id = policy_id
     db.commit()
     return {"subcategory_id": subcategory_id, "sla_policy_id": policy_id}
+
+
+@router.post("/reapply", response_model=dict, status_code=202)
+def reapply_policies(
+    background_tasks: BackgroundTasks,
+    policy_id: int | None = None,
+    subcategory_id: int | None = None,
+    calendar_id: int | None = None,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_user),
+):
+    """
+    Recalcula em segundo plano o SLA dos chamados abertos com a política atual — após editar
+    uma política (policy_id), trocar a política de uma subcategoria (subcategory_id) ou editar
+    um calendário (calendar_id); sem filtros, todos. Acompanhe em GET /sla-policies/reapply/{job_id}.
+    """
+    _require_admin(current_user)
+
+    if policy_id is not None and not db.get(SLAPolicyModel, policy_id):
+        raise HTTPException(status_code=404, detail="Política não encontrada")
+    if subcategory_id is not None and not db.get(SubCategoryModel, subcategory_id):
+        raise HTTPException(status_code=404, detail="Subcategoria não encontrada")
+    _ensure_calendar(calendar_id, db)
+
+    job = sla_reapply_jobs.create(policy_id, subcategory_id, calendar_id)
+    if job is None:
+        raise HTTPException(status_code=409, detail="Já existe uma reaplicação de SLA em andamento")
+    background_tasks.add_task(sla_reapply_jobs.run, job["id"])
+    return job
+
+
+@router.get("/reapply/{job_id}", response_model=dict)
+def get_reapply_job(
+    job_id: str,
+    current_user: UserModel = Depends(get_current_user),
+):
+    _require_admin(current_user)
+
+    job = sla_reapply_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Reaplicação não encontrada")
+    return job
@@ -0,0 +1,147 @@
+import logging
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from sqlalchemy.orm import Session, selectinload
+from typing import List
+
+from database import get_db
+from models import (
+    User as UserModel,
+    SLACalendar as SLACalendarModel,
+    SLACalendarHours as SLACalendarHoursModel,
+    SLACalendarHoliday as SLACalendarHolidayModel,
+)
+from schemas import SLACalendarCreate, SLACalendarUpdate, SLACalendarOut
+from services.authorization import ensure_admin
+from services.sla_calendar import calendar_registry
+from services.sla_reapply import sla_reapply_jobs
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/sla-calendars", tags=["sla"])
+
+
+def _get_calendar(calendar_id: int, db: Session) -> SLACalendarModel:
+    calendar = (
+        db.query(SLACalendarModel)
+        .options(selectinload(SLACalendarModel.hours), selectinload(SLACalendarModel.holidays))
+        .filter(SLACalendarModel.id == calendar_id)
+        .first()
+    )
+    if not calendar:
+        raise HTTPException(status_code=404, detail="Calendário não encontrado")
+    return calendar
+
+
+def _ensure_unique_holidays(holidays) -> None:
+    dates = [h.date for h in holidays]
+    if len(dates) != len(set(dates)):
+        raise HTTPException(status_code=400, detail="Feriado repetido no calendário")
+
+
+@router.get("", response_model=List[SLACalendarOut])
+def list_calendars(
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(ensure_admin),
+):
+    return (
+        db.query(SLACalendarModel)
+        .options(selectinload(SLACalendarModel.hours), selectinload(SLACalendarModel.holidays))
+        .order_by(SLACalendarModel.name)
+        .all()
+    )
+
+
+@router.get("/{calendar_id}", response_model=SLACalendarOut)
+def get_calendar(
+    calendar_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(ensure_admin),
+):
+    return _get_calendar(calendar_id, db)
+
+
+@router.post("", response_model=SLACalendarOut, status_code=201)
+def create_calendar(
+    payload: SLACalendarCreate,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(ensure_admin),
+):
+    if db.query(SLACalendarModel).filter(SLACalendarModel.name == payload.name).first():
+        raise HTTPException(status_code=400, detail="Já existe um calendário com esse nome")
+    _ensure_unique_holidays(payload.holidays)
+
+    calendar = SLACalendarModel(
+        name=payload.name,
+        timezone=payload.timezone,
+        hours=[SLACalendarHoursModel(**h.model_dump()) for h in payload.hours],
+        holidays=[SLACalendarHolidayModel(**h.model_dump()) for h in payload.holidays],
+    )
+    db.add(calendar)
+    db.commit()
+    return _get_calendar(calendar.id, db)
+
+
+@router.put("/{calendar_id}", response_model=SLACalendarOut)
+def update_calendar(
+    calendar_id: int,
+    payload: SLACalendarUpdate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(ensure_admin),
+):
+    """
+    Altera nome, fuso, expediente ou feriados (listas substituídas por inteiro).
+    Mudança de fuso, expediente ou feriados gera nova versão do calendário, e os prazos dos
+    chamados abertos que o usam são recalculados em segundo plano (reaplicação de SLA).
+    Até lá, pausas e cumprimentos desses chamados já são medidos com o calendário novo.
+    """
+    calendar = _get_calendar(calendar_id, db)
+    data = payload.model_dump(exclude_unset=True)
+
+    if "name" in data and data["name"] != calendar.name:
+        if db.query(SLACalendarModel).filter(SLACalendarModel.name == data["name"]).first():
+            raise HTTPException(status_code=400, detail="Já existe um calendário com esse nome")
+        calendar.name = data["name"]
+    changed = (
+        data.get("timezone") not in (None, calendar.timezone)
+        or payload.hours is not None
+        or payload.holidays is not None
+    )
+    if data.get("timezone"):
+        calendar.timezone = data["timezone"]
+    if payload.hours is not None:
+        calendar.hours = [SLACalendarHoursModel(**h.model_dump()) for h in payload.hours]
+    if payload.holidays is not None:
+        _ensure_unique_holidays(payload.holidays)
+        calendar.holidays = []
+        # Remove os antigos antes de inserir: (calendar_id, date) é único
+        db.flush()
+        calendar.holidays = [SLACalendarHolidayModel(**h.model_dump()) for h in payload.holidays]
+    if changed:
+        calendar.version += 1
+
+    db.commit()
+    calendar_registry.invalidate(calendar_id)
+    if changed:
+        job = sla_reapply_jobs.create(None, None, calendar_id)
+        if job is None:
+            # A versão nova deixa os snapshots divergentes: a próxima reaplicação os recalcula
+            logger.warning("Reaplicação de SLA em andamento; calendário %s fica para a próxima", calendar_id)
+        else:
+            background_tasks.add_task(sla_reapply_jobs.run, job["id"])
+    db.expire_all()
+    return _get_calendar(calendar_id, db)
+
+
+@router.delete("/{calendar_id}", status_code=204)
+def delete_calendar(
+    calendar_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(ensure_admin),
+):
+    """Hotéis, políticas e SLAs que usavam o calendário voltam para tempo corrido (FK SET NULL)."""
+    calendar = _get_calendar(calendar_id, db)
+    db.delete(calendar)
+    db.commit()
+    calendar_registry.invalidate(calendar_id)
@@ -15,6 +15,7 @@ from auth_utils import get_current_user
 
 from services.team_service import add_user_to_team_service, list_team_users_service
 from services.authorization import ensure_admin
+from services.principal_cache import invalidate_principal, invalidate_all_principals
 
 ONLINE_THRESHOLD_MINUTES = 10
 
@@ -86,6 +87,7 @@ def remove_user_from_team(
         raise HTTPException(status_code=404, detail="Membro não encontrado na equipe")
     db.delete(link)
     db.commit()
+    invalidate_principal(user_id)
     return {"message": "User removed from team"}
 
 
@@ -104,6 +106,7 @@ def delete_team(
     db.delete(team)
 
     db.commit()
+    invalidate_all_principals()
 
     return { "message": f"Team - {team_id} - deleted" }
 
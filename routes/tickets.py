@@ -2,7 +2,7 @@ from datetime import datetime, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Literal, Optional
 from models import Ticket as TicketModel, Team as TeamModel, TicketLog as TicketLogModel
 from models import User as UserModel, Category as CategoryModel
 from models import LogActionEnum, ProgressEnum as ProgressEnumModel
@@ -58,6 +58,10 @@ def list_tickets(
         default=None
     ),
 
+    search_comments: bool = Query(
+        default=False
+    ),
+
     progress: str | None = Query(
         default=None
     ),
@@ -86,6 +90,18 @@ def list_tickets(
         default=False
     ),
 
+    pagination: Literal["offset", "cursor"] = Query(
+        default="offset"
+    ),
+
+    cursor: str | None = Query(
+        default=None
+    ),
+
+    with_total: bool = Query(
+        default=False
+    ),
+
     db: Session = Depends(get_db),
 
     current_user: UserModel = Depends(
@@ -103,6 +119,7 @@ def list_tickets(
         status=status,
 
         search=search,
+        search_comments=search_comments,
         progress=progress,
         priority=priority,
 
@@ -113,7 +130,11 @@ def list_tickets(
 
         hotel_id=hotel_id,
 
-        mine=mine
+        mine=mine,
+
+        pagination=pagination,
+        cursor=cursor,
+        with_total=with_total
     )
 
 @router.get("/stats")
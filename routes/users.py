@@ -1,10 +1,9 @@
 import os
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List
-from passlib.context import CryptContext
+from typing import List, Literal, Optional
 
 from models import User as UserModel, UserHotel as UserHotelModel
 from schemas import User, UserUpdate, UserCreate, UserHotelsUpdate, UserOut, UserTeamsUpdate, UserListOut
@@ -14,9 +13,12 @@ from auth_utils import get_current_user
 
 from services.user_service import create_user_service, update_user_hotels_service, list_users_service, get_user_service, update_user_service, delete_user_service, update_user_teams_service
 from services.authorization import ensure_admin
+from services.principal_cache import invalidate_principal
+from services.upload_storage import receive_upload, commit_upload, discard_upload
+from services.file_responses import file_response, strong_etag
+from services.thumbnails import thumbnail_pool, thumbnail_path
 from config import AVATAR_DIR
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 router = APIRouter(
     prefix="/users",
@@ -153,8 +155,8 @@ def update_user_hotels(
 
     return {"message": "ok"}
 
-ALLOWED_AVATAR_MIMES = {"image/jpeg", "image/jpg", "image/png", "image/webp", "image/gif"}
-ALLOWED_AVATAR_EXTS  = {".jpg", ".jpeg", ".png", ".webp", ".gif"}
+# Extensão → tipo esperado nos primeiros bytes (services/upload_storage.sniff_kind)
+ALLOWED_AVATAR_KINDS = {".jpg": "jpeg", ".jpeg": "jpeg", ".png": "png", ".webp": "webp", ".gif": "gif"}
 MAX_AVATAR_SIZE = 5 * 1024 * 1024  # 5 MB
 
 
@@ -164,53 +166,85 @@ async def upload_avatar(
     current_user: UserModel = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    content = await file.read()
+    ext = os.path.splitext(file.filename or "")[1].lower()
+    if ext not in ALLOWED_AVATAR_KINDS:
+        raise HTTPException(400, f"Formato não suportado. Use: {', '.join(sorted(ALLOWED_AVATAR_KINDS))}")
 
-    if len(content) == 0:
-        raise HTTPException(400, "Arquivo vazio não permitido")
-    if len(content) > MAX_AVATAR_SIZE:
-        raise HTTPException(413, f"Imagem muito grande. Máximo: {MAX_AVATAR_SIZE // 1024 // 1024} MB")
+    # Cópia em blocos para um temporário em AVATAR_DIR, validando tamanho e assinatura da imagem
+    tmp_path, _, _ = await receive_upload(file, AVATAR_DIR, MAX_AVATAR_SIZE, ALLOWED_AVATAR_KINDS[ext], "Imagem")
 
-    ext = os.path.splitext(file.filename or "")[1].lower()
-    if ext not in ALLOWED_AVATAR_EXTS:
-        raise HTTPException(400, f"Formato não suportado. Use: {', '.join(sorted(ALLOWED_AVATAR_EXTS))}")
+    filename = f"{uuid.uuid4()}{ext}"
+    try:
+        avatar_url = await run_in_threadpool(_store_avatar, tmp_path, filename, current_user, db)
+    finally:
+        discard_upload(tmp_path)
 
-    mime = (file.content_type or "").lower().split(";")[0].strip()
-    if mime not in ALLOWED_AVATAR_MIMES:
-        raise HTTPException(400, "Tipo de arquivo não é uma imagem válida")
+    thumbnail_pool.enqueue(os.path.join(AVATAR_DIR, filename), thumbnail_path("avatars", filename))
 
-    os.makedirs(AVATAR_DIR, exist_ok=True)
+    return {"avatar_url": avatar_url}
 
-    # Apaga avatar antigo se existir
-    if current_user.avatar_url:
-        old_filename = current_user.avatar_url.split("/")[-1]
-        old_path = os.path.join(AVATAR_DIR, old_filename)
-        if os.path.isfile(old_path):
-            os.remove(old_path)
 
-    filename = f"{uuid.uuid4()}{ext}"
+def _store_avatar(tmp_path: str, filename: str, current_user: UserModel, db: Session) -> str:
     file_path = os.path.join(AVATAR_DIR, filename)
-    with open(file_path, "wb") as f:
-        f.write(content)
+    commit_upload(tmp_path, file_path)
 
+    old_url = current_user.avatar_url
     avatar_url = f"/api/users/avatar/{filename}"
     current_user.avatar_url = avatar_url
-    db.commit()
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        discard_upload(file_path)
+        raise
+    invalidate_principal(current_user.id)
+
+    # Apaga o avatar antigo só depois que o novo está gravado e referenciado
+    if old_url:
+        old_filename = old_url.split("/")[-1]
+        old_path = os.path.join(AVATAR_DIR, old_filename)
+        if os.path.isfile(old_path) and old_path != file_path:
+            os.remove(old_path)
+            discard_upload(thumbnail_path("avatars", old_filename))
 
-    return {"avatar_url": avatar_url}
+    return avatar_url
 
 
 @router.get("/avatar/{filename}")
-def serve_avatar(filename: str):
+def serve_avatar(
+    filename: str,
+    request: Request,
+    size: Optional[Literal["thumb"]] = Query(None, description="thumb: miniatura WebP"),
+):
     if "/" in filename or ".." in filename or not filename:
         raise HTTPException(403)
     path = os.path.abspath(os.path.join(AVATAR_DIR, filename))
     root  = os.path.abspath(AVATAR_DIR)
     if not path.startswith(root + os.sep):
         raise HTTPException(403)
-    if not os.path.isfile(path):
-        raise HTTPException(404)
-    return FileResponse(path)
+    # Nome único por upload (trocar o avatar gera outra URL): pode ficar em cache indefinidamente
+    cache_control = "public, max-age=31536000, immutable"
+    if size == "thumb":
+        thumb_path = thumbnail_path("avatars", filename)
+        if os.path.isfile(thumb_path):
+            return file_response(
+                request,
+                thumb_path,
+                etag=strong_etag(f"{filename}-thumb"),
+                cache_control=cache_control,
+                media_type="image/webp",
+            )
+        # Miniatura pendente: o original não pode ficar em cache no lugar dela
+        if os.path.isfile(path):
+            thumbnail_pool.enqueue(path, thumb_path)
+        cache_control = "public, no-cache"
+
+    return file_response(
+        request,
+        path,
+        etag=strong_etag(filename),
+        cache_control=cache_control,
+    )
 
 
 @router.put("/{user_id}/teams")
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, Field, EmailStr, field_validator, model_validator
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
 from enum import Enum
 
 # Enums
@@ -42,6 +43,7 @@ class TokenData(BaseModel):
 class HotelBase(BaseModel):
     code: Optional[str] = None
     name: Optional[str] = None
+    sla_calendar_id: Optional[int] = None
 
 class HotelCreate(HotelBase):
     pass
@@ -218,6 +220,7 @@ class SLAPolicyCreate(BaseModel):
     first_response_hours: int = Field(gt=0)
     resolution_hours: int = Field(gt=0)
     priority: PriorityEnum = PriorityEnum.medium
+    calendar_id: Optional[int] = None
 
 class SLAPolicyUpdate(BaseModel):
     name: Optional[str] = None
@@ -225,6 +228,7 @@ class SLAPolicyUpdate(BaseModel):
     first_response_hours: Optional[int] = Field(default=None, gt=0)
     resolution_hours: Optional[int] = Field(default=None, gt=0)
     priority: Optional[PriorityEnum] = None
+    calendar_id: Optional[int] = None
 
 class SLAPolicyOut(BaseModel):
     id: int
@@ -233,6 +237,69 @@ class SLAPolicyOut(BaseModel):
     first_response_hours: int
     resolution_hours: int
     priority: PriorityEnum
+    calendar_id: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+# --------------------
+# SLA CALENDARS
+# --------------------
+
+class SLACalendarHoursIn(BaseModel):
+    weekday: int = Field(ge=0, le=6)  # 0 = segunda
+    start_minute: int = Field(ge=0, lt=1440)
+    end_minute: int = Field(gt=0, le=1440)
+
+    @model_validator(mode="after")
+    def _check_interval(self):
+        if self.end_minute <= self.start_minute:
+            raise ValueError("end_minute deve ser maior que start_minute")
+        return self
+
+class SLACalendarHoursOut(SLACalendarHoursIn):
+    class Config:
+        from_attributes = True
+
+class SLACalendarHolidayIn(BaseModel):
+    date: date
+    name: Optional[str] = None
+
+class SLACalendarHolidayOut(SLACalendarHolidayIn):
+    class Config:
+        from_attributes = True
+
+def _check_timezone(value: Optional[str]) -> Optional[str]:
+    if value is not None:
+        try:
+            ZoneInfo(value)
+        except Exception:
+            raise ValueError(f"Fuso horário inválido: {value}")
+    return value
+
+class SLACalendarCreate(BaseModel):
+    name: str
+    timezone: str = "America/Sao_Paulo"
+    hours: List[SLACalendarHoursIn] = Field(min_length=1)
+    holidays: List[SLACalendarHolidayIn] = []
+
+    _timezone = field_validator("timezone")(_check_timezone)
+
+class SLACalendarUpdate(BaseModel):
+    name: Optional[str] = None
+    timezone: Optional[str] = None
+    hours: Optional[List[SLACalendarHoursIn]] = Field(default=None, min_length=1)
+    holidays: Optional[List[SLACalendarHolidayIn]] = None
+
+    _timezone = field_validator("timezone")(_check_timezone)
+
+class SLACalendarOut(BaseModel):
+    id: int
+    name: str
+    timezone: str
+    version: int
+    hours: List[SLACalendarHoursOut] = []
+    holidays: List[SLACalendarHolidayOut] = []
 
     class Config:
         from_attributes = True
@@ -240,6 +307,7 @@ class SLAPolicyOut(BaseModel):
 class TicketSLAOut(BaseModel):
     id: int
     policy_id: Optional[int] = None
+    calendar_id: Optional[int] = None
     policy: Optional[SLAPolicyOut] = None
     first_response_hours: int
     resolution_hours: int
@@ -250,6 +318,8 @@ class TicketSLAOut(BaseModel):
     resolution_met_at: Optional[datetime] = None
     paused_at: Optional[datetime] = None
     total_paused_seconds: int
+    effective_response_deadline: Optional[datetime] = None
+    effective_resolution_deadline: Optional[datetime] = None
     response_breached: bool
     resolution_breached: bool
 
@@ -342,10 +412,11 @@ class TicketListItem(Ticket):
 class TicketListOut(BaseModel):
 
     items: list[TicketListItem]
-    total: int
-    page: int
+    total: int | None = None  # None no modo cursor sem with_total
+    page: int | None = None
     page_size: int
-    pages: int
+    pages: int | None = None
+    next_cursor: str | None = None
 
     class Config:
         from_attributes = True
@@ -0,0 +1,150 @@
+"""
+Migra anexos legados (TICKETS_DIR/<ticket_id>/<uuid>.<ext>) para o armazenamento por conteúdo
+(ATTACHMENT_BLOBS_DIR/<sha256[:2]>/<sha256>) e recolhe blobs sem referência.
+
+    python -m services.attachment_dedupe [--dry-run]
+
+Cada arquivo legado vira um hard link (ou cópia) no blob antes do UPDATE; o original só é
+apagado depois do commit, então uma interrupção no meio nunca deixa anexo sem arquivo.
+"""
+import hashlib
+import os
+import re
+import shutil
+import time
+import uuid
+
+from sqlalchemy.orm import Session
+
+from models import Attachment as AttachmentModel
+from services.attachment_service import attachment_file_path, blob_path
+from config import ATTACHMENT_BLOBS_DIR
+
+DEDUPE_BATCH_SIZE = 500
+# Blobs mais novos que isso podem ser de um upload ainda sem commit
+ORPHAN_MIN_AGE = 3600
+
+_BLOB_NAME = re.compile(r"^[0-9a-f]{64}$")
+
+
+def _sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _materialize_blob(src: str, sha256: str) -> None:
+    dest = blob_path(sha256)
+    if os.path.isfile(dest):
+        return
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    tmp = os.path.join(ATTACHMENT_BLOBS_DIR, f".{uuid.uuid4()}.part")
+    try:
+        os.link(src, tmp)
+    except OSError:
+        # Outro sistema de arquivos ou sem suporte a hard link
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dest)
+
+
+def _orphan_blobs(referenced: set[str]) -> list[str]:
+    orphans = []
+    cutoff = time.time() - ORPHAN_MIN_AGE
+    if not os.path.isdir(ATTACHMENT_BLOBS_DIR):
+        return orphans
+    for prefix in os.listdir(ATTACHMENT_BLOBS_DIR):
+        prefix_dir = os.path.join(ATTACHMENT_BLOBS_DIR, prefix)
+        if not os.path.isdir(prefix_dir):
+            continue
+        for name in os.listdir(prefix_dir):
+            path = os.path.join(prefix_dir, name)
+            if _BLOB_NAME.match(name) and name not in referenced and os.path.getmtime(path) < cutoff:
+                orphans.append(path)
+    return orphans
+
+
+def _referenced_hashes(db: Session) -> set[str]:
+    return {
+        sha for (sha,) in db.query(AttachmentModel.content_sha256)
+        .filter(AttachmentModel.content_sha256.isnot(None))
+        .distinct()
+    }
+
+
+def dedupe_attachments(db: Session, apply: bool) -> dict:
+    referenced = _referenced_hashes(db)
+    legacy = (
+        db.query(AttachmentModel)
+        .filter(AttachmentModel.content_sha256.is_(None))
+        .order_by(AttachmentModel.id)
+        .all()
+    )
+
+    migrated = duplicates = 0
+    reclaimed = 0
+    missing = []
+    pending_removal = []
+
+    def flush_batch():
+        if apply:
+            db.commit()
+            for path in pending_removal:
+                os.remove(path)
+        pending_removal.clear()
+
+    for attachment in legacy:
+        path = attachment_file_path(attachment)
+        if not os.path.isfile(path):
+            missing.append({"id": attachment.id, "ticket_id": attachment.ticket_id, "path": path})
+            continue
+
+        sha256 = _sha256_file(path)
+        if sha256 in referenced or os.path.isfile(blob_path(sha256)):
+            # Conteúdo já armazenado: o arquivo legado inteiro é espaço recuperado
+            duplicates += 1
+            reclaimed += os.path.getsize(path)
+        referenced.add(sha256)
+        migrated += 1
+
+        if apply:
+            _materialize_blob(path, sha256)
+            attachment.content_sha256 = sha256
+            attachment.stored_name = sha256
+            pending_removal.append(path)
+        if migrated % DEDUPE_BATCH_SIZE == 0:
+            flush_batch()
+    flush_batch()
+
+    # Relê as referências: uploads feitos durante a migração também contam
+    orphans = _orphan_blobs(referenced | _referenced_hashes(db))
+    orphan_bytes = sum(os.path.getsize(p) for p in orphans)
+    if apply:
+        for path in orphans:
+            os.remove(path)
+
+    return {
+        "legacy_attachments": len(legacy),
+        "migrated": migrated,
+        "duplicates": duplicates,
+        "missing_files": missing,
+        "orphan_blobs": len(orphans),
+        "bytes_reclaimed": reclaimed + orphan_bytes,
+        "applied": apply,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Deduplica anexos legados para o armazenamento por SHA-256.")
+    parser.add_argument("--dry-run", action="store_true", help="apenas reporta o que seria migrado e recuperado")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        report = dedupe_attachments(db, apply=not args.dry_run)
+    print(json.dumps(report, indent=2, default=str))
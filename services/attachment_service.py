@@ -1,48 +1,62 @@
 import os
-import uuid
 
 from fastapi import UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from models import User as UserModel, Ticket as TicketModel, Attachment as AttachmentModel
 from services.authorization import ensure_user_can_access_ticket
-from config import TICKETS_DIR as UPLOAD_DIR
+from services.upload_storage import receive_upload, commit_upload, discard_upload
+from services.thumbnails import thumbnail_pool, thumbnail_path, THUMBNAIL_MIME_TYPES
+from config import TICKETS_DIR as UPLOAD_DIR, ATTACHMENT_BLOBS_DIR
 
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10 MB
 
-ALLOWED_MIME_TYPES = {
-    "image/jpeg", "image/jpg", "image/png", "image/gif", "image/webp",
-    "application/pdf",
-    "application/msword",
-    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-    "application/vnd.ms-excel",
-    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    "text/plain", "text/csv",
-    "application/zip", "application/x-zip-compressed",
-}
-
 ALLOWED_EXTENSIONS = {
     ".jpg", ".jpeg", ".png", ".gif", ".webp",
     ".pdf", ".doc", ".docx", ".xls", ".xlsx",
     ".txt", ".csv", ".zip",
 }
 
-EXTENSION_TO_MIME = {
-    ".jpg":  {"image/jpeg", "image/jpg"},
-    ".jpeg": {"image/jpeg", "image/jpg"},
-    ".png":  {"image/png"},
-    ".gif":  {"image/gif"},
-    ".webp": {"image/webp"},
-    ".pdf":  {"application/pdf"},
-    ".doc":  {"application/msword"},
-    ".docx": {"application/vnd.openxmlformats-officedocument.wordprocessingml.document"},
-    ".xls":  {"application/vnd.ms-excel"},
-    ".xlsx": {"application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"},
-    ".txt":  {"text/plain"},
-    ".csv":  {"text/csv", "text/plain", "application/csv"},
-    ".zip":  {"application/zip", "application/x-zip-compressed"},
+# Tipo esperado nos primeiros bytes (ver services/upload_storage.sniff_kind) e MIME gravado
+EXTENSION_KIND = {
+    ".jpg":  ("jpeg", "image/jpeg"),
+    ".jpeg": ("jpeg", "image/jpeg"),
+    ".png":  ("png", "image/png"),
+    ".gif":  ("gif", "image/gif"),
+    ".webp": ("webp", "image/webp"),
+    ".pdf":  ("pdf", "application/pdf"),
+    ".doc":  ("ole", "application/msword"),
+    ".docx": ("zip", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+    ".xls":  ("ole", "application/vnd.ms-excel"),
+    ".xlsx": ("zip", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    ".txt":  ("text", "text/plain"),
+    ".csv":  ("text", "text/csv"),
+    ".zip":  ("zip", "application/zip"),
 }
 
 
+def blob_path(sha256: str) -> str:
+    return os.path.join(ATTACHMENT_BLOBS_DIR, sha256[:2], sha256)
+
+
+def attachment_file_path(attachment: AttachmentModel) -> str:
+    if attachment.content_sha256:
+        return blob_path(attachment.content_sha256)
+    # Legado (anterior ao armazenamento por conteúdo)
+    return os.path.join(UPLOAD_DIR, str(attachment.ticket_id), attachment.stored_name)
+
+
+def attachment_thumbnail_path(attachment: AttachmentModel) -> str:
+    return thumbnail_path("attachments", attachment.content_sha256 or attachment.stored_name)
+
+
+def enqueue_attachment_thumbnail(attachment: AttachmentModel) -> bool:
+    """Agenda a miniatura se o anexo for imagem e ela ainda não existir."""
+    if (attachment.mime_type or "").lower() not in THUMBNAIL_MIME_TYPES:
+        return False
+    return thumbnail_pool.enqueue(attachment_file_path(attachment), attachment_thumbnail_path(attachment))
+
+
 def sanitize_filename(name: str) -> str:
     name = os.path.basename(name).strip()
     allowed = set(
@@ -61,23 +75,10 @@ async def save_attachment_service(
     current_user: UserModel,
     db: Session
 ):
-    ticket = db.query(TicketModel).filter(TicketModel.id == ticket_id).first()
-    if not ticket:
-        raise HTTPException(status_code=404, detail="Ticket não encontrado")
-
-    ensure_user_can_access_ticket(ticket, current_user, db)
+    # Consultas e escrita em disco rodam no threadpool para não travar o event loop
+    ticket = await run_in_threadpool(_get_accessible_ticket, ticket_id, current_user, db)
 
-    # — Lê o conteúdo para validar tamanho
-    content = await file.read()
-    if len(content) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=413,
-            detail=f"Arquivo muito grande. Tamanho máximo permitido: {MAX_FILE_SIZE // 1024 // 1024} MB"
-        )
-    if len(content) == 0:
-        raise HTTPException(status_code=400, detail="Arquivo vazio não é permitido")
-
-    # — Valida extensão
+    # — Valida extensão antes de receber qualquer byte
     original_name = file.filename or "arquivo"
     ext = os.path.splitext(original_name)[1].lower()
     if ext not in ALLOWED_EXTENSIONS:
@@ -87,42 +88,106 @@ async def save_attachment_service(
                    f"Permitidos: {', '.join(sorted(ALLOWED_EXTENSIONS))}"
         )
 
-    # — Valida MIME type
-    mime = (file.content_type or "").lower().split(";")[0].strip()
-    if mime not in ALLOWED_MIME_TYPES:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Tipo MIME não permitido: '{mime}'"
-        )
+    # — Copia em blocos para um temporário em ATTACHMENT_BLOBS_DIR; tamanho, assinatura
+    #   (magic bytes) e SHA-256 são obtidos durante a cópia, sem confiar no content_type
+    expected_kind, mime = EXTENSION_KIND[ext]
+    tmp_path, size, sha256 = await receive_upload(file, ATTACHMENT_BLOBS_DIR, MAX_FILE_SIZE, expected_kind)
 
-    # — Verifica consistência extensão × MIME (evita renomear .exe para .pdf)
-    expected_mimes = EXTENSION_TO_MIME.get(ext, set())
-    if expected_mimes and mime not in expected_mimes:
-        raise HTTPException(
-            status_code=400,
-            detail="Conteúdo do arquivo não corresponde à extensão informada"
+    clean_name = sanitize_filename(original_name)
+
+    try:
+        attachment = await run_in_threadpool(
+            _store_attachment, ticket, tmp_path, size, sha256, clean_name, mime, current_user, db
         )
+    finally:
+        discard_upload(tmp_path)
 
-    # — Sanitiza nome original e gera nome único para armazenamento
-    clean_name = sanitize_filename(original_name)
-    stored_name = f"{uuid.uuid4()}{ext}"
-    ticket_dir = f"{UPLOAD_DIR}/{ticket.id}"
-    os.makedirs(ticket_dir, exist_ok=True)
-    file_path = f"{ticket_dir}/{stored_name}"
+    enqueue_attachment_thumbnail(attachment)
+    return attachment
 
-    with open(file_path, "wb") as f:
-        f.write(content)
 
+def _get_accessible_ticket(ticket_id: int, current_user: UserModel, db: Session) -> TicketModel:
+    ticket = db.query(TicketModel).filter(TicketModel.id == ticket_id).first()
+    if not ticket:
+        raise HTTPException(status_code=404, detail="Ticket não encontrado")
+
+    ensure_user_can_access_ticket(ticket, current_user, db)
+    return ticket
+
+
+def _store_attachment(
+    ticket: TicketModel,
+    tmp_path: str,
+    size: int,
+    sha256: str,
+    clean_name: str,
+    mime: str,
+    current_user: UserModel,
+    db: Session
+) -> AttachmentModel:
     attachment = AttachmentModel(
-        ticket_id=ticket_id,
+        ticket_id=ticket.id,
         file_name=clean_name,
-        stored_name=stored_name,
+        stored_name=sha256,
+        content_sha256=sha256,
         mime_type=mime,
-        file_size=len(content),
+        file_size=size,
         uploaded_by=current_user.id
     )
 
     db.add(attachment)
-    db.commit()
+    try:
+        # INSERT antes do arquivo: no MySQL ele espera a exclusão concorrente do mesmo hash
+        # (lock de delete_attachment_service) terminar, então o blob não some depois de conferido
+        db.flush()
+        path = blob_path(sha256)
+        if not os.path.isfile(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            commit_upload(tmp_path, path)
+        db.commit()
+    except Exception:
+        # Blob recém-criado sem referência é recolhido por services/attachment_dedupe
+        db.rollback()
+        raise
     db.refresh(attachment)
+    # Pré-carrega o uploader aqui: a rota async serializa a resposta fora do threadpool
+    attachment.uploader
     return attachment
+
+
+def delete_attachment_service(attachment: AttachmentModel, db: Session) -> None:
+    """Remove o anexo; o blob só é apagado quando sai a última referência a ele."""
+    sha256 = attachment.content_sha256
+    if not sha256:
+        discard_upload(attachment_file_path(attachment))
+        discard_upload(attachment_thumbnail_path(attachment))
+        db.delete(attachment)
+        db.commit()
+        return
+
+    # Trava as referências ao hash (e, no InnoDB, a inserção de novas) até o commit
+    refs = (
+        db.query(AttachmentModel.id)
+        .filter(AttachmentModel.content_sha256 == sha256)
+        .with_for_update()
+        .all()
+    )
+    db.delete(attachment)
+    db.flush()
+
+    path = blob_path(sha256)
+    tombstone = None
+    if len(refs) <= 1 and os.path.isfile(path):
+        # Renomeia antes do commit (com o lock) e só apaga depois; se o commit falhar, volta
+        tombstone = f"{path}.deleting"
+        os.replace(path, tombstone)
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        if tombstone:
+            os.replace(tombstone, path)
+        raise
+    if tombstone:
+        discard_upload(tombstone)
+        discard_upload(thumbnail_path("attachments", sha256))
@@ -4,6 +4,7 @@ from models import Hotel as HotelModel
 from models import RoleEnum 
 
 from auth_utils import get_current_user
+from services.principal_cache import principal_cache
 
 from sqlalchemy.orm import Session
 
@@ -87,6 +88,10 @@ def get_user_accessible_hotel_ids(
     user_id: int,
     db: Session
 ) -> set[int]:
+    principal = principal_cache.peek(user_id)
+    if principal is not None:
+        return set(principal.hotel_ids)
+
     rows = (
         db.query(UserHotelModel.hotel_id)
         .filter(UserHotelModel.user_id == user_id)
@@ -99,6 +104,10 @@ def get_user_accessible_team_ids(
     user_id: int,
     db: Session
 ) -> set[int]:
+    principal = principal_cache.peek(user_id)
+    if principal is not None:
+        return set(principal.team_ids)
+
     rows = (
         db.query(UserTeamModel.team_id)
         .filter(UserTeamModel.user_id == user_id)
@@ -0,0 +1,182 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable
+
+# TTL padrão (segundos) dos agregados do dashboard; cada endpoint pode sobrescrever com
+# DASHBOARD_CACHE_TTL_<ENDPOINT> (ex.: DASHBOARD_CACHE_TTL_OVERVIEW=30).
+DASHBOARD_CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", 45))
+# Janela após o TTL em que o valor antigo ainda é servido enquanto o refresh roda em background.
+DASHBOARD_CACHE_STALE = int(os.getenv("DASHBOARD_CACHE_STALE", 120))
+# Backend compartilhado opcional entre workers (depende do pacote `redis`)
+DASHBOARD_CACHE_REDIS_URL = os.getenv("DASHBOARD_CACHE_REDIS_URL")
+
+
+def endpoint_ttl(endpoint: str, default: int = DASHBOARD_CACHE_TTL) -> int:
+    env_name = "DASHBOARD_CACHE_TTL_" + endpoint.upper().replace("-", "_").replace("/", "_")
+    return int(os.getenv(env_name, default))
+
+
+class MemoryBackend:
+    """Backend em processo: cada worker do uvicorn tem o seu."""
+
+    name = "memory"
+
+    def __init__(self):
+        self._entries: dict[str, tuple[Any, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> tuple[Any, float] | None:
+        with self._lock:
+            return self._entries.get(key)
+
+    def set(self, key: str, value: Any, stored_at: float, keep_for: int) -> None:
+        with self._lock:
+            self._entries[key] = (value, stored_at)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class RedisBackend:
+    """Backend compartilhado entre workers. Valores trafegam como JSON (datas viram string ISO)."""
+
+    name = "redis"
+    prefix = "helpdesk:dashboard:"
+
+    def __init__(self, url: str):
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> tuple[Any, float] | None:
+        raw = self._redis.get(self.prefix + key)
+        if raw is None:
+            return None
+        payload = json.loads(raw)
+        return payload["value"], payload["stored_at"]
+
+    def set(self, key: str, value: Any, stored_at: float, keep_for: int) -> None:
+        payload = json.dumps({"value": value, "stored_at": stored_at}, default=str)
+        self._redis.set(self.prefix + key, payload, ex=max(1, int(keep_for)))
+
+    def delete(self, key: str) -> None:
+        self._redis.delete(self.prefix + key)
+
+    def clear(self) -> None:
+        for key in self._redis.scan_iter(self.prefix + "*"):
+            self._redis.delete(key)
+
+    def size(self) -> int:
+        return sum(1 for _ in self._redis.scan_iter(self.prefix + "*"))
+
+
+def _build_backend():
+    if DASHBOARD_CACHE_REDIS_URL:
+        try:
+            return RedisBackend(DASHBOARD_CACHE_REDIS_URL)
+        except ImportError:
+            pass
+    return MemoryBackend()
+
+
+class DashboardCache:
+    """Cache TTL + stale-while-revalidate com single-flight por chave.
+
+    - fresco (idade < ttl): devolve direto;
+    - velho (idade < ttl + stale): devolve o valor antigo e dispara um refresh em background;
+    - ausente/expirado: calcula, e requests concorrentes na mesma chave aguardam o mesmo cálculo.
+    """
+
+    def __init__(self, backend=None, stale: int = DASHBOARD_CACHE_STALE):
+        self.backend = backend or _build_backend()
+        self.stale = stale
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refresh_errors = 0
+
+    async def get_or_compute(
+        self,
+        key: str,
+        ttl: int,
+        compute: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] | None = None,
+    ) -> Any:
+        entry = self.backend.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if age < ttl:
+                self.hits += 1
+                return value
+            if age < ttl + self.stale:
+                self.stale_hits += 1
+                self._start(key, ttl, compute, cacheable, background=True)
+                return value
+
+        self.misses += 1
+        # shield: se o cliente desconectar, o cálculo segue para os demais que aguardam a chave
+        return await asyncio.shield(self._start(key, ttl, compute, cacheable))
+
+    def _start(self, key, ttl, compute, cacheable, background: bool = False) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._compute_and_store(key, ttl, compute, cacheable))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+            # Um callback por task: novos stale hits reaproveitam a mesma e não contam a falha de novo
+            if background:
+                task.add_done_callback(self._swallow)
+        return task
+
+    async def _compute_and_store(self, key, ttl, compute, cacheable) -> Any:
+        value = await compute()
+        if cacheable is None or cacheable(value):
+            self.backend.set(key, value, time.time(), keep_for=ttl + self.stale)
+        return value
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def _swallow(self, task: asyncio.Task) -> None:
+        # Refresh em background que falhou: o valor antigo continua servindo até sair da janela
+        if not task.cancelled() and task.exception() is not None:
+            self.refresh_errors += 1
+
+    def invalidate(self, key: str) -> None:
+        self.backend.delete(key)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.stale_hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "size": self.backend.size(),
+            "default_ttl_seconds": DASHBOARD_CACHE_TTL,
+            "stale_seconds": self.stale,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "inflight": len(self._inflight),
+            "refresh_errors": self.refresh_errors,
+            "hit_ratio": round((self.hits + self.stale_hits) / total, 3) if total else 0.0,
+        }
+
+
+dashboard_cache = DashboardCache()
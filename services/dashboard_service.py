@@ -7,36 +7,52 @@ from sqlalchemy.sql import func
 from sqlalchemy.orm import joinedload
 from sqlalchemy import text
 
+from services.sla_calendar import calendar_registry
+from services.sla_service import effective_deadline
+
 
 def dashboard_overview_service(
     current_user,
     db
 ):
+    # Contagens por estado vêm de ticket_counters (services/ticket_counters.py)
     row = db.execute(text("""
         SELECT
-          SUM(status = 'open')                                                   AS open_tickets,
-          SUM(status = 'open' AND progress = 'in_progress')                     AS in_progress_tickets,
-          SUM(status = 'open' AND progress = 'feedback')                         AS feedback_tickets,
-          SUM(status = 'open' AND progress = 'awaiting_confirmation')            AS awaiting_confirmation_tickets,
-          SUM(status = 'open' AND assigned_to IS NULL)                           AS unassigned_tickets,
-          SUM(status = 'open' AND priority = 'high')                             AS high_priority_tickets,
-          SUM(DATE(created_at) = CURDATE())                                      AS created_today_tickets,
-          SUM(status = 'open' AND updated_at < NOW() - INTERVAL 48 HOUR)        AS stale_48h_tickets,
-          SUM(status = 'closed' AND DATE(updated_at) = CURDATE())                AS closed_today_tickets,
-          SUM(status = 'open' AND progress = 'scheduled_visit')                  AS scheduled_visit_tickets
+          SUM(CASE WHEN status = 'open' THEN count END)                                AS open_tickets,
+          SUM(CASE WHEN status = 'open' AND progress = 'in_progress' THEN count END)   AS in_progress_tickets,
+          SUM(CASE WHEN status = 'open' AND progress = 'feedback' THEN count END)      AS feedback_tickets,
+          SUM(CASE WHEN status = 'open' AND progress = 'awaiting_confirmation' THEN count END)
+                                                                                       AS awaiting_confirmation_tickets,
+          SUM(CASE WHEN status = 'open' AND unassigned THEN count END)                 AS unassigned_tickets,
+          SUM(CASE WHEN status = 'open' AND priority = 'high' THEN count END)          AS high_priority_tickets,
+          SUM(CASE WHEN status = 'open' AND progress = 'scheduled_visit' THEN count END)
+                                                                                       AS scheduled_visit_tickets
+        FROM ticket_counters
+    """)).fetchone()
+
+    # As contagens por tempo dependem de created_at/updated_at; só os tickets tocados nas últimas
+    # 48h (ou hoje) entram no range de ix_tickets_updated_at. Parados = abertos - abertos recentes.
+    recent = db.execute(text("""
+        SELECT
+          SUM(created_at >= CURDATE())                                   AS created_today_tickets,
+          SUM(status = 'closed' AND updated_at >= CURDATE())             AS closed_today_tickets,
+          SUM(status = 'open' AND updated_at >= NOW() - INTERVAL 48 HOUR) AS open_recent_tickets
         FROM tickets
+        WHERE updated_at >= LEAST(CURDATE(), NOW() - INTERVAL 48 HOUR)
     """)).fetchone()
 
+    open_tickets = int(row.open_tickets or 0)
+
     return {
-        "open_tickets":                   int(row.open_tickets or 0),
+        "open_tickets":                   open_tickets,
         "in_progress_tickets":            int(row.in_progress_tickets or 0),
         "feedback_tickets":               int(row.feedback_tickets or 0),
         "awaiting_confirmation_tickets":  int(row.awaiting_confirmation_tickets or 0),
         "unassigned_tickets":             int(row.unassigned_tickets or 0),
-        "stale_48h_tickets":              int(row.stale_48h_tickets or 0),
+        "stale_48h_tickets":              max(0, open_tickets - int(recent.open_recent_tickets or 0)),
         "high_priority_tickets":          int(row.high_priority_tickets or 0),
-        "created_today_tickets":          int(row.created_today_tickets or 0),
-        "closed_today_tickets":           int(row.closed_today_tickets or 0),
+        "created_today_tickets":          int(recent.created_today_tickets or 0),
+        "closed_today_tickets":           int(recent.closed_today_tickets or 0),
         "scheduled_visit_tickets":        int(row.scheduled_visit_tickets or 0),
     }
 
@@ -342,14 +358,26 @@ def sla_dashboard_service(current_user, db):
             "compliance_pct": pct,
         })
 
-    # ── Tickets em risco: candidatos via SQL, deadline efetivo em Python ─
-    # Filtro conservador: deadline bruto dentro de (8h + margem pausa razoável).
-    # Só carregamos candidatos (~dezenas), não todos os registros.
-    AT_RISK_MARGIN_HOURS = AT_RISK_HOURS + 24  # margem para pausa acumulada
-    candidate_rows = db.execute(text(f"""
-        SELECT ts.ticket_id, ts.resolution_deadline, ts.total_paused_seconds, ts.paused_at,
-               ts.resolution_breached, ts.resolution_met_at,
-               t.title, t.priority, t.status,
+    # ── Tickets em risco: faixa exata sobre o prazo efetivo persistido ─
+    # effective_resolution_deadline já inclui o tempo pausado (NULL enquanto pausado), então a
+    # consulta é uma varredura de faixa em ix_ticket_sla_resolution_effective, sem ajuste em Python
+    at_risk_where = """
+        WHERE ts.resolution_breached = 0
+          AND ts.resolution_met_at IS NULL
+          AND ts.effective_resolution_deadline > :now
+          AND ts.effective_resolution_deadline <= :at_risk_until
+          AND t.status = 'open'
+    """
+    at_risk_params = {"now": now, "at_risk_until": now + timedelta(hours=AT_RISK_HOURS)}
+    at_risk_count = db.execute(text("""
+        SELECT COUNT(*)
+        FROM ticket_sla ts
+        JOIN tickets t ON t.id = ts.ticket_id
+    """ + at_risk_where), at_risk_params).scalar() or 0
+
+    at_risk_rows = db.execute(text("""
+        SELECT ts.ticket_id, ts.effective_resolution_deadline AS deadline,
+               t.title, t.priority,
                COALESCE(h.name, '') AS hotel_name,
                COALESCE(tm.name, 'Sem equipe') AS team_name,
                COALESCE(sp.name, 'Sem política') AS policy_name
@@ -358,46 +386,22 @@ def sla_dashboard_service(current_user, db):
         LEFT JOIN hotels h ON h.id = t.hotel_id
         LEFT JOIN teams tm ON tm.id = t.assigned_team_id
         LEFT JOIN sla_policies sp ON sp.id = ts.policy_id
-        WHERE t.status = 'open'
-          AND ts.resolution_met_at IS NULL
-          AND ts.resolution_deadline <= NOW() + INTERVAL {AT_RISK_MARGIN_HOURS} HOUR
-        ORDER BY ts.resolution_deadline ASC
-        LIMIT 100
-    """)).fetchall()
-
-    # Recalcula deadline efetivo (incluindo pausa ativa) em Python apenas para estes candidatos
-    at_risk_list = []
-    for r in candidate_rows:
-        dl = r.resolution_deadline
-        if dl.tzinfo is None:
-            dl = dl.replace(tzinfo=timezone.utc)
-        extra = r.total_paused_seconds or 0
-        if r.paused_at:
-            p = r.paused_at if r.paused_at.tzinfo else r.paused_at.replace(tzinfo=timezone.utc)
-            extra += max(0, int((now - p).total_seconds()))
-        eff_dl = dl + timedelta(seconds=extra)
-        hours_diff = (eff_dl - now).total_seconds() / 3600
-
-        if r.resolution_breached:
-            continue  # breached_open é calculado separado
-        if not (0 < hours_diff <= AT_RISK_HOURS):
-            continue
-
-        at_risk_list.append({
-            "id": r.ticket_id,
-            "title": r.title,
-            "hotel_name": r.hotel_name,
-            "team_name": r.team_name,
-            "policy_name": r.policy_name,
-            "priority": r.priority,
-            "resolution_deadline": eff_dl,
-            "hours_diff": hours_diff,
-        })
-    at_risk_list.sort(key=lambda x: x["hours_diff"])
+    """ + at_risk_where + """
+        ORDER BY ts.effective_resolution_deadline ASC
+        LIMIT 25
+    """), at_risk_params).fetchall()
 
     # ── Tickets com SLA violado e ainda abertos ───────────────────────
+    # Pausados não têm prazo efetivo; para exibição, o relógio parado conta até agora
+    # (com calendário, só o expediente da pausa conta: recalculado em _sla_item)
     breached_rows = db.execute(text("""
-        SELECT ts.ticket_id, ts.resolution_deadline, ts.total_paused_seconds, ts.paused_at,
+        SELECT ts.ticket_id,
+               COALESCE(
+                   ts.effective_resolution_deadline,
+                   TIMESTAMPADD(SECOND, ts.total_paused_seconds + TIMESTAMPDIFF(SECOND, ts.paused_at, :now),
+                                ts.resolution_deadline)
+               ) AS deadline,
+               ts.calendar_id, ts.paused_at, ts.total_paused_seconds, ts.resolution_deadline,
                t.title, t.priority,
                COALESCE(h.name, '') AS hotel_name,
                COALESCE(tm.name, 'Sem equipe') AS team_name,
@@ -408,45 +412,45 @@ def sla_dashboard_service(current_user, db):
         LEFT JOIN teams tm ON tm.id = t.assigned_team_id
         LEFT JOIN sla_policies sp ON sp.id = ts.policy_id
         WHERE t.status = 'open' AND ts.resolution_breached = 1
-        ORDER BY ts.resolution_deadline ASC
+        ORDER BY deadline ASC
         LIMIT 25
-    """)).fetchall()
-
-    breached_open_list = []
-    for r in breached_rows:
-        dl = r.resolution_deadline
-        if dl.tzinfo is None:
-            dl = dl.replace(tzinfo=timezone.utc)
-        extra = r.total_paused_seconds or 0
-        if r.paused_at:
-            p = r.paused_at if r.paused_at.tzinfo else r.paused_at.replace(tzinfo=timezone.utc)
-            extra += max(0, int((now - p).total_seconds()))
-        eff_dl = dl + timedelta(seconds=extra)
-        breached_open_list.append({
+    """), {"now": now}).fetchall()
+
+    def _sla_item(r) -> dict:
+        deadline = r.deadline if r.deadline.tzinfo else r.deadline.replace(tzinfo=timezone.utc)
+        if getattr(r, "paused_at", None) and r.calendar_id:
+            calendar = calendar_registry.get(db, r.calendar_id)
+            if calendar:
+                paused_at = r.paused_at if r.paused_at.tzinfo else r.paused_at.replace(tzinfo=timezone.utc)
+                paused = r.total_paused_seconds + calendar.working_seconds(paused_at, now)
+                deadline = effective_deadline(r.resolution_deadline, paused, calendar)
+        return {
             "id": r.ticket_id,
             "title": r.title,
             "hotel_name": r.hotel_name,
             "team_name": r.team_name,
             "policy_name": r.policy_name,
             "priority": r.priority,
-            "resolution_deadline": eff_dl,
-            "hours_diff": (eff_dl - now).total_seconds() / 3600,
-        })
-    breached_open_list.sort(key=lambda x: x["hours_diff"])
+            "resolution_deadline": deadline,
+            "hours_diff": (deadline - now).total_seconds() / 3600,
+        }
+
+    at_risk_list = [_sla_item(r) for r in at_risk_rows]
+    breached_open_list = [_sla_item(r) for r in breached_rows]
 
     return {
         "summary": {
             "total_with_sla":           int(summary_row.total_with_sla or 0),
             "active_sla":               int(summary_row.active_sla or 0),
             "resolution_breached_open": int(summary_row.resolution_breached_open or 0),
-            "at_risk":                  len(at_risk_list),
+            "at_risk":                  int(at_risk_count),
             "overall_compliance_pct":   overall_pct,
             "avg_response_hours":       round(float(summary_row.avg_response_hours), 2) if summary_row.avg_response_hours else None,
         },
         "by_team": by_team,
         "by_policy": by_policy,
-        "at_risk_tickets": at_risk_list[:25],
-        "breached_open_tickets": breached_open_list[:25],
+        "at_risk_tickets": at_risk_list,
+        "breached_open_tickets": breached_open_list,
     }
 
 
@@ -0,0 +1,114 @@
+"""
+Respostas de arquivo com validação condicional e Range.
+
+  - If-None-Match igual ao ETag → 304 antes de qualquer acesso ao disco
+  - Range: bytes=a-b | a- | -n (um intervalo) → 206; fora do arquivo → 416
+  - If-Range com ETag diferente → ignora o Range e devolve o arquivo inteiro
+
+Os ETags são fortes: os arquivos servidos aqui nunca mudam de conteúdo sob o mesmo nome
+(nome único gerado no upload ou hash SHA-256 do conteúdo).
+"""
+import os
+import re
+from urllib.parse import quote
+
+import anyio
+from fastapi import HTTPException, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+RANGE_CHUNK_SIZE = 64 * 1024
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def strong_etag(value: str) -> str:
+    return f'"{value}"'
+
+
+def _etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Comparação fraca (RFC 9110 §13.1.2): W/"x" também vale para o 304
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def _parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """(início, fim inclusivo) ou None se o Range deve ser ignorado; 416 se insatisfazível."""
+    match = _RANGE.match(header.replace(" ", ""))
+    if not match or not any(match.groups()):
+        # Vários intervalos ou unidade desconhecida: serve o arquivo inteiro
+        return None
+    first, last = match.groups()
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+
+def _content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+async def _read_range(path: str, start: int, end: int):
+    async with await anyio.open_file(path, "rb") as f:
+        await f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await f.read(min(RANGE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def file_response(
+    request: Request,
+    path: str,
+    etag: str,
+    cache_control: str,
+    media_type: str | None = None,
+    filename: str | None = None,
+) -> Response:
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Accept-Ranges": "bytes"}
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        stat_result = os.stat(path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Arquivo não encontrado no servidor")
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == etag):
+        byte_range = _parse_range(range_header, stat_result.st_size)
+        if byte_range is not None:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{stat_result.st_size}"
+            headers["Content-Length"] = str(end - start + 1)
+            if filename:
+                headers["Content-Disposition"] = _content_disposition(filename)
+            return StreamingResponse(
+                _read_range(path, start, end),
+                status_code=206,
+                media_type=media_type,
+                headers=headers,
+            )
+
+    return FileResponse(
+        path,
+        stat_result=stat_result,
+        media_type=media_type,
+        filename=filename,
+        headers=headers,
+    )
@@ -0,0 +1,74 @@
+import os
+import threading
+import time
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from models import User as UserModel
+
+# Idade máxima do índice; cada worker tem o seu e só vê invalidações feitas nele mesmo
+MENTION_INDEX_TTL = int(os.getenv("MENTION_INDEX_TTL", 300))
+
+
+def first_name_key(name: str | None) -> str:
+    return name.split()[0].lower() if name and name.split() else ""
+
+
+class MentionIndex:
+    """Primeiro nome (minúsculo) → ids de usuário em ordem crescente, para resolver @menções."""
+
+    def __init__(self, ttl: int = MENTION_INDEX_TTL):
+        self.ttl = ttl
+        self._index: dict[str, tuple[int, ...]] | None = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def _build(self, db: Session) -> dict[str, tuple[int, ...]]:
+        index: dict[str, list[int]] = {}
+        for user_id, name in db.execute(select(UserModel.id, UserModel.name).order_by(UserModel.id)):
+            index.setdefault(first_name_key(name), []).append(user_id)
+        return {key: tuple(ids) for key, ids in index.items()}
+
+    def lookup(self, db: Session, first_names) -> dict[str, tuple[int, ...]]:
+        with self._lock:
+            index = self._index
+            if index is None or time.monotonic() - self._built_at >= self.ttl:
+                index = self._index = self._build(db)
+                self._built_at = time.monotonic()
+                self.builds += 1
+        return {key: index.get(key, ()) for key in first_names}
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._index = None
+
+
+mention_index = MentionIndex()
+
+
+def invalidate_mention_index() -> None:
+    """Chamar quando usuários forem criados, renomeados ou excluídos."""
+    mention_index.invalidate()
+
+
+def invalidate_mention_index_on_commit(db: Session) -> None:
+    """
+    Como invalidate_mention_index, mas só depois do COMMIT da sessão: antes dele, um comentário
+    concorrente reconstruiria o índice com os nomes antigos e o manteria pelo TTL inteiro.
+    """
+    if "mention_index_pending" not in db.info:
+        event.listen(db, "after_commit", _invalidate_committed)
+        event.listen(db, "after_rollback", _discard_pending)
+    db.info["mention_index_pending"] = True
+
+
+def _invalidate_committed(db: Session) -> None:
+    if db.info.get("mention_index_pending"):
+        db.info["mention_index_pending"] = False
+        invalidate_mention_index()
+
+
+def _discard_pending(db: Session) -> None:
+    db.info["mention_index_pending"] = False
@@ -0,0 +1,99 @@
+"""
+Pub/sub em processo para o stream SSE de notificações (GET /notifications/stream).
+
+Quem grava notificações chama publish_after_commit(db, user_id); depois do commit da sessão
+cada conexão aberta do usuário é acordada e busca as novidades no banco. O evento só carrega
+"tem novidade para o usuário X" — o conteúdo sempre vem da tabela, que também serve o replay
+via Last-Event-ID.
+
+Cada worker do uvicorn tem seu próprio bus; o stream faz uma ressincronização periódica para
+pegar notificações criadas em outro worker.
+"""
+import asyncio
+import os
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Máximo de streams simultâneos por usuário (abas abertas) em cada worker
+NOTIFICATION_STREAM_MAX_PER_USER = int(os.getenv("NOTIFICATION_STREAM_MAX_PER_USER", 5))
+
+_PENDING_KEY = "notification_bus_pending"
+
+
+class Subscription:
+    def __init__(self, user_id: int, loop: asyncio.AbstractEventLoop):
+        self.user_id = user_id
+        self.loop = loop
+        self.wake = asyncio.Event()
+
+    def notify(self) -> None:
+        # publish pode vir de uma thread do threadpool; o Event só pode ser mexido no loop dele
+        self.loop.call_soon_threadsafe(self.wake.set)
+
+
+class NotificationBus:
+    def __init__(self, max_per_user: int = NOTIFICATION_STREAM_MAX_PER_USER):
+        self.max_per_user = max_per_user
+        self._subs: dict[int, set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, user_id: int) -> Subscription | None:
+        """Registra um stream; None se o usuário já atingiu o limite de conexões."""
+        sub = Subscription(user_id, asyncio.get_running_loop())
+        with self._lock:
+            subs = self._subs.setdefault(user_id, set())
+            if len(subs) >= self.max_per_user:
+                return None
+            subs.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._subs.get(sub.user_id)
+            if subs is None:
+                return
+            subs.discard(sub)
+            if not subs:
+                del self._subs[sub.user_id]
+
+    def publish(self, user_id: int) -> None:
+        with self._lock:
+            subs = list(self._subs.get(user_id, ()))
+            self.published += 1
+        for sub in subs:
+            try:
+                sub.notify()
+            except RuntimeError:
+                # loop já encerrado (shutdown); a conexão some junto
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "users": len(self._subs),
+                "connections": sum(len(s) for s in self._subs.values()),
+                "max_per_user": self.max_per_user,
+                "published": self.published,
+            }
+
+
+notification_bus = NotificationBus()
+
+
+def publish_after_commit(db: Session, user_id: int) -> None:
+    """Agenda o aviso aos streams do usuário para depois do commit (descartado em rollback)."""
+    db.info.setdefault(_PENDING_KEY, set()).add(user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session: Session) -> None:
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        notification_bus.publish(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
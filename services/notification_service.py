@@ -1,6 +1,9 @@
 import re
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session, load_only
 from models import Notification as NotificationModel, User as UserModel, UserHotel as UserHotelModel, UserTeam as UserTeamModel, RoleEnum
+from services.notification_bus import publish_after_commit
+from services.mention_index import mention_index
 
 
 def create_notification(
@@ -23,6 +26,54 @@ def create_notification(
         qualitor_ticket_id=qualitor_ticket_id,
     )
     db.add(notif)
+    publish_after_commit(db, user_id)
+
+
+# Linhas por INSERT multi-row (mantém o statement bem abaixo do max_allowed_packet)
+BULK_INSERT_CHUNK = 1000
+
+
+def create_notifications_bulk(
+    db: Session,
+    user_ids,
+    type: str,
+    title: str,
+    body: str = None,
+    ticket_id: int = None,
+    mural_post_id: int = None,
+    qualitor_ticket_id: int = None,
+) -> list[int]:
+    """Cria a mesma notificação para vários usuários com INSERT multi-row; devolve os destinatários."""
+    recipients = list(dict.fromkeys(user_ids))
+    if not recipients:
+        return []
+
+    insert_notification_rows(db, [
+        {
+            "user_id": user_id,
+            "type": type,
+            "title": title,
+            "body": body,
+            "ticket_id": ticket_id,
+            "mural_post_id": mural_post_id,
+            "qualitor_ticket_id": qualitor_ticket_id,
+            "read": False,
+        }
+        for user_id in recipients
+    ])
+    return recipients
+
+
+def insert_notification_rows(db: Session, rows: list[dict]) -> None:
+    """INSERT em lote de notificações já montadas (conteúdos diferentes por linha)."""
+    # executemany de um INSERT compilado uma vez; o mysql-connector envia como um único
+    # INSERT ... VALUES (...), (...) por lote
+    table = NotificationModel.__table__
+    for i in range(0, len(rows), BULK_INSERT_CHUNK):
+        db.execute(table.insert(), rows[i:i + BULK_INSERT_CHUNK])
+
+    for user_id in dict.fromkeys(row["user_id"] for row in rows):
+        publish_after_commit(db, user_id)
 
 
 def notify_all_staff(
@@ -33,18 +84,17 @@ def notify_all_staff(
     body: str = None,
     mural_post_id: int = None,
     ticket_id: int = None,
-):
+) -> list[int]:
     """Notify all admin/agent users except the actor."""
-    staff = (
-        db.query(UserModel)
-        .filter(
+    staff_ids = db.scalars(
+        select(UserModel.id).where(
             UserModel.role.in_([RoleEnum.admin, RoleEnum.agent]),
             UserModel.id != exclude_user_id,
         )
-        .all()
+    ).all()
+    return create_notifications_bulk(
+        db, staff_ids, type, title, body, ticket_id=ticket_id, mural_post_id=mural_post_id,
     )
-    for u in staff:
-        create_notification(db, u.id, type, title, body, ticket_id=ticket_id, mural_post_id=mural_post_id)
 
 
 def notify_ticket_clients(
@@ -55,20 +105,18 @@ def notify_ticket_clients(
     title: str,
     body: str = None,
     ticket_id: int = None,
-):
+) -> list[int]:
     """Notify all client_manager/client_receptionist linked to the hotel, except the actor."""
-    clients = (
-        db.query(UserModel)
+    client_ids = db.scalars(
+        select(UserModel.id)
         .join(UserHotelModel, UserModel.id == UserHotelModel.user_id)
-        .filter(
+        .where(
             UserHotelModel.hotel_id == hotel_id,
             UserModel.role.in_([RoleEnum.client_manager, RoleEnum.client_receptionist]),
             UserModel.id != exclude_user_id,
         )
-        .all()
-    )
-    for u in clients:
-        create_notification(db, u.id, type, title, body, ticket_id=ticket_id)
+    ).all()
+    return create_notifications_bulk(db, client_ids, type, title, body, ticket_id=ticket_id)
 
 
 def notify_ticket_team(
@@ -79,31 +127,19 @@ def notify_ticket_team(
     title: str,
     body: str = None,
     ticket_id: int = None,
-):
+) -> list[int]:
     """Notify all admins + agents who belong to the given team, except the actor."""
-    admins = (
-        db.query(UserModel)
-        .filter(
-            UserModel.role == RoleEnum.admin,
-            UserModel.id != exclude_user_id,
-        )
-        .all()
-    )
-    agents = (
-        db.query(UserModel)
-        .join(UserTeamModel, UserModel.id == UserTeamModel.user_id)
-        .filter(
-            UserTeamModel.team_id == team_id,
-            UserModel.role == RoleEnum.agent,
+    team_agents = select(UserTeamModel.user_id).where(UserTeamModel.team_id == team_id)
+    recipient_ids = db.scalars(
+        select(UserModel.id).where(
             UserModel.id != exclude_user_id,
+            or_(
+                UserModel.role == RoleEnum.admin,
+                and_(UserModel.role == RoleEnum.agent, UserModel.id.in_(team_agents)),
+            ),
         )
-        .all()
-    )
-    seen = set()
-    for u in admins + agents:
-        if u.id not in seen:
-            seen.add(u.id)
-            create_notification(db, u.id, type, title, body, ticket_id=ticket_id)
+    ).all()
+    return create_notifications_bulk(db, recipient_ids, type, title, body, ticket_id=ticket_id)
 
 
 def extract_mentioned_users(text: str, db: Session, exclude_user_id: int = None):
@@ -113,21 +149,27 @@ def extract_mentioned_users(text: str, db: Session, exclude_user_id: int = None)
     if not matches:
         return []
 
-    all_users = db.query(UserModel).all()
-    mentioned = []
-    seen_ids = set()
+    candidates = mention_index.lookup(db, {m.lower() for m in matches})
 
+    # Cada @token resolve para o primeiro usuário (menor id) com esse primeiro nome ainda não escolhido
+    mentioned_ids = []
+    seen_ids = set()
     for match in matches:
-        match_lower = match.lower()
-        for user in all_users:
-            if user.id in seen_ids:
+        for user_id in candidates[match.lower()]:
+            if user_id in seen_ids:
                 continue
-            if exclude_user_id and user.id == exclude_user_id:
+            if exclude_user_id and user_id == exclude_user_id:
                 continue
-            first_name = user.name.split()[0].lower() if user.name else ''
-            if first_name == match_lower:
-                mentioned.append(user)
-                seen_ids.add(user.id)
-                break
+            mentioned_ids.append(user_id)
+            seen_ids.add(user_id)
+            break
+
+    if not mentioned_ids:
+        return []
 
-    return mentioned
+    users = {
+        u.id: u
+        for u in db.query(UserModel).options(load_only(UserModel.id, UserModel.name))
+        .filter(UserModel.id.in_(mentioned_ids))
+    }
+    return [users[user_id] for user_id in mentioned_ids if user_id in users]
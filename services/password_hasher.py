@@ -0,0 +1,95 @@
+"""
+Executor dedicado para bcrypt (hash e verificação de senha).
+
+Cada operação custa 100–300 ms de CPU; rodando no threadpool dos requests, um pico de logins
+ocupa todas as threads e trava o resto da API. Aqui elas vão para um pool próprio e limitado
+(bcrypt libera o GIL, então threads bastam), com fila máxima e métricas de profundidade.
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+# Custo do bcrypt; hashes com outro custo são refeitos de forma transparente no próximo login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+# Operações de bcrypt simultâneas (threads do pool)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+# Operações aguardando na fila antes de recusar com 503
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 64))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+
+class PasswordHasher:
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.max_queued = 0
+        self._wait_total = 0.0
+        self._run_total = 0.0
+
+    def _submit(self, fn, *args):
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise HTTPException(status_code=503, detail="Servidor ocupado, tente novamente em instantes")
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        return self._executor.submit(self._run, time.perf_counter(), fn, *args)
+
+    def _run(self, submitted_at: float, fn, *args):
+        started = time.perf_counter()
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+            self._wait_total += started - submitted_at
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+                self._run_total += time.perf_counter() - started
+
+    # Rotas async: aguardam sem ocupar thread nenhuma do servidor
+    async def verify_and_update(self, plain: str, hashed: str) -> tuple[bool, str | None]:
+        """(senha confere, novo hash se o atual usa custo/esquema desatualizado)."""
+        return await asyncio.wrap_future(self._submit(pwd_context.verify_and_update, plain, hashed))
+
+    async def hash_async(self, plain: str) -> str:
+        return await asyncio.wrap_future(self._submit(pwd_context.hash, plain))
+
+    # Código síncrono (services chamados do threadpool): respeita o mesmo limite de CPU
+    def hash(self, plain: str) -> str:
+        return self._submit(pwd_context.hash, plain).result()
+
+    def verify(self, plain: str, hashed: str) -> bool:
+        return self._submit(pwd_context.verify, plain, hashed).result()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "rounds": BCRYPT_ROUNDS,
+                "queued": self.queued,
+                "running": self.running,
+                "max_queued": self.max_queued,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self._wait_total / self.completed * 1000, 1) if self.completed else 0.0,
+                "avg_run_ms": round(self._run_total / self.completed * 1000, 1) if self.completed else 0.0,
+            }
+
+
+password_hasher = PasswordHasher()
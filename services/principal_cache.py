@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Tempo máximo (segundos) que um principal fica em cache antes de ser recarregado do banco.
+# Cada worker do uvicorn tem seu próprio cache; o TTL limita a defasagem entre processos.
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", 60))
+
+
+@dataclass
+class Principal:
+    """Snapshot do usuário autenticado: colunas da tabela users + vínculos de hotel/time."""
+    user_id: int
+    role: str
+    columns: dict
+    hotel_ids: frozenset[int] = field(default_factory=frozenset)
+    team_ids: frozenset[int] = field(default_factory=frozenset)
+    expires_at: float = 0.0
+
+
+class PrincipalCache:
+    def __init__(self, ttl: int = PRINCIPAL_CACHE_TTL):
+        self.ttl = ttl
+        self._entries: dict[int, Principal] = {}
+        # Geração por usuário (e uma global, para clear): invalidações incrementam; put() compara
+        self._generations: dict[int, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, user_id: int) -> Principal | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry.expires_at <= now:
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry
+
+    def peek(self, user_id: int) -> Principal | None:
+        """Como get(), mas sem contar hit/miss — usado pelos helpers de autorização."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry.expires_at <= time.monotonic():
+                return None
+            return entry
+
+    def generation(self, user_id: int) -> tuple[int, int]:
+        """Ler ANTES de consultar o banco e repassar a put()."""
+        with self._lock:
+            return self._epoch, self._generations.get(user_id, 0)
+
+    def put(self, principal: Principal, generation: tuple[int, int]) -> None:
+        """
+        Guarda o principal, a menos que o usuário tenha sido invalidado desde `generation`:
+        os dados foram lidos antes do commit que motivou a invalidação e cacheá-los
+        manteria role/escopos antigos pelo TTL inteiro.
+        """
+        principal.expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            if (self._epoch, self._generations.get(principal.user_id, 0)) != generation:
+                return
+            self._entries[principal.user_id] = principal
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._epoch += 1
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+            }
+
+
+principal_cache = PrincipalCache()
+
+
+def invalidate_principal(user_id: int) -> None:
+    """Descarta o principal em cache — chamar sempre que role, hotéis ou times do usuário mudarem."""
+    principal_cache.invalidate(user_id)
+
+
+def invalidate_principal_on_commit(db: Session, user_id: int) -> None:
+    """
+    Como invalidate_principal, mas só depois do COMMIT da sessão. Invalidar antes deixaria um
+    request concorrente recarregar — e cachear pelo TTL inteiro — os vínculos antigos, que
+    ainda são os confirmados no banco. Sem commit (rollback), nada mudou e nada é invalidado.
+    """
+    pending = db.info.get("principals_to_invalidate")
+    if pending is None:
+        pending = db.info["principals_to_invalidate"] = set()
+        event.listen(db, "after_commit", _invalidate_committed)
+        event.listen(db, "after_rollback", _discard_pending)
+    pending.add(user_id)
+
+
+def _invalidate_committed(db: Session) -> None:
+    pending = db.info.get("principals_to_invalidate")
+    while pending:
+        invalidate_principal(pending.pop())
+
+
+def _discard_pending(db: Session) -> None:
+    db.info.get("principals_to_invalidate", set()).clear()
+
+
+def invalidate_all_principals() -> None:
+    """Descarta todo o cache (ex.: exclusão de hotel/time afeta vínculos de vários usuários)."""
+    principal_cache.clear()
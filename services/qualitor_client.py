@@ -0,0 +1,95 @@
+import os
+
+import httpx
+
+QUALITOR_API_URL = os.getenv("QUALITOR_API_URL", "http://localhost:8003")
+
+# Pool de conexões compartilhado com a API local do Qualitor
+QUALITOR_MAX_CONNECTIONS = int(os.getenv("QUALITOR_MAX_CONNECTIONS", 20))
+QUALITOR_MAX_KEEPALIVE = int(os.getenv("QUALITOR_MAX_KEEPALIVE", 10))
+QUALITOR_KEEPALIVE_EXPIRY = float(os.getenv("QUALITOR_KEEPALIVE_EXPIRY", 30))
+# Pool separado para upload/download de anexos: cada transferência segura a conexão no ritmo do
+# cliente final, e no pool principal ~20 lentas travariam consultas, dashboard e health
+QUALITOR_TRANSFER_MAX_CONNECTIONS = int(os.getenv("QUALITOR_TRANSFER_MAX_CONNECTIONS", 8))
+# HTTP/2 depende do pacote opcional `h2` (pip install httpx[http2])
+QUALITOR_HTTP2 = os.getenv("QUALITOR_HTTP2", "false").lower() in ("1", "true", "yes")
+
+# Timeouts por tipo de chamada (segundos)
+TIMEOUT_HEALTH = 5.0     # /admin/health
+TIMEOUT_READ = 15.0      # consultas e estatísticas
+TIMEOUT_ACTION = 60.0    # ações que escrevem no Qualitor (start, close, history...)
+TIMEOUT_TRANSFER = 120.0 # upload/download de anexos
+
+# Limite de bytes por transferência de anexo (upload ou download) passando pelo proxy
+QUALITOR_TRANSFER_MAX_BYTES = int(os.getenv("QUALITOR_TRANSFER_MAX_BYTES", 50 * 1024 * 1024))
+
+_client: httpx.AsyncClient | None = None
+_transfer_client: httpx.AsyncClient | None = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _build_client(
+    max_connections: int = QUALITOR_MAX_CONNECTIONS, max_keepalive: int = QUALITOR_MAX_KEEPALIVE,
+) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=QUALITOR_API_URL,
+        timeout=TIMEOUT_READ,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=QUALITOR_KEEPALIVE_EXPIRY,
+        ),
+        http2=QUALITOR_HTTP2 and _http2_available(),
+    )
+
+
+def _build_transfer_client() -> httpx.AsyncClient:
+    return _build_client(
+        QUALITOR_TRANSFER_MAX_CONNECTIONS, min(QUALITOR_MAX_KEEPALIVE, QUALITOR_TRANSFER_MAX_CONNECTIONS),
+    )
+
+
+async def startup() -> None:
+    """Cria os clients compartilhados (chamado no lifespan do app)."""
+    global _client, _transfer_client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    if _transfer_client is None or _transfer_client.is_closed:
+        _transfer_client = _build_transfer_client()
+
+
+async def shutdown() -> None:
+    """Fecha os clients e as conexões keep-alive (chamado no lifespan do app)."""
+    global _client, _transfer_client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    if _transfer_client is not None:
+        await _transfer_client.aclose()
+        _transfer_client = None
+
+
+def get_qualitor_client() -> httpx.AsyncClient:
+    """Client HTTP único para a API do Qualitor, reaproveitando conexões entre requests.
+
+    Se o lifespan não rodou (scripts, testes), o client é criado sob demanda.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+def get_qualitor_transfer_client() -> httpx.AsyncClient:
+    """Client para upload/download de anexos, com pool próprio (QUALITOR_TRANSFER_MAX_CONNECTIONS)."""
+    global _transfer_client
+    if _transfer_client is None or _transfer_client.is_closed:
+        _transfer_client = _build_transfer_client()
+    return _transfer_client
@@ -0,0 +1,177 @@
+"""
+Dados de sessão do frontend (hotéis, times, categorias, subcategorias, menus), servidos por
+GET /auth/bootstrap em vez de embutidos no JWT.
+
+A parte comum a todos os usuários (catálogo) fica em cache em processo com TTL e é descartada
+após o commit de qualquer alteração em hotels/teams/categories/subcategories. A parte do
+usuário vem do principal em cache (services/principal_cache.py).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import Hotel as HotelModel, Team as TeamModel
+from models import Category as CategoryModel, SubCategory as SubCategoryModel
+from models import UserHotel as UserHotelModel, UserTeam as UserTeamModel
+from auth_utils import QUALITOR_TEAM_NAMES
+from services.principal_cache import principal_cache
+
+BOOTSTRAP_CATALOG_TTL = int(os.getenv("BOOTSTRAP_CATALOG_TTL", 300))
+
+_CATALOG_MODELS = (HotelModel, TeamModel, CategoryModel, SubCategoryModel)
+_STALE_KEY = "session_bootstrap_catalog_stale"
+
+
+class _Catalog:
+    def __init__(self, ttl: int = BOOTSTRAP_CATALOG_TTL):
+        self.ttl = ttl
+        self._data: dict | None = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, db: Session) -> dict:
+        with self._lock:
+            if self._data is None or time.monotonic() - self._loaded_at >= self.ttl:
+                self._data = self._load(db)
+                self._loaded_at = time.monotonic()
+            return self._data
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._data = None
+
+    @staticmethod
+    def _load(db: Session) -> dict:
+        return {
+            "hotels": [
+                {"id": h.id, "code": h.code, "name": h.name}
+                for h in db.query(HotelModel.id, HotelModel.code, HotelModel.name).order_by(HotelModel.id).all()
+            ],
+            "teams": {t.id: t.name for t in db.query(TeamModel.id, TeamModel.name).all()},
+            "categories": [
+                {"id": c.id, "name": c.name, "team_id": c.team_id}
+                for c in db.query(CategoryModel.id, CategoryModel.name, CategoryModel.team_id).order_by(CategoryModel.id).all()
+            ],
+            "subcategories": [
+                {"id": s.id, "name": s.name, "category_id": s.category_id}
+                for s in db.query(SubCategoryModel.id, SubCategoryModel.name, SubCategoryModel.category_id).order_by(SubCategoryModel.id).all()
+            ],
+        }
+
+
+catalog = _Catalog()
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_catalog_stale(session: Session, flush_context) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _CATALOG_MODELS):
+            session.info[_STALE_KEY] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_catalog(session: Session) -> None:
+    if session.info.pop(_STALE_KEY, False):
+        catalog.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_stale_flag(session: Session) -> None:
+    session.info.pop(_STALE_KEY, None)
+
+
+def _role_menus(role: str, has_qualitor_access: bool) -> list[dict]:
+    qualitor_menu = [{"label": "Qualitor", "page": "qualitor"}] if has_qualitor_access else []
+
+    role_menus = {
+        "admin": [
+            {"label": "Dashboard", "page": "dashboard"},
+            {"label": "Chamados", "page": "tickets"},
+            *qualitor_menu,
+            {"label": "Mural", "page": "mural"},
+            {"label": "Equipes", "page": "teams"},
+            {"label": "Gerenciar usuários", "page": "manage-users"},
+            {"label": "Gerenciar hotéis", "page": "manage-hotels"},
+            {"label": "Categorias & SLA", "page": "manage-categories"},
+            {"label": "Relatório de Atividades", "page": "activity-report"},
+        ],
+        "agent": [
+            {"label": "Dashboard", "page": "dashboard"},
+            {"label": "Chamados", "page": "tickets"},
+            *qualitor_menu,
+            {"label": "Mural", "page": "mural"},
+            {"label": "Equipes", "page": "teams"},
+            {"label": "Gerenciar usuários", "page": "manage-users"},
+        ],
+        "client_manager": [
+            {"label": "Meus chamados", "page": "tickets"},
+            {"label": "Gerenciar usuários", "page": "manage-users"},
+        ],
+        "client_receptionist": [
+            {"label": "Meus chamados", "page": "tickets"},
+        ],
+    }
+    return role_menus.get(role, [])
+
+
+def _user_links(user, db: Session) -> tuple[frozenset, frozenset]:
+    principal = principal_cache.peek(user.id)
+    if principal is not None:
+        return principal.hotel_ids, principal.team_ids
+    hotel_ids = frozenset(
+        hid for (hid,) in db.query(UserHotelModel.hotel_id).filter(UserHotelModel.user_id == user.id).all()
+    )
+    team_ids = frozenset(
+        tid for (tid,) in db.query(UserTeamModel.team_id).filter(UserTeamModel.user_id == user.id).all()
+    )
+    return hotel_ids, team_ids
+
+
+def build_session_bootstrap(user, db: Session) -> dict:
+    """Payload que antes ia dentro do JWT (mesmas chaves)."""
+    data = catalog.get(db)
+    hotel_ids, team_ids = _user_links(user, db)
+    role = user.role.value if hasattr(user.role, "value") else user.role
+
+    if role in ("admin", "agent"):
+        hotels = data["hotels"]
+    else:
+        hotels = [h for h in data["hotels"] if h["id"] in hotel_ids]
+
+    # Times do próprio usuário (não todos os times do sistema)
+    user_teams = sorted(
+        ({"id": tid, "name": data["teams"][tid]} for tid in team_ids if tid in data["teams"]),
+        key=lambda t: t["id"],
+    )
+    # Separa times de helpdesk (usados no filtro de chamados) dos times exclusivos do Qualitor
+    teams = [t for t in user_teams if t["name"] not in QUALITOR_TEAM_NAMES]
+    user_qualitor_teams = [t["name"] for t in user_teams if t["name"] in QUALITOR_TEAM_NAMES]
+
+    # Admin vê todos os times Qualitor sem precisar ser membro; agentes só veem os seus
+    has_qualitor_access = (role == "admin") or bool(user_qualitor_teams)
+    qualitor_teams = sorted(QUALITOR_TEAM_NAMES) if role == "admin" else user_qualitor_teams
+
+    return {
+        "id": user.id,
+        "name": user.name,
+        "role": role,
+        "email": user.email,
+        "avatar_url": user.avatar_url or "",
+        "hotels": hotels,
+        "teams": teams,
+        "qualitor_teams": qualitor_teams,
+        "categories": data["categories"],
+        "subcategories": data["subcategories"],
+        "menus": _role_menus(role, has_qualitor_access),
+    }
+
+
+def bootstrap_etag(payload: dict) -> str:
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return '"' + hashlib.sha256(body.encode()).hexdigest()[:32] + '"'
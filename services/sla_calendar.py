@@ -0,0 +1,242 @@
+"""
+Calendário de expediente para SLA: prazos em horas úteis por hotel ou por política.
+
+A grade semanal (intervalos em minutos do dia, no fuso do calendário) e os feriados são
+expandidos numa tabela de intervalos abertos em epoch UTC, com a soma acumulada de segundos
+úteis até cada um. "Início + N segundos úteis" e "segundos úteis entre dois instantes" viram
+busca binária nessa tabela (O(log n)), sem andar minuto a minuto pelas noites e fins de semana.
+
+A tabela cobre SLA_CALENDAR_PAST_DAYS para trás e SLA_CALENDAR_FUTURE_DAYS para frente e é
+estendida quando um prazo cai fora dela. Cada worker mantém os calendários em cache por
+SLA_CALENDAR_CACHE_TTL segundos; as rotas de calendário invalidam o cache local ao salvar.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta, timezone
+from typing import NamedTuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy.orm import Session, selectinload
+
+from models import SLACalendar as SLACalendarModel
+
+SLA_CALENDAR_CACHE_TTL = int(os.getenv("SLA_CALENDAR_CACHE_TTL", 300))
+SLA_CALENDAR_PAST_DAYS = int(os.getenv("SLA_CALENDAR_PAST_DAYS", 400))
+SLA_CALENDAR_FUTURE_DAYS = int(os.getenv("SLA_CALENDAR_FUTURE_DAYS", 730))
+
+MINUTES_PER_DAY = 24 * 60
+
+
+class _Table(NamedTuple):
+    lo: float               # epoch da meia-noite local de first_day
+    hi: float               # epoch da meia-noite local de last_day
+    first_day: date
+    last_day: date          # exclusivo
+    starts: list[float]     # intervalos de expediente, ordenados e sem sobreposição
+    ends: list[float]
+    cum: list[float]        # segundos úteis antes do intervalo i
+    cum_end: list[float]    # segundos úteis até o fim do intervalo i
+
+
+def _epoch(dt: datetime) -> float:
+    # MySQL devolve datetime naive, sempre em UTC
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+class BusinessCalendar:
+    """
+    Tabela de expediente de um calendário. weekly: dia da semana (0 = segunda) → lista de
+    (minuto inicial, minuto final) no fuso do calendário; minuto final 1440 = meia-noite.
+    """
+
+    def __init__(
+        self, calendar_id: int | None, tz: str, weekly: dict[int, list[tuple[int, int]]], holidays=(),
+        version: int = 1,
+    ):
+        if not any(end > start for intervals in weekly.values() for start, end in intervals):
+            raise ValueError("Calendário sem nenhum intervalo de expediente")
+        self.calendar_id = calendar_id
+        self.version = version
+        self.timezone = tz
+        self._zone = ZoneInfo(tz)
+        self._weekly = {day: sorted(intervals) for day, intervals in weekly.items()}
+        self._holidays = frozenset(holidays)
+        self._lock = threading.Lock()
+        today = datetime.now(self._zone).date()
+        self._table = self._build(
+            today - timedelta(days=SLA_CALENDAR_PAST_DAYS),
+            today + timedelta(days=SLA_CALENDAR_FUTURE_DAYS),
+        )
+
+    def _local(self, day: date, minute: int) -> float:
+        midnight = datetime(day.year, day.month, day.day, tzinfo=self._zone)
+        if minute >= MINUTES_PER_DAY:
+            next_day = day + timedelta(days=1)
+            midnight = datetime(next_day.year, next_day.month, next_day.day, tzinfo=self._zone)
+            minute -= MINUTES_PER_DAY
+        return (midnight + timedelta(minutes=minute)).timestamp()
+
+    def _build(self, first_day: date, last_day: date) -> _Table:
+        starts: list[float] = []
+        ends: list[float] = []
+        day = first_day
+        while day < last_day:
+            if day not in self._holidays:
+                for start_minute, end_minute in self._weekly.get(day.weekday(), ()):
+                    start, end = self._local(day, start_minute), self._local(day, end_minute)
+                    if end <= start:
+                        continue
+                    if ends and start <= ends[-1]:
+                        # Turnos encostados (22h–24h + 0h–6h) viram um intervalo só
+                        ends[-1] = max(ends[-1], end)
+                    else:
+                        starts.append(start)
+                        ends.append(end)
+            day += timedelta(days=1)
+
+        cum: list[float] = []
+        cum_end: list[float] = []
+        total = 0.0
+        for start, end in zip(starts, ends):
+            cum.append(total)
+            total += end - start
+            cum_end.append(total)
+        return _Table(self._local(first_day, 0), self._local(last_day, 0), first_day, last_day, starts, ends, cum, cum_end)
+
+    def _covering(self, *instants: float) -> _Table:
+        table = self._table
+        if table.lo <= min(instants) and max(instants) <= table.hi:
+            return table
+        with self._lock:
+            table = self._table
+            first_day, last_day = table.first_day, table.last_day
+            while self._local(first_day, 0) > min(instants):
+                first_day -= timedelta(days=SLA_CALENDAR_PAST_DAYS)
+            while self._local(last_day, 0) < max(instants):
+                last_day += timedelta(days=SLA_CALENDAR_FUTURE_DAYS)
+            if (first_day, last_day) != (table.first_day, table.last_day):
+                table = self._table = self._build(first_day, last_day)
+            return table
+
+    @staticmethod
+    def _worked_until(table: _Table, ts: float) -> float:
+        """Segundos úteis entre o início da tabela e ts."""
+        i = bisect_right(table.starts, ts) - 1
+        if i < 0:
+            return 0.0
+        return table.cum[i] + min(ts, table.ends[i]) - table.starts[i]
+
+    def working_seconds(self, start: datetime, end: datetime) -> int:
+        """Segundos de expediente entre start e end (0 se end <= start)."""
+        a, b = _epoch(start), _epoch(end)
+        if b <= a:
+            return 0
+        table = self._covering(a, b)
+        return round(self._worked_until(table, b) - self._worked_until(table, a))
+
+    def add(self, start: datetime, seconds: float) -> datetime:
+        """Primeiro instante em que start + `seconds` segundos de expediente se completam."""
+        if seconds <= 0:
+            return start
+        ts = _epoch(start)
+        table = self._covering(ts)
+        target = self._worked_until(table, ts) + seconds
+        while not table.cum_end or target > table.cum_end[-1]:
+            # Prazo além do fim da tabela: estende para frente e refaz a conta
+            table = self._covering(table.hi + SLA_CALENDAR_FUTURE_DAYS * 86400)
+            target = self._worked_until(table, ts) + seconds
+        j = bisect_left(table.cum_end, target)
+        return datetime.fromtimestamp(table.starts[j] + (target - table.cum[j]), timezone.utc)
+
+    def stats(self) -> dict:
+        table = self._table
+        return {
+            "timezone": self.timezone,
+            "intervals": len(table.starts),
+            "from": table.first_day.isoformat(),
+            "to": table.last_day.isoformat(),
+        }
+
+
+def add_working_time(calendar: BusinessCalendar | None, start: datetime, seconds: float) -> datetime:
+    """start + seconds no relógio do SLA: expediente do calendário ou tempo corrido (sem calendário)."""
+    if calendar is None:
+        return start + timedelta(seconds=seconds)
+    return calendar.add(start, seconds)
+
+
+def working_seconds_between(calendar: BusinessCalendar | None, start: datetime, end: datetime) -> int:
+    if calendar is None:
+        return int((end - start).total_seconds())
+    return calendar.working_seconds(start, end)
+
+
+def load_calendar(db: Session, calendar_id: int) -> BusinessCalendar | None:
+    calendar = (
+        db.query(SLACalendarModel)
+        .options(selectinload(SLACalendarModel.hours), selectinload(SLACalendarModel.holidays))
+        .filter(SLACalendarModel.id == calendar_id)
+        .first()
+    )
+    if not calendar:
+        return None
+    weekly: dict[int, list[tuple[int, int]]] = {}
+    for h in calendar.hours:
+        weekly.setdefault(h.weekday, []).append((h.start_minute, h.end_minute))
+    return BusinessCalendar(
+        calendar.id, calendar.timezone, weekly, {h.date for h in calendar.holidays}, version=calendar.version,
+    )
+
+
+class CalendarRegistry:
+    """Cache por processo dos calendários montados (a tabela custa alguns ms para montar)."""
+
+    def __init__(self, ttl: int = SLA_CALENDAR_CACHE_TTL):
+        self.ttl = ttl
+        self._entries: dict[int, tuple[BusinessCalendar | None, float]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, db: Session, calendar_id: int | None) -> BusinessCalendar | None:
+        if calendar_id is None:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(calendar_id)
+            if entry is not None and entry[1] > now:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        calendar = load_calendar(db, calendar_id)
+        with self._lock:
+            self._entries[calendar_id] = (calendar, now + self.ttl)
+        return calendar
+
+    def invalidate(self, calendar_id: int) -> None:
+        with self._lock:
+            self._entries.pop(calendar_id, None)
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+                "calendars": {
+                    cid: cal.stats() for cid, (cal, _) in self._entries.items() if cal is not None
+                },
+            }
+
+
+calendar_registry = CalendarRegistry()
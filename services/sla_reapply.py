@@ -0,0 +1,373 @@
+"""
+Reaplicação em lote do SLA nos chamados abertos depois que uma política (horas, calendário),
+o vínculo subcategoria → política ou o expediente de um calendário (versão) muda. apply_sla_to_ticket só roda na criação
+e na troca de subcategoria; sem isto, os chamados abertos seguiriam com o snapshot antigo.
+
+Só o snapshot é recalculado: started_at, pausas, cumprimentos e violações já registradas
+(e notificadas) ficam como estão. Cada lote, numa transação:
+
+  1. ids de ticket_sla cujo snapshot diverge da política atual da subcategoria (keyset por id)
+  2. UPDATE ticket_sla ... JOIN tickets/subcategories/sla_policies para os SLAs em tempo corrido
+     (prazos calculados no banco)
+  3. SLAs com calendário: prazos calculados em Python e gravados num executemany
+  4. chamados que trocaram de política (ex.: subcategoria remapeada): UPDATE tickets ... JOIN
+     com a prioridade da nova política + ajuste de ticket_counters
+  5. logs sla_started em lote e commit
+
+Como o filtro é "snapshot diverge da política", repetir a operação ou retomá-la depois de uma
+interrupção só processa o que falta.
+
+    python -m services.sla_reapply [--policy-id N] [--subcategory-id N] [--dry-run]
+"""
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import and_, case, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from models import (
+    Ticket as TicketModel,
+    TicketSLA as TicketSLAModel,
+    TicketLog as TicketLogModel,
+    SubCategory as SubCategoryModel,
+    SLAPolicy as SLAPolicyModel,
+    Hotel as HotelModel,
+    SLACalendar as SLACalendarModel,
+    LogActionEnum,
+    StatusEnum,
+)
+from services.sla_calendar import add_working_time, calendar_registry
+from services.sla_service import _ensure_tz
+from services.sla_sweeper import _plus_seconds
+from services.ticket_counters import apply_bulk_changes
+
+logger = logging.getLogger(__name__)
+
+SLA_REAPPLY_CHUNK_SIZE = 500
+
+_CURRENT_CALENDAR = func.coalesce(SLAPolicyModel.calendar_id, HotelModel.sla_calendar_id)
+
+
+def _stale_filter(policy_id: int | None, subcategory_id: int | None, calendar_id: int | None = None):
+    conditions = [
+        TicketModel.status == StatusEnum.open,
+        or_(
+            TicketSLAModel.policy_id.is_(None),
+            TicketSLAModel.policy_id != SLAPolicyModel.id,
+            TicketSLAModel.first_response_hours != SLAPolicyModel.first_response_hours,
+            TicketSLAModel.resolution_hours != SLAPolicyModel.resolution_hours,
+            # Calendário pode sair (NULL) ou entrar: compara com sentinela
+            func.coalesce(TicketSLAModel.calendar_id, 0) != func.coalesce(_CURRENT_CALENDAR, 0),
+            # Mesmo calendário, editado depois da aplicação
+            func.coalesce(TicketSLAModel.calendar_version, 0) != func.coalesce(SLACalendarModel.version, 0),
+            # Prioridade fica de fora: é editável no chamado e não faz o snapshot divergir
+        ),
+    ]
+    if policy_id is not None:
+        conditions.append(SLAPolicyModel.id == policy_id)
+    if subcategory_id is not None:
+        conditions.append(SubCategoryModel.id == subcategory_id)
+    if calendar_id is not None:
+        conditions.append(or_(TicketSLAModel.calendar_id == calendar_id, _CURRENT_CALENDAR == calendar_id))
+    return and_(*conditions)
+
+
+def _stale_query(*columns):
+    return (
+        select(*columns)
+        .select_from(TicketSLAModel)
+        .join(TicketModel, TicketModel.id == TicketSLAModel.ticket_id)
+        .join(SubCategoryModel, SubCategoryModel.id == TicketModel.subcategory_id)
+        .join(SLAPolicyModel, SLAPolicyModel.id == SubCategoryModel.sla_policy_id)
+        .outerjoin(HotelModel, HotelModel.id == TicketModel.hotel_id)
+        .outerjoin(SLACalendarModel, SLACalendarModel.id == _CURRENT_CALENDAR)
+    )
+
+
+def count_stale(
+    db: Session, policy_id: int | None = None, subcategory_id: int | None = None, calendar_id: int | None = None,
+) -> int:
+    return db.execute(
+        _stale_query(func.count(TicketSLAModel.id)).where(_stale_filter(policy_id, subcategory_id, calendar_id))
+    ).scalar() or 0
+
+
+def _stale_chunk(db: Session, policy_id, subcategory_id, calendar_id, after_id: int, limit: int):
+    return db.execute(
+        _stale_query(
+            TicketSLAModel.id,
+            TicketSLAModel.ticket_id,
+            TicketSLAModel.started_at,
+            TicketSLAModel.paused_at,
+            TicketSLAModel.total_paused_seconds,
+            TicketSLAModel.policy_id.label("snapshot_policy_id"),
+            SLAPolicyModel.id.label("policy_id"),
+            SLAPolicyModel.name.label("policy_name"),
+            SLAPolicyModel.first_response_hours,
+            SLAPolicyModel.resolution_hours,
+            SLAPolicyModel.priority,
+            _CURRENT_CALENDAR.label("calendar_id"),
+            TicketModel.hotel_id,
+            TicketModel.assigned_team_id,
+            TicketModel.status,
+            TicketModel.progress,
+            TicketModel.priority.label("ticket_priority"),
+            TicketModel.assigned_to,
+        )
+        .where(_stale_filter(policy_id, subcategory_id, calendar_id), TicketSLAModel.id > after_id)
+        .order_by(TicketSLAModel.id)
+        .limit(limit)
+        .with_for_update(of=(TicketSLAModel, TicketModel))
+    ).all()
+
+
+def _update_wall_clock(db: Session, sla_ids: list[int]) -> None:
+    """Prazos em tempo corrido direto no banco: started_at + horas (+ pausado, no efetivo)."""
+    response = SLAPolicyModel.first_response_hours * 3600
+    resolution = SLAPolicyModel.resolution_hours * 3600
+    running = TicketSLAModel.paused_at.is_(None)
+    db.execute(
+        update(TicketSLAModel)
+        .where(
+            TicketSLAModel.ticket_id == TicketModel.id,
+            TicketModel.subcategory_id == SubCategoryModel.id,
+            SubCategoryModel.sla_policy_id == SLAPolicyModel.id,
+            TicketSLAModel.id.in_(sla_ids),
+        )
+        # Cada expressão parte de started_at: no UPDATE multi-tabela do MySQL a ordem das
+        # atribuições não é garantida
+        .values({
+            TicketSLAModel.policy_id: SLAPolicyModel.id,
+            TicketSLAModel.calendar_id: None,
+            TicketSLAModel.calendar_version: None,
+            TicketSLAModel.first_response_hours: SLAPolicyModel.first_response_hours,
+            TicketSLAModel.resolution_hours: SLAPolicyModel.resolution_hours,
+            TicketSLAModel.response_deadline: _plus_seconds(TicketSLAModel.started_at, response),
+            TicketSLAModel.resolution_deadline: _plus_seconds(TicketSLAModel.started_at, resolution),
+            TicketSLAModel.effective_response_deadline: case(
+                (running, _plus_seconds(TicketSLAModel.started_at, response + TicketSLAModel.total_paused_seconds)),
+                else_=None,
+            ),
+            TicketSLAModel.effective_resolution_deadline: case(
+                (running, _plus_seconds(TicketSLAModel.started_at, resolution + TicketSLAModel.total_paused_seconds)),
+                else_=None,
+            ),
+        })
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _update_calendar(db: Session, rows) -> None:
+    """SLAs com calendário: a soma de horas úteis é feita em Python, gravação em executemany."""
+    values = []
+    for r in rows:
+        calendar = calendar_registry.get(db, r.calendar_id)
+        started_at = _ensure_tz(r.started_at)
+        response = add_working_time(calendar, started_at, r.first_response_hours * 3600)
+        resolution = add_working_time(calendar, started_at, r.resolution_hours * 3600)
+        running = r.paused_at is None
+        values.append({
+            "id": r.id,
+            "policy_id": r.policy_id,
+            "calendar_id": calendar.calendar_id if calendar else None,
+            "calendar_version": calendar.version if calendar else None,
+            "first_response_hours": r.first_response_hours,
+            "resolution_hours": r.resolution_hours,
+            "response_deadline": response,
+            "resolution_deadline": resolution,
+            "effective_response_deadline":
+                add_working_time(calendar, response, r.total_paused_seconds) if running else None,
+            "effective_resolution_deadline":
+                add_working_time(calendar, resolution, r.total_paused_seconds) if running else None,
+        })
+    db.execute(update(TicketSLAModel), values)
+
+
+def _update_priorities(db: Session, rows) -> None:
+    # Como em apply_sla_to_ticket, só a troca de política impõe a prioridade dela; mudança de
+    # horas/calendário na mesma política preserva a prioridade ajustada à mão no chamado
+    changed = [
+        r for r in rows
+        if r.snapshot_policy_id != r.policy_id and r.ticket_priority != r.priority
+    ]
+    if not changed:
+        return
+    db.execute(
+        update(TicketModel)
+        .where(
+            TicketModel.subcategory_id == SubCategoryModel.id,
+            SubCategoryModel.sla_policy_id == SLAPolicyModel.id,
+            TicketModel.id.in_([r.ticket_id for r in changed]),
+        )
+        .values({TicketModel.priority: SLAPolicyModel.priority})
+        .execution_options(synchronize_session=False)
+    )
+    dims = ("hotel_id", "assigned_team_id", "status", "progress", "assigned_to")
+    apply_bulk_changes(db, [
+        (
+            {**{d: getattr(r, d) for d in dims}, "priority": r.ticket_priority},
+            {**{d: getattr(r, d) for d in dims}, "priority": r.priority},
+        )
+        for r in changed
+    ])
+
+
+def reapply_sla(
+    db: Session,
+    policy_id: int | None = None,
+    subcategory_id: int | None = None,
+    calendar_id: int | None = None,
+    chunk_size: int = SLA_REAPPLY_CHUNK_SIZE,
+    apply: bool = True,
+    progress=None,
+) -> dict:
+    """
+    Recalcula o snapshot SLA dos chamados abertos afetados (todos, se nenhum filtro).
+    progress(processados) é chamado após cada lote confirmado.
+    """
+    started = time.monotonic()
+    total = count_stale(db, policy_id, subcategory_id, calendar_id)
+    processed = chunks = calendar_rows = 0
+    after_id = 0
+
+    while apply:
+        rows = _stale_chunk(db, policy_id, subcategory_id, calendar_id, after_id, chunk_size)
+        if not rows:
+            db.rollback()
+            break
+        wall = [r for r in rows if r.calendar_id is None]
+        with_calendar = [r for r in rows if r.calendar_id is not None]
+        if wall:
+            _update_wall_clock(db, [r.id for r in wall])
+        if with_calendar:
+            _update_calendar(db, with_calendar)
+        _update_priorities(db, rows)
+        db.execute(TicketLogModel.__table__.insert(), [
+            {
+                "ticket_id": r.ticket_id,
+                "user_id": None,
+                "action": LogActionEnum.sla_started.value,
+                "value": r.policy_name,
+            }
+            for r in rows
+        ])
+        db.commit()
+
+        processed += len(rows)
+        calendar_rows += len(with_calendar)
+        chunks += 1
+        after_id = rows[-1].id
+        if progress:
+            progress(processed)
+        if len(rows) < chunk_size:
+            break
+
+    return {
+        "policy_id": policy_id,
+        "subcategory_id": subcategory_id,
+        "calendar_id": calendar_id,
+        "stale": total,
+        "updated": processed,
+        "calendar_rows": calendar_rows,
+        "chunks": chunks,
+        "applied": apply,
+        "duration_ms": round((time.monotonic() - started) * 1000, 1),
+    }
+
+
+class SLAReapplyJobs:
+    """
+    Reaplicações em segundo plano (BackgroundTasks) com progresso consultável. Uma por vez
+    por processo; cada worker só conhece os próprios jobs.
+    """
+
+    def __init__(self, keep: int = 20):
+        self.keep = keep
+        self._jobs: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def create(
+        self, policy_id: int | None, subcategory_id: int | None, calendar_id: int | None = None,
+    ) -> dict | None:
+        """Registra um job pendente; None se já há um em andamento neste processo."""
+        with self._lock:
+            if any(job["status"] in ("pending", "running") for job in self._jobs.values()):
+                return None
+            if len(self._jobs) >= self.keep:
+                oldest = min(self._jobs, key=lambda k: self._jobs[k]["created_at"])
+                del self._jobs[oldest]
+            job = {
+                "id": uuid.uuid4().hex,
+                "status": "pending",
+                "policy_id": policy_id,
+                "subcategory_id": subcategory_id,
+                "calendar_id": calendar_id,
+                "total": None,
+                "processed": 0,
+                "result": None,
+                "error": None,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "finished_at": None,
+            }
+            self._jobs[job["id"]] = job
+            return dict(job)
+
+    def _update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def run(self, job_id: str) -> None:
+        from database import SessionLocal
+
+        job = self.get(job_id)
+        self._update(job_id, status="running")
+        try:
+            with SessionLocal() as db:
+                self._update(
+                    job_id, total=count_stale(db, job["policy_id"], job["subcategory_id"], job["calendar_id"]),
+                )
+                result = reapply_sla(
+                    db, job["policy_id"], job["subcategory_id"], job["calendar_id"],
+                    progress=lambda n: self._update(job_id, processed=n),
+                )
+        except Exception as e:
+            logger.exception("Falha na reaplicação de SLA %s", job_id)
+            self._update(job_id, status="failed", error=str(e), finished_at=datetime.now(timezone.utc).isoformat())
+            return
+        self._update(job_id, status="done", result=result, finished_at=datetime.now(timezone.utc).isoformat())
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "jobs": len(self._jobs),
+                "running": sum(1 for job in self._jobs.values() if job["status"] == "running"),
+            }
+
+
+sla_reapply_jobs = SLAReapplyJobs()
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Reaplica a política de SLA atual nos chamados abertos.")
+    parser.add_argument("--policy-id", type=int)
+    parser.add_argument("--subcategory-id", type=int)
+    parser.add_argument("--calendar-id", type=int)
+    parser.add_argument("--dry-run", action="store_true", help="apenas conta os snapshots desatualizados")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        report = reapply_sla(db, args.policy_id, args.subcategory_id, args.calendar_id, apply=not args.dry_run)
+    print(json.dumps(report, indent=2, default=str))
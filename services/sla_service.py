@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 
 from sqlalchemy.orm import Session
 
@@ -8,60 +8,68 @@ from models import (
     TicketLog as TicketLogModel,
     SubCategory as SubCategoryModel,
     SLAPolicy as SLAPolicyModel,
+    Hotel as HotelModel,
     LogActionEnum,
+    ProgressEnum,
 )
+from services.sla_calendar import BusinessCalendar, add_working_time, calendar_registry, working_seconds_between
 
 
 def _now() -> datetime:
     return datetime.now(timezone.utc)
 
 
-def apply_sla_to_ticket(ticket: TicketModel, db: Session) -> TicketSLAModel | None:
+def apply_sla_to_ticket(ticket: TicketModel, db: Session, new_ticket: bool = False) -> TicketSLAModel | None:
     """
-    Cria ou substitui o registro TicketSLA com base na política da subcategoria.
+    Cria ou reinicia o registro TicketSLA com base na política da subcategoria.
     Também atualiza a prioridade do ticket para refletir a política de SLA.
     Retorna None se a subcategoria não tiver política configurada.
+    new_ticket=True (ticket recém-criado) dispensa a leitura do TicketSLA anterior.
     """
     if not ticket.subcategory_id:
         return None
 
-    subcategory = (
-        db.query(SubCategoryModel)
+    # Política pela subcategoria e calendário do hotel numa consulta, sem lazy loads
+    row = (
+        db.query(SLAPolicyModel, HotelModel.sla_calendar_id)
+        .join(SubCategoryModel, SubCategoryModel.sla_policy_id == SLAPolicyModel.id)
+        .outerjoin(HotelModel, HotelModel.id == ticket.hotel_id)
         .filter(SubCategoryModel.id == ticket.subcategory_id)
         .first()
     )
-    if not subcategory or not subcategory.sla_policy_id:
+    if not row:
         return None
-
-    policy: SLAPolicyModel = subcategory.sla_policy
-
-    # Remove registro anterior caso a subcategoria tenha mudado
-    existing = db.query(TicketSLAModel).filter(TicketSLAModel.ticket_id == ticket.id).first()
-    if existing:
-        db.delete(existing)
-        db.flush()
+    policy: SLAPolicyModel = row[0]
+    # Calendário da política tem precedência sobre o expediente do hotel
+    calendar_id = policy.calendar_id or row[1]
+    calendar = calendar_registry.get(db, calendar_id)
 
     # created_at pode ser None se o flush ainda não fez o server_default retornar
     started_at = ticket.created_at or _now()
     if started_at.tzinfo is None:
         started_at = started_at.replace(tzinfo=timezone.utc)
 
-    response_deadline = started_at + timedelta(hours=policy.first_response_hours)
-    resolution_deadline = started_at + timedelta(hours=policy.resolution_hours)
-
-    sla_record = TicketSLAModel(
-        ticket_id=ticket.id,
-        policy_id=policy.id,
-        first_response_hours=policy.first_response_hours,
-        resolution_hours=policy.resolution_hours,
-        started_at=started_at,
-        response_deadline=response_deadline,
-        resolution_deadline=resolution_deadline,
-        total_paused_seconds=0,
-        response_breached=False,
-        resolution_breached=False,
-    )
-    db.add(sla_record)
+    # Subcategoria trocada: reinicia o registro existente no lugar (sem DELETE + flush + INSERT)
+    sla_record = None if new_ticket else ticket.sla
+    if sla_record is None:
+        sla_record = TicketSLAModel(ticket_id=ticket.id)
+        db.add(sla_record)
+
+    sla_record.policy_id = policy.id
+    sla_record.calendar_id = calendar.calendar_id if calendar else None
+    sla_record.calendar_version = calendar.version if calendar else None
+    sla_record.first_response_hours = policy.first_response_hours
+    sla_record.resolution_hours = policy.resolution_hours
+    sla_record.started_at = started_at
+    sla_record.response_deadline = add_working_time(calendar, started_at, policy.first_response_hours * 3600)
+    sla_record.resolution_deadline = add_working_time(calendar, started_at, policy.resolution_hours * 3600)
+    sla_record.response_met_at = None
+    sla_record.resolution_met_at = None
+    sla_record.paused_at = None
+    sla_record.total_paused_seconds = 0
+    sla_record.response_breached = False
+    sla_record.resolution_breached = False
+    refresh_effective_deadlines(sla_record, calendar)
 
     # SLA define a prioridade do ticket automaticamente
     ticket.priority = policy.priority
@@ -84,97 +92,133 @@ def _ensure_tz(dt: datetime) -> datetime:
     return dt
 
 
-def mark_response_met(ticket: TicketModel, db: Session) -> None:
-    """Marca o prazo de primeira resposta como cumprido (ao iniciar o atendimento)."""
-    sla = db.query(TicketSLAModel).filter(TicketSLAModel.ticket_id == ticket.id).first()
-    if not sla or sla.response_met_at:
-        return
-
-    now = _now()
-    sla.response_met_at = now
-
-    # Verifica violação retroativa (normaliza timezone antes de comparar)
-    deadline = _ensure_tz(sla.response_deadline)
-    effective_deadline = deadline + timedelta(seconds=sla.total_paused_seconds)
-    if now > effective_deadline:
-        sla.response_breached = True
-
-    log = TicketLogModel(
-        ticket_id=ticket.id,
-        user_id=None,
-        action=LogActionEnum.sla_started.value,
-        value="response_met",
-    )
-    db.add(log)
+def effective_deadline(deadline: datetime, total_paused_seconds: int, calendar: BusinessCalendar | None) -> datetime:
+    """Prazo deslocado pelo tempo pausado, contado no relógio do SLA (expediente, se houver calendário)."""
+    return add_working_time(calendar, _ensure_tz(deadline), total_paused_seconds or 0)
 
 
-def pause_sla(ticket: TicketModel, db: Session) -> None:
-    """Pausa o relógio SLA (quando progress muda para 'feedback')."""
-    sla = db.query(TicketSLAModel).filter(TicketSLAModel.ticket_id == ticket.id).first()
-    if not sla or sla.paused_at:
+def refresh_effective_deadlines(sla: TicketSLAModel, calendar: BusinessCalendar | None = None) -> None:
+    """Recalcula effective_*_deadline após mudar prazo, pausa ou total pausado."""
+    if sla.paused_at:
+        sla.effective_response_deadline = None
+        sla.effective_resolution_deadline = None
         return
+    sla.effective_response_deadline = effective_deadline(sla.response_deadline, sla.total_paused_seconds, calendar)
+    sla.effective_resolution_deadline = effective_deadline(sla.resolution_deadline, sla.total_paused_seconds, calendar)
 
-    sla.paused_at = _now()
-
-    log = TicketLogModel(
-        ticket_id=ticket.id,
-        user_id=None,
-        action=LogActionEnum.sla_paused.value,
-        value=None,
-    )
-    db.add(log)
 
+class SLAClock:
+    """
+    Máquina de estados do SLA de um ticket. Lê ticket.sla uma única vez (de preferência já
+    carregado com joinedload(TicketModel.sla) na leitura com lock) e aplica as transições em
+    memória; os UPDATE/INSERT saem num único flush, no commit de quem chamou.
+    """
 
-def resume_sla(ticket: TicketModel, db: Session) -> None:
-    """Retoma o relógio SLA (quando progress sai de 'feedback')."""
-    sla = db.query(TicketSLAModel).filter(TicketSLAModel.ticket_id == ticket.id).first()
-    if not sla or not sla.paused_at:
-        return
-
-    now = _now()
-    paused_at = _ensure_tz(sla.paused_at)
+    def __init__(self, ticket: TicketModel, db: Session):
+        self.ticket = ticket
+        self.db = db
+        self.sla: TicketSLAModel | None = ticket.sla
+        self.now = _now()
+        self._calendar: BusinessCalendar | None = None
+
+    @property
+    def calendar(self) -> BusinessCalendar | None:
+        if self._calendar is None and self.sla is not None and self.sla.calendar_id:
+            self._calendar = calendar_registry.get(self.db, self.sla.calendar_id)
+        return self._calendar
+
+    def _log(self, action: LogActionEnum, value: str | None) -> None:
+        self.db.add(TicketLogModel(
+            ticket_id=self.ticket.id,
+            user_id=None,
+            action=action.value,
+            value=value,
+        ))
+
+    def _accumulate_pause(self) -> int:
+        # Com calendário, só o expediente dentro da pausa adia o prazo
+        paused_seconds = working_seconds_between(self.calendar, _ensure_tz(self.sla.paused_at), self.now)
+        self.sla.total_paused_seconds += paused_seconds
+        self.sla.paused_at = None
+        refresh_effective_deadlines(self.sla, self.calendar)
+        return paused_seconds
+
+    def mark_response_met(self) -> None:
+        """Marca o prazo de primeira resposta como cumprido (ao iniciar o atendimento)."""
+        sla = self.sla
+        if not sla or sla.response_met_at:
+            return
+
+        sla.response_met_at = self.now
+
+        # Verifica violação retroativa (normaliza timezone antes de comparar)
+        if self.now > effective_deadline(sla.response_deadline, sla.total_paused_seconds, self.calendar):
+            sla.response_breached = True
+
+        self._log(LogActionEnum.sla_started, "response_met")
+
+    def pause(self) -> None:
+        """Pausa o relógio SLA (quando progress muda para 'feedback')."""
+        if not self.sla or self.sla.paused_at:
+            return
+
+        self.sla.paused_at = self.now
+        refresh_effective_deadlines(self.sla)
+        self._log(LogActionEnum.sla_paused, None)
+
+    def resume(self) -> None:
+        """Retoma o relógio SLA (quando progress sai de 'feedback')."""
+        if not self.sla or not self.sla.paused_at:
+            return
+
+        paused_seconds = self._accumulate_pause()
+        self._log(LogActionEnum.sla_resumed, str(paused_seconds))
+
+    def mark_resolution_met(self) -> None:
+        """Marca o prazo de resolução como cumprido (ao fechar o ticket)."""
+        sla = self.sla
+        if not sla or sla.resolution_met_at:
+            return
+
+        # Se ainda estava pausado, acumula o tempo antes de finalizar
+        if sla.paused_at:
+            self._accumulate_pause()
+
+        sla.resolution_met_at = self.now
+
+        if sla.resolution_breached:
+            # Violação já registrada pela varredura (services/sla_sweeper)
+            log_action = LogActionEnum.sla_stopped
+        elif self.now > effective_deadline(sla.resolution_deadline, sla.total_paused_seconds, self.calendar):
+            sla.resolution_breached = True
+            log_action = LogActionEnum.sla_breached
+        else:
+            log_action = LogActionEnum.sla_stopped
+
+        self._log(log_action, None)
+
+    def on_progress(self, progress: str) -> None:
+        """Transições disparadas pela mudança de progress do ticket."""
+        if progress == ProgressEnum.feedback.value:
+            self.pause()
+        elif progress == ProgressEnum.in_progress.value:
+            self.resume()
+            self.mark_response_met()
+        elif progress in (ProgressEnum.awaiting_confirmation.value, ProgressEnum.done.value):
+            self.mark_resolution_met()
 
-    paused_seconds = int((now - paused_at).total_seconds())
-    sla.total_paused_seconds += paused_seconds
-    sla.paused_at = None
 
-    log = TicketLogModel(
-        ticket_id=ticket.id,
-        user_id=None,
-        action=LogActionEnum.sla_resumed.value,
-        value=str(paused_seconds),
-    )
-    db.add(log)
+def mark_response_met(ticket: TicketModel, db: Session) -> None:
+    SLAClock(ticket, db).mark_response_met()
 
 
-def mark_resolution_met(ticket: TicketModel, db: Session) -> None:
-    """Marca o prazo de resolução como cumprido (ao fechar o ticket)."""
-    sla = db.query(TicketSLAModel).filter(TicketSLAModel.ticket_id == ticket.id).first()
-    if not sla or sla.resolution_met_at:
-        return
-
-    now = _now()
+def pause_sla(ticket: TicketModel, db: Session) -> None:
+    SLAClock(ticket, db).pause()
 
-    # Se ainda estava pausado, acumula o tempo antes de finalizar
-    if sla.paused_at:
-        paused_at = _ensure_tz(sla.paused_at)
-        sla.total_paused_seconds += int((now - paused_at).total_seconds())
-        sla.paused_at = None
 
-    sla.resolution_met_at = now
+def resume_sla(ticket: TicketModel, db: Session) -> None:
+    SLAClock(ticket, db).resume()
 
-    deadline = _ensure_tz(sla.resolution_deadline)
-    effective_deadline = deadline + timedelta(seconds=sla.total_paused_seconds)
-    if now > effective_deadline:
-        sla.resolution_breached = True
-        log_action = LogActionEnum.sla_breached.value
-    else:
-        log_action = LogActionEnum.sla_stopped.value
 
-    log = TicketLogModel(
-        ticket_id=ticket.id,
-        user_id=None,
-        action=log_action,
-        value=None,
-    )
-    db.add(log)
+def mark_resolution_met(ticket: TicketModel, db: Session) -> None:
+    SLAClock(ticket, db).mark_resolution_met()
@@ -0,0 +1,313 @@
+"""
+Varredura periódica de SLA: marca como violados os chamados abertos cujo prazo efetivo
+(prazo + total_paused_seconds + pausa em andamento) já passou, sem esperar alguém mexer no
+chamado (mark_response_met / mark_resolution_met).
+
+Cada lote é uma consulta por faixa de índice (breached = 0, met_at IS NULL,
+effective_*_deadline <= agora; o prazo efetivo já vem no calendário do SLA), seguida de
+UPDATE ... WHERE id IN, INSERT em lote dos logs sla_breached e das notificações, e commit.
+A varredura para ao fim de SLA_SWEEP_MAX_SECONDS; o que sobrar fica para a próxima.
+
+    python -m services.sla_sweeper     # uma varredura, imprime o resultado
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import DateTime, and_, select, update
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.functions import FunctionElement
+
+from models import (
+    Ticket as TicketModel,
+    TicketSLA as TicketSLAModel,
+    TicketLog as TicketLogModel,
+    User as UserModel,
+    UserTeam as UserTeamModel,
+    LogActionEnum,
+    RoleEnum,
+    StatusEnum,
+)
+from services.notification_service import insert_notification_rows
+from services.sla_calendar import calendar_registry
+from services.sla_service import _ensure_tz, effective_deadline
+
+logger = logging.getLogger(__name__)
+
+SLA_SWEEP_ENABLED = os.getenv("SLA_SWEEP_ENABLED", "true").lower() in ("1", "true", "yes")
+SLA_SWEEP_INTERVAL = int(os.getenv("SLA_SWEEP_INTERVAL", 60))
+SLA_SWEEP_BATCH_SIZE = int(os.getenv("SLA_SWEEP_BATCH_SIZE", 500))
+# Tempo máximo de uma varredura; lotes já confirmados ficam, o resto espera a próxima
+SLA_SWEEP_MAX_SECONDS = float(os.getenv("SLA_SWEEP_MAX_SECONDS", 20))
+
+
+class _plus_seconds(FunctionElement):
+    """datetime + n segundos, no dialeto do banco."""
+    type = DateTime(timezone=True)
+    name = "plus_seconds"
+    inherit_cache = True
+
+
+@compiles(_plus_seconds)
+def _plus_seconds_mysql(element, compiler, **kw):
+    dt, seconds = list(element.clauses)
+    return f"TIMESTAMPADD(SECOND, {compiler.process(seconds, **kw)}, {compiler.process(dt, **kw)})"
+
+
+@compiles(_plus_seconds, "sqlite")
+def _plus_seconds_sqlite(element, compiler, **kw):
+    dt, seconds = list(element.clauses)
+    return f"datetime({compiler.process(dt, **kw)}, '+' || ({compiler.process(seconds, **kw)}) || ' seconds')"
+
+
+# kind → (prazo, prazo efetivo, cumprido em, flag de violação)
+_KINDS = {
+    "response": (
+        TicketSLAModel.response_deadline, TicketSLAModel.effective_response_deadline,
+        TicketSLAModel.response_met_at, TicketSLAModel.response_breached,
+    ),
+    "resolution": (
+        TicketSLAModel.resolution_deadline, TicketSLAModel.effective_resolution_deadline,
+        TicketSLAModel.resolution_met_at, TicketSLAModel.resolution_breached,
+    ),
+}
+
+_NOTIFICATION_TITLES = {
+    "response": "SLA de primeira resposta violado",
+    "resolution": "SLA de resolução violado",
+}
+
+
+def _overdue_batch(db: Session, kind: str, paused: bool, now: datetime, limit: int, after_id: int = 0):
+    deadline, effective, met_at, breached = _KINDS[kind]
+    if paused:
+        # effective_* é NULL enquanto pausado: o relógio parou em paused_at, então só viola
+        # se já tinha violado ao pausar (poucas linhas; filtro fora do índice). Com calendário
+        # o prazo em tempo corrido é só candidato (_paused_overdue confere); avança por id
+        overdue = and_(
+            TicketSLAModel.paused_at.isnot(None),
+            _plus_seconds(deadline, TicketSLAModel.total_paused_seconds) <= TicketSLAModel.paused_at,
+            TicketSLAModel.id > after_id,
+        )
+        order = TicketSLAModel.id
+    else:
+        overdue = effective <= now
+        order = effective
+    return db.execute(
+        select(
+            TicketSLAModel.id,
+            TicketSLAModel.ticket_id,
+            TicketSLAModel.calendar_id,
+            TicketSLAModel.paused_at,
+            TicketSLAModel.total_paused_seconds,
+            deadline.label("deadline"),
+            TicketModel.title,
+            TicketModel.assigned_to,
+            TicketModel.assigned_team_id,
+        )
+        .join(TicketModel, TicketModel.id == TicketSLAModel.ticket_id)
+        .where(
+            breached.is_(False),
+            met_at.is_(None),
+            overdue,
+            TicketModel.status == StatusEnum.open,
+        )
+        .order_by(order)
+        .limit(limit)
+        # Outro worker varrendo ao mesmo tempo espera e relê breached = 1
+        .with_for_update(of=TicketSLAModel)
+    ).all()
+
+
+def _paused_overdue(db: Session, row) -> bool:
+    """Prazo efetivo no calendário do SLA já tinha passado quando o relógio foi pausado."""
+    if row.calendar_id is None:
+        return True
+    calendar = calendar_registry.get(db, row.calendar_id)
+    return effective_deadline(row.deadline, row.total_paused_seconds, calendar) <= _ensure_tz(row.paused_at)
+
+
+def _team_agents(db: Session, team_ids: set[int]) -> dict[int, list[int]]:
+    agents: dict[int, list[int]] = {}
+    if not team_ids:
+        return agents
+    rows = db.execute(
+        select(UserTeamModel.team_id, UserTeamModel.user_id)
+        .join(UserModel, UserModel.id == UserTeamModel.user_id)
+        .where(UserTeamModel.team_id.in_(team_ids), UserModel.role == RoleEnum.agent)
+    )
+    for team_id, user_id in rows:
+        agents.setdefault(team_id, []).append(user_id)
+    return agents
+
+
+def _flag_batch(db: Session, kind: str, rows) -> None:
+    breached = _KINDS[kind][3]
+    db.execute(
+        update(TicketSLAModel)
+        .where(TicketSLAModel.id.in_([r.id for r in rows]))
+        .values({breached.key: True})
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(TicketLogModel.__table__.insert(), [
+        {
+            "ticket_id": r.ticket_id,
+            "user_id": None,
+            "action": LogActionEnum.sla_breached.value,
+            "value": f"{kind}_breached",
+        }
+        for r in rows
+    ])
+
+    # Responsável do chamado; sem responsável, os agentes da equipe
+    agents = _team_agents(db, {r.assigned_team_id for r in rows if not r.assigned_to and r.assigned_team_id})
+    notifications = []
+    for r in rows:
+        recipients = [r.assigned_to] if r.assigned_to else agents.get(r.assigned_team_id, [])
+        for user_id in recipients:
+            notifications.append({
+                "user_id": user_id,
+                "type": "sla_breached",
+                "title": _NOTIFICATION_TITLES[kind],
+                "body": f"#{r.ticket_id} {r.title}",
+                "ticket_id": r.ticket_id,
+                "mural_post_id": None,
+                "qualitor_ticket_id": None,
+                "read": False,
+            })
+    if notifications:
+        insert_notification_rows(db, notifications)
+
+
+def sweep_sla_breaches(
+    db: Session,
+    now: datetime | None = None,
+    batch_size: int = SLA_SWEEP_BATCH_SIZE,
+    max_seconds: float = SLA_SWEEP_MAX_SECONDS,
+) -> dict:
+    """Marca violações vencidas em lotes confirmados um a um; para ao estourar max_seconds."""
+    now = now or datetime.now(timezone.utc)
+    started = time.monotonic()
+    flagged = {kind: 0 for kind in _KINDS}
+    batches = 0
+    truncated = False
+
+    for kind, paused in ((k, p) for k in _KINDS for p in (False, True)):
+        after_id = 0
+        while True:
+            if time.monotonic() - started >= max_seconds:
+                truncated = True
+                break
+            rows = _overdue_batch(db, kind, paused, now, batch_size, after_id)
+            overdue = [r for r in rows if _paused_overdue(db, r)] if paused else rows
+            if not overdue:
+                db.rollback()  # libera os locks da leitura vazia
+            else:
+                _flag_batch(db, kind, overdue)
+                db.commit()
+                batches += 1
+                flagged[kind] += len(overdue)
+            if len(rows) < batch_size:
+                break
+            after_id = rows[-1].id
+        if truncated:
+            break
+
+    return {
+        "response_flagged": flagged["response"],
+        "resolution_flagged": flagged["resolution"],
+        "batches": batches,
+        "truncated": truncated,
+        "duration_ms": round((time.monotonic() - started) * 1000, 1),
+    }
+
+
+class SLASweeper:
+    """Tarefa asyncio do processo da API que roda sweep_sla_breaches a cada intervalo."""
+
+    def __init__(self, interval: int = SLA_SWEEP_INTERVAL):
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.errors = 0
+        self.total_flagged = 0
+        self.truncated_runs = 0
+        self.last_run_at: datetime | None = None
+        self.last_result: dict | None = None
+        self.last_error: str | None = None
+        self.max_duration_ms = 0.0
+
+    def run_once(self) -> dict:
+        from database import SessionLocal
+
+        try:
+            with SessionLocal() as db:
+                result = sweep_sla_breaches(db)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+                self.last_error = str(e)
+            raise
+        with self._lock:
+            self.runs += 1
+            self.last_run_at = datetime.now(timezone.utc)
+            self.last_result = result
+            self.total_flagged += result["response_flagged"] + result["resolution_flagged"]
+            self.truncated_runs += int(result["truncated"])
+            self.max_duration_ms = max(self.max_duration_ms, result["duration_ms"])
+        return result
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await run_in_threadpool(self.run_once)
+            except Exception:
+                logger.exception("Falha na varredura de SLA")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if SLA_SWEEP_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": SLA_SWEEP_ENABLED,
+                "interval_s": self.interval,
+                "running": self._task is not None and not self._task.done(),
+                "runs": self.runs,
+                "errors": self.errors,
+                "total_flagged": self.total_flagged,
+                "truncated_runs": self.truncated_runs,
+                "max_duration_ms": self.max_duration_ms,
+                "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+                "last_result": self.last_result,
+                "last_error": self.last_error,
+            }
+
+
+sla_sweeper = SLASweeper()
+
+
+if __name__ == "__main__":
+    import json
+
+    from database import SessionLocal
+
+    with SessionLocal() as db:
+        print(json.dumps(sweep_sla_breaches(db), indent=2))
@@ -2,6 +2,7 @@ from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from models import User as UserModel, Team as TeamModel, UserTeam as UserTeamModel
 from models import RoleEnum
+from services.principal_cache import invalidate_principal_on_commit
 
 def add_user_to_team_service(
     db: Session,
@@ -21,6 +22,7 @@ def add_user_to_team_service(
     )
     
     db.add(link)
+    invalidate_principal_on_commit(db, user.id)
     
 def list_team_users_service(
     team_id: int,
@@ -0,0 +1,138 @@
+"""
+Miniaturas WebP de imagens (anexos de chamado e avatares), geradas em segundo plano.
+
+A conversão roda num ProcessPoolExecutor próprio: decodificar e redimensionar imagem é CPU
+pura e, em threads, disputaria o GIL com os requests. Enquanto a miniatura não existe,
+?size=thumb serve o original.
+
+Depende do pacote `Pillow`; sem ele nada é gerado e as rotas seguem servindo o original.
+Este módulo é importado pelos processos do pool (spawn), então não importa models/database.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from config import UPLOADS_DIR
+
+logger = logging.getLogger(__name__)
+
+THUMBNAILS_DIR = os.path.join(UPLOADS_DIR, "thumbs")
+# Lado máximo da miniatura, em pixels (mantém a proporção)
+THUMBNAIL_SIZE = int(os.getenv("THUMBNAIL_SIZE", 320))
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", 80))
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", 2))
+
+THUMBNAIL_MIME_TYPES = {"image/jpeg", "image/jpg", "image/png", "image/gif", "image/webp"}
+
+
+def pillow_available() -> bool:
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def thumbnail_path(namespace: str, key: str) -> str:
+    """namespace: "attachments" (key = sha256 ou stored_name) ou "avatars" (key = arquivo)."""
+    return os.path.join(THUMBNAILS_DIR, namespace, key[:2], f"{key}.webp")
+
+
+def _render(src: str, dest: str, size: int, quality: int) -> int:
+    """Executa no processo do pool. Devolve o tamanho da miniatura em bytes."""
+    from PIL import Image, ImageOps
+
+    with Image.open(src) as img:
+        img.draft("RGB", (size, size))  # JPEG: decodifica já reduzido
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((size, size))
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if img.mode in ("LA", "P", "PA") else "RGB")
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        tmp = f"{dest}.{uuid.uuid4().hex}.part"
+        try:
+            img.save(tmp, "WEBP", quality=quality, method=4)
+            os.replace(tmp, dest)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+    return os.path.getsize(dest)
+
+
+class ThumbnailPool:
+    def __init__(self, workers: int = THUMBNAIL_WORKERS):
+        self.workers = workers
+        self.enabled = workers > 0 and pillow_available()
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._pending: set[str] = set()
+        # Imagens que o Pillow não conseguiu abrir: não reagenda a cada ?size=thumb
+        self._failed: set[str] = set()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Criado sob demanda; spawn evita herdar threads e conexões do processo da API
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def enqueue(self, src: str, dest: str) -> bool:
+        """Agenda a miniatura de src em dest; não bloqueia. False se não foi agendada."""
+        if not self.enabled or os.path.exists(dest):
+            return False
+        with self._lock:
+            if dest in self._pending or dest in self._failed:
+                return False
+            self._pending.add(dest)
+            self.submitted += 1
+            try:
+                future = self._get_executor().submit(_render, src, dest, THUMBNAIL_SIZE, THUMBNAIL_QUALITY)
+            except Exception:
+                self._pending.discard(dest)
+                self.failed += 1
+                logger.exception("Falha ao agendar miniatura de %s", src)
+                return False
+        future.add_done_callback(lambda f: self._done(dest, src, f))
+        return True
+
+    def _done(self, dest: str, src: str, future) -> None:
+        error = None if future.cancelled() else future.exception()
+        with self._lock:
+            self._pending.discard(dest)
+            if future.cancelled():
+                return
+            if error is None:
+                self.completed += 1
+                return
+            self.failed += 1
+            if len(self._failed) >= 10_000:
+                self._failed.clear()
+            self._failed.add(dest)
+        logger.warning("Miniatura não gerada para %s: %s", src, error)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "workers": self.workers,
+                "pending": len(self._pending),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+            }
+
+
+thumbnail_pool = ThumbnailPool()
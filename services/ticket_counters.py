@@ -0,0 +1,230 @@
+"""
+Contadores de tickets por (hotel, equipe, status, progress, priority, sem responsável).
+
+Os contadores são ajustados no before_flush de qualquer Session: criação, edição e exclusão de
+tickets geram deltas aplicados na mesma transação que altera o ticket. Assim as leituras do
+dashboard somam algumas centenas de linhas em vez de varrer `tickets`. Excluir uma equipe ou um
+usuário desvincula os tickets (assigned_team_id/assigned_to = NULL) e também gera deltas.
+
+Reconciliação (reconstrói a tabela e informa a divergência encontrada):
+    python -m services.ticket_counters [--dry-run]
+"""
+from collections import Counter
+
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.orm import Session
+
+from models import Team as TeamModel, Ticket as TicketModel, TicketCounter as TicketCounterModel
+from models import User as UserModel
+
+_DIMENSIONS = ("hotel_id", "assigned_team_id", "status", "progress", "priority", "assigned_to")
+
+
+def _plain(value):
+    return value.value if hasattr(value, "value") else value
+
+
+def _key(values: dict) -> tuple:
+    return (
+        values["hotel_id"],
+        values["assigned_team_id"] or 0,
+        _plain(values["status"]),
+        _plain(values["progress"]),
+        _plain(values["priority"]),
+        values["assigned_to"] is None,
+    )
+
+
+def _current_key(ticket: TicketModel) -> tuple:
+    values = {name: getattr(ticket, name) for name in _DIMENSIONS}
+    # Defaults do model ainda não foram aplicados em objetos pendentes
+    values["status"] = values["status"] or "open"
+    values["progress"] = values["progress"] or "waiting"
+    values["priority"] = values["priority"] or "low"
+    return _key(values)
+
+
+def _committed_key(session: Session, ticket: TicketModel) -> tuple:
+    state = inspect(ticket)
+    values = {}
+    for name in _DIMENSIONS:
+        history = state.attrs[name].history
+        if history.deleted:
+            values[name] = history.deleted[0]
+        elif history.unchanged:
+            values[name] = history.unchanged[0]
+        elif not history.added:
+            values[name] = getattr(ticket, name)
+        else:
+            # Atributo expirado (ex.: após commit) e reatribuído: o valor antigo não está em memória
+            row = session.connection().execute(
+                select(*(getattr(TicketModel, n) for n in _DIMENSIONS)).where(TicketModel.id == ticket.id)
+            ).one()
+            return _key(dict(zip(_DIMENSIONS, row)))
+    return _key(values)
+
+
+def _apply_deltas(session: Session, deltas: Counter) -> None:
+    conn = session.connection()
+    mysql = conn.dialect.name == "mysql"
+    for (hotel_id, team_id, status, progress, priority, unassigned), delta in deltas.items():
+        if not delta:
+            continue
+        if mysql:
+            stmt = mysql_insert(TicketCounterModel).values(
+                hotel_id=hotel_id, assigned_team_id=team_id, status=status, progress=progress,
+                priority=priority, unassigned=unassigned, count=delta,
+            )
+            conn.execute(stmt.on_duplicate_key_update(count=TicketCounterModel.count + delta))
+            continue
+        result = conn.execute(
+            update(TicketCounterModel)
+            .where(
+                TicketCounterModel.hotel_id == hotel_id,
+                TicketCounterModel.assigned_team_id == team_id,
+                TicketCounterModel.status == status,
+                TicketCounterModel.progress == progress,
+                TicketCounterModel.priority == priority,
+                TicketCounterModel.unassigned == unassigned,
+            )
+            .values(count=TicketCounterModel.count + delta)
+        )
+        if result.rowcount == 0:
+            conn.execute(TicketCounterModel.__table__.insert().values(
+                hotel_id=hotel_id, assigned_team_id=team_id, status=status, progress=progress,
+                priority=priority, unassigned=unassigned, count=delta,
+            ))
+
+
+def apply_bulk_changes(session: Session, changes) -> None:
+    """
+    Ajusta os contadores para UPDATEs em lote que não passam pelo before_flush.
+    changes: pares (valores antigos, valores novos) das dimensões de cada ticket alterado.
+    """
+    deltas: Counter = Counter()
+    for old, new in changes:
+        old_key, new_key = _key(old), _key(new)
+        if old_key != new_key:
+            deltas[old_key] -= 1
+            deltas[new_key] += 1
+    if deltas:
+        _apply_deltas(session, deltas)
+
+
+def _detach_from_deleted_owners(session: Session) -> None:
+    """
+    Sem cascade, o flush zera assigned_team_id/assigned_to dos tickets da equipe ou do usuário
+    excluído depois do before_flush, e a mudança escaparia dos contadores. Zera aqui, pelo ORM:
+    os tickets entram em session.dirty e seguem o caminho normal. A coleção seria carregada
+    pelo flush de qualquer forma.
+    """
+    for obj in list(session.deleted):
+        if isinstance(obj, TeamModel):
+            tickets, column = obj.tickets, "assigned_team_id"
+        elif isinstance(obj, UserModel):
+            tickets, column = obj.assigned_tickets, "assigned_to"
+        else:
+            continue
+        for ticket in tickets:
+            if ticket not in session.deleted:
+                setattr(ticket, column, None)
+
+
+@event.listens_for(Session, "before_flush")
+def _track_ticket_changes(session: Session, flush_context, instances) -> None:
+    _detach_from_deleted_owners(session)
+    deltas: Counter = Counter()
+    for obj in session.new:
+        if isinstance(obj, TicketModel):
+            deltas[_current_key(obj)] += 1
+    for obj in session.dirty:
+        if isinstance(obj, TicketModel) and session.is_modified(obj, include_collections=False):
+            old, new = _committed_key(session, obj), _current_key(obj)
+            if old != new:
+                deltas[old] -= 1
+                deltas[new] += 1
+    for obj in session.deleted:
+        if isinstance(obj, TicketModel):
+            deltas[_committed_key(session, obj)] -= 1
+    if deltas:
+        _apply_deltas(session, deltas)
+
+
+def reconcile_ticket_counters(db: Session, apply: bool = True) -> dict:
+    """Recalcula os contadores a partir de `tickets` e devolve as linhas divergentes."""
+    actual = Counter()
+    rows = (
+        db.query(
+            TicketModel.hotel_id,
+            func.coalesce(TicketModel.assigned_team_id, 0),
+            TicketModel.status,
+            TicketModel.progress,
+            TicketModel.priority,
+            TicketModel.assigned_to.is_(None),
+            func.count(TicketModel.id),
+        )
+        .group_by(
+            TicketModel.hotel_id,
+            func.coalesce(TicketModel.assigned_team_id, 0),
+            TicketModel.status,
+            TicketModel.progress,
+            TicketModel.priority,
+            TicketModel.assigned_to.is_(None),
+        )
+        .all()
+    )
+    for hotel_id, team_id, status, progress, priority, unassigned, cnt in rows:
+        actual[(hotel_id, team_id, _plain(status), _plain(progress), _plain(priority), bool(unassigned))] = cnt
+
+    stored = Counter()
+    for hotel_id, team_id, status, progress, priority, unassigned, cnt in db.query(
+        TicketCounterModel.hotel_id, TicketCounterModel.assigned_team_id, TicketCounterModel.status,
+        TicketCounterModel.progress, TicketCounterModel.priority, TicketCounterModel.unassigned,
+        TicketCounterModel.count,
+    ):
+        stored[(hotel_id, team_id, status, progress, priority, bool(unassigned))] += cnt
+
+    drift = []
+    for key in sorted(set(actual) | set(stored), key=str):
+        if actual[key] != stored[key]:
+            hotel_id, team_id, status, progress, priority, unassigned = key
+            drift.append({
+                "hotel_id": hotel_id, "assigned_team_id": team_id, "status": status, "progress": progress,
+                "priority": priority, "unassigned": unassigned,
+                "stored": stored[key], "actual": actual[key],
+            })
+
+    if apply and drift:
+        db.query(TicketCounterModel).delete(synchronize_session=False)
+        db.add_all([
+            TicketCounterModel(
+                hotel_id=hotel_id, assigned_team_id=team_id, status=status, progress=progress,
+                priority=priority, unassigned=unassigned, count=cnt,
+            )
+            for (hotel_id, team_id, status, progress, priority, unassigned), cnt in actual.items()
+            if cnt
+        ])
+        db.commit()
+
+    return {
+        "rows": len(actual),
+        "tickets": sum(actual.values()),
+        "drift": drift,
+        "applied": apply and bool(drift),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Reconstrói ticket_counters a partir de tickets.")
+    parser.add_argument("--dry-run", action="store_true", help="apenas reporta a divergência")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        report = reconcile_ticket_counters(db, apply=not args.dry_run)
+    print(json.dumps(report, indent=2, default=str))
@@ -1,5 +1,9 @@
 from fastapi import HTTPException
 
+import base64
+import json
+import re
+from datetime import datetime
 from math import ceil
 
 from models import TicketLog as TicketLogModel, LogActionEnum
@@ -9,17 +13,21 @@ from models import UserHotel as UserHotelModel, UserTeam as UserTeamModel
 
 from models import Category as CategoryModel, SubCategory as SubCategoryModel
 from models import Hotel as HotelModel
+from models import TicketCounter as TicketCounterModel
+from models import TicketComment as CommentModel
 from models import ProgressEnum, StatusEnum, RoleEnum
 
 from services.ticket_logs import FIELD_TO_ACTION
 from services import sla_service
+from services import ticket_counters  # noqa: F401  (registra o listener que mantém ticket_counters)
 
 from schemas import TicketCreate, TicketUpdate
 from services.authorization import ensure_can_assign_agent, ensure_user_can_access_hotel, ensure_user_can_access_ticket, get_user_accessible_hotel_ids, get_user_accessible_team_ids
 from services.permissions import can_update_ticket_field
 
 from sqlalchemy.orm import Session, joinedload, selectinload
-from sqlalchemy import or_, cast, String, select, func
+from sqlalchemy import and_, case, false, or_, select, func, union
+from sqlalchemy.dialects.mysql import match
 
 def get_ticket_service(
     ticket_id: int,
@@ -88,7 +96,13 @@ def start_ticket_service(
     current_user: UserModel,
     db: Session
 ):
-    ticket = db.query(TicketModel).filter(TicketModel.id == ticket_id).with_for_update().first()
+    ticket = (
+        db.query(TicketModel)
+        .options(joinedload(TicketModel.sla))
+        .filter(TicketModel.id == ticket_id)
+        .with_for_update()
+        .first()
+    )
     
     if not ticket: 
         raise HTTPException(status_code=404, detail="Ticket não localizado")
@@ -174,10 +188,68 @@ def create_ticket_service(
     db.add(ticket_team_assign_log)
 
     db.flush()
-    sla_service.apply_sla_to_ticket(db_ticket, db)
+    sla_service.apply_sla_to_ticket(db_ticket, db, new_ticket=True)
 
     return db_ticket
 
+# innodb_ft_min_token_size padrão; termos menores não estão no índice FULLTEXT
+_FT_MIN_TOKEN = 3
+
+
+def _fulltext_query(search: str) -> str | None:
+    """Converte o texto digitado em query BOOLEAN MODE: todas as palavras, com prefixo (`+termo*`)."""
+    words = [w for w in re.split(r"[^\w]+", search) if len(w) >= _FT_MIN_TOKEN]
+    if not words:
+        return None
+    return " ".join(f"+{w}*" for w in words)
+
+
+def _apply_search(query, search: str, db: Session, include_comments: bool):
+    """Filtra pela busca e devolve (query, ranking): expressões de relevância a ordenar (desc), talvez vazia."""
+    # Número digitado: o ticket com esse id entra junto com os que citam o número, e vem primeiro
+    id_match = TicketModel.id == int(search) if search.isdigit() else None
+    ranking = [] if id_match is None else [case((id_match, 1), else_=0)]
+
+    ft_query = _fulltext_query(search)
+    if db.get_bind().dialect.name != "mysql":
+        like = f"%{search}%"
+        text_match = or_(TicketModel.title.ilike(like), TicketModel.description.ilike(like))
+        return query.filter(text_match if id_match is None else or_(id_match, text_match)), ranking
+    if ft_query is None:
+        # Termo menor que o token do FULLTEXT: só o id, sem LIKE '%...%' varrendo description
+        return query.filter(false() if id_match is None else id_match), []
+
+    # Usa ft_tickets_title_description (e ft_ticket_comments_comment com include_comments)
+    rank = match(TicketModel.title, TicketModel.description, against=ft_query).in_boolean_mode()
+    ranking.append(rank)
+    if id_match is None and not include_comments:
+        return query.filter(rank > 0), ranking
+
+    # UNION dos ramos: um OR direto impediria o uso do FULLTEXT (e da PK, no caso do id)
+    branches = [select(TicketModel.id).where(rank > 0)]
+    if id_match is not None:
+        branches.append(select(TicketModel.id).where(id_match))
+    if include_comments:
+        comment_match = match(CommentModel.comment, against=ft_query).in_boolean_mode()
+        branches.append(select(CommentModel.ticket_id).where(comment_match > 0))
+    matching_ids = union(*branches)
+    return query.filter(TicketModel.id.in_(select(matching_ids.subquery().c[0]))), ranking
+
+
+def _encode_cursor(ticket: TicketModel) -> str:
+    raw = json.dumps([ticket.created_at.isoformat(), ticket.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, ticket_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(ticket_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
 def list_tickets_service(
     current_user: UserModel,
     db: Session,
@@ -186,9 +258,15 @@ def list_tickets_service(
     page: int = 1,
     page_size: int = 50,
 
+    # Modo cursor (keyset): ordena por (created_at, id) desc e evita OFFSET; total só sob demanda
+    pagination: str = "offset",
+    cursor: str | None = None,
+    with_total: bool = False,
+
     status: str = "open",
 
     search: str | None = None,
+    search_comments: bool = False,
     progress: str | None = None,
     priority: str | None = None,
 
@@ -249,6 +327,9 @@ def list_tickets_service(
 
     else:
 
+        if pagination == "cursor":
+            return {"items": [], "total": 0, "page_size": page_size, "next_cursor": None}
+
         return {
             "items": [],
             "total": 0,
@@ -263,30 +344,11 @@ def list_tickets_service(
             TicketModel.status == status
         )
 
-    if search:
-
-        search = search.strip()
-
-        query = query.filter(
-
-            or_(
+    ranking = []
 
-                TicketModel.title.ilike(
-                    f"%{search}%"
-                ),
+    if search and search.strip():
 
-                TicketModel.description.ilike(
-                    f"%{search}%"
-                ),
-
-                cast(
-                    TicketModel.id,
-                    String
-                ).ilike(
-                    f"%{search}%"
-                )
-            )
-        )
+        query, ranking = _apply_search(query, search.strip(), db, search_comments)
 
     if progress:
 
@@ -334,11 +396,17 @@ def list_tickets_service(
             TicketModel.assigned_to == current_user.id
         )
 
+    if pagination == "cursor":
+        return _list_tickets_keyset(query, page_size, cursor, with_total)
+
     total = query.enable_eagerloads(False).count()
 
+    # Com busca textual, mais relevantes primeiro (o modo cursor mantém a ordem por data)
+    order_by = [*(r.desc() for r in ranking), TicketModel.created_at.desc()]
+
     tickets = (
         query
-        .order_by(TicketModel.created_at.desc())
+        .order_by(*order_by)
         .offset((page - 1) * page_size)
         .limit(page_size)
         .all()
@@ -359,10 +427,47 @@ def list_tickets_service(
         ) if total else 0
     }
 
+def _list_tickets_keyset(query, page_size: int, cursor: str | None, with_total: bool) -> dict:
+    total = query.enable_eagerloads(False).count() if with_total else None
+
+    if cursor:
+        created_at, ticket_id = _decode_cursor(cursor)
+        # (created_at, id) < (c, i) por extenso: o otimizador do MySQL nem sempre faz range scan
+        # em ix_tickets_created_at_id para o row constructor; o limite em created_at abre o range
+        query = query.filter(
+            TicketModel.created_at <= created_at,
+            or_(
+                TicketModel.created_at < created_at,
+                and_(TicketModel.created_at == created_at, TicketModel.id < ticket_id),
+            ),
+        )
+
+    # Busca um item a mais só para saber se existe próxima página
+    tickets = (
+        query
+        .order_by(TicketModel.created_at.desc(), TicketModel.id.desc())
+        .limit(page_size + 1)
+        .all()
+    )
+
+    next_cursor = None
+    if len(tickets) > page_size:
+        tickets = tickets[:page_size]
+        next_cursor = _encode_cursor(tickets[-1])
+
+    return {
+        "items": tickets,
+        "total": total,
+        "page_size": page_size,
+        "next_cursor": next_cursor,
+    }
+
+
 def ticket_stats_service(current_user: UserModel, db: Session) -> dict:
     _QUALITOR_ONLY_TEAMS = {"RM1", "RM1 SAP"}
 
-    query = db.query(TicketModel.progress, func.count(TicketModel.id).label("cnt"))
+    # Soma ticket_counters em vez de varrer tickets (mesmos filtros de escopo)
+    query = db.query(TicketCounterModel.progress, func.sum(TicketCounterModel.count).label("cnt"))
 
     if current_user.role == RoleEnum.admin:
         pass
@@ -374,24 +479,24 @@ def ticket_stats_service(current_user: UserModel, db: Session) -> dict:
         )
         hotel_subq = select(UserHotelModel.hotel_id).where(UserHotelModel.user_id == current_user.id)
         query = query.filter(
-            TicketModel.assigned_team_id.in_(team_subq),
-            TicketModel.hotel_id.in_(hotel_subq),
+            TicketCounterModel.assigned_team_id.in_(team_subq),
+            TicketCounterModel.hotel_id.in_(hotel_subq),
         )
     elif current_user.role in (RoleEnum.client_manager, RoleEnum.client_receptionist):
         hotel_subq = select(UserHotelModel.hotel_id).where(UserHotelModel.user_id == current_user.id)
-        query = query.filter(TicketModel.hotel_id.in_(hotel_subq))
+        query = query.filter(TicketCounterModel.hotel_id.in_(hotel_subq))
     else:
         return {"por_progress": {}, "total_open": 0}
 
-    query = query.filter(TicketModel.status == "open")
-    rows = query.group_by(TicketModel.progress).all()
+    query = query.filter(TicketCounterModel.status == "open")
+    rows = query.group_by(TicketCounterModel.progress).having(func.sum(TicketCounterModel.count) > 0).all()
 
     por_progress = {}
     total = 0
     for progress, cnt in rows:
         key = progress.value if hasattr(progress, "value") else str(progress)
-        por_progress[key] = cnt
-        total += cnt
+        por_progress[key] = int(cnt)
+        total += int(cnt)
 
     return {"por_progress": por_progress, "total_open": total}
 
@@ -403,7 +508,14 @@ def ticket_edit_service(
     db: Session
 ):
     
-    ticket = db.query(TicketModel).filter(TicketModel.id == ticket_id).with_for_update().first()
+    # TicketSLA vem junto (e travado) na mesma leitura: os hooks SLA não consultam de novo
+    ticket = (
+        db.query(TicketModel)
+        .options(joinedload(TicketModel.sla))
+        .filter(TicketModel.id == ticket_id)
+        .with_for_update()
+        .first()
+    )
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket não localizado")
     
@@ -448,13 +560,7 @@ def ticket_edit_service(
     # Hooks SLA baseados em mudança de progress
     new_progress = update_fields.get("progress")
     if new_progress:
-        if new_progress == ProgressEnum.feedback.value:
-            sla_service.pause_sla(ticket, db)
-        elif new_progress == ProgressEnum.in_progress.value:
-            sla_service.resume_sla(ticket, db)
-            sla_service.mark_response_met(ticket, db)
-        elif new_progress in (ProgressEnum.awaiting_confirmation.value, ProgressEnum.done.value):
-            sla_service.mark_resolution_met(ticket, db)
+        sla_service.SLAClock(ticket, db).on_progress(new_progress)
 
     return ticket
 
@@ -499,7 +605,7 @@ def update_ticket_subcategory_service(
     if current_user.role not in [ RoleEnum.admin, RoleEnum.agent ]:
         raise HTTPException(status_code=403, detail="Only admins or agents can re-assign ticket's subcategory manually")
     
-    ticket = db.query(TicketModel).filter(TicketModel.id == ticket_id).first()
+    ticket = db.query(TicketModel).options(joinedload(TicketModel.sla)).filter(TicketModel.id == ticket_id).first()
 
     if not ticket:
         raise HTTPException(404, "Ticket não encontrado")
@@ -570,7 +676,7 @@ def close_ticket_service(
     current_user: UserModel,
     db: Session
 ):
-    ticket = db.query(TicketModel).filter(TicketModel.id == ticket_id).first()
+    ticket = db.query(TicketModel).options(joinedload(TicketModel.sla)).filter(TicketModel.id == ticket_id).first()
 
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket não localizado")
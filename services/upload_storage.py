@@ -0,0 +1,101 @@
+"""
+Recebimento de uploads em disco sem carregar o arquivo inteiro em memória.
+
+O arquivo é copiado em blocos para um temporário no diretório de destino (mesmo sistema de
+arquivos), abortando assim que passa do limite; o SHA-256 é calculado durante a cópia. O tipo
+real é identificado pelos primeiros bytes, não pelo content_type enviado pelo cliente. Toda a
+E/S roda no threadpool; o arquivo só aparece com o nome final via os.replace (atômico).
+"""
+import hashlib
+import os
+import uuid
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 256 * 1024))
+
+# Assinaturas (offset, bytes) → tipo. docx/xlsx são zip; doc/xls são OLE (Compound File)
+_SIGNATURES = (
+    ("jpeg", ((0, b"\xff\xd8\xff"),)),
+    ("png", ((0, b"\x89PNG\r\n\x1a\n"),)),
+    ("gif", ((0, b"GIF87a"),)),
+    ("gif", ((0, b"GIF89a"),)),
+    ("webp", ((0, b"RIFF"), (8, b"WEBP"))),
+    ("pdf", ((0, b"%PDF-"),)),
+    ("zip", ((0, b"PK\x03\x04"),)),
+    ("zip", ((0, b"PK\x05\x06"),)),
+    ("ole", ((0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"),)),
+)
+
+
+def sniff_kind(head: bytes) -> str | None:
+    """Tipo do arquivo pelos primeiros bytes; "text" para conteúdo sem bytes nulos."""
+    for kind, parts in _SIGNATURES:
+        if all(head[offset:offset + len(magic)] == magic for offset, magic in parts):
+            return kind
+    if head and b"\x00" not in head:
+        return "text"
+    return None
+
+
+def _too_large(max_size: int, label: str) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"{label} muito grande. Tamanho máximo permitido: {max_size // 1024 // 1024} MB"
+    )
+
+
+def _spool(src, dest_dir: str, max_size: int, expected_kind: str, label: str) -> tuple[str, int, str]:
+    head = src.read(UPLOAD_CHUNK_SIZE)
+    if not head:
+        raise HTTPException(status_code=400, detail="Arquivo vazio não é permitido")
+    if sniff_kind(head) != expected_kind:
+        raise HTTPException(status_code=400, detail="Conteúdo do arquivo não corresponde à extensão informada")
+
+    os.makedirs(dest_dir, exist_ok=True)
+    tmp_path = os.path.join(dest_dir, f".{uuid.uuid4()}.part")
+    size = 0
+    digest = hashlib.sha256()
+    try:
+        with open(tmp_path, "wb") as out:
+            chunk = head
+            while chunk:
+                size += len(chunk)
+                if size > max_size:
+                    raise _too_large(max_size, label)
+                out.write(chunk)
+                digest.update(chunk)
+                chunk = src.read(UPLOAD_CHUNK_SIZE)
+    except BaseException:
+        discard_upload(tmp_path)
+        raise
+    return tmp_path, size, digest.hexdigest()
+
+
+async def receive_upload(
+    file: UploadFile,
+    dest_dir: str,
+    max_size: int,
+    expected_kind: str,
+    label: str = "Arquivo",
+) -> tuple[str, int, str]:
+    """
+    Copia o upload para um temporário em dest_dir e devolve (caminho temporário, tamanho, sha256).
+    Quem chama finaliza com commit_upload ou descarta com discard_upload.
+    """
+    # Tamanho já conhecido pelo parser multipart: recusa sem copiar nada
+    if file.size is not None and file.size > max_size:
+        raise _too_large(max_size, label)
+    return await run_in_threadpool(_spool, file.file, dest_dir, max_size, expected_kind, label)
+
+
+def commit_upload(tmp_path: str, final_path: str) -> None:
+    os.replace(tmp_path, final_path)
+
+
+def discard_upload(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -8,14 +8,15 @@ from services.validations import ensure_hotels_exist, ensure_teams_exist
 
 from sqlalchemy import or_
 from sqlalchemy.exc import IntegrityError
-from passlib.context import CryptContext
+from services.password_hasher import password_hasher
 
 from services.validations import ensure_hotels_exist
 from services.authorization import get_user_accessible_hotel_ids
+from services.principal_cache import invalidate_principal, invalidate_principal_on_commit
+from services.mention_index import invalidate_mention_index, invalidate_mention_index_on_commit
 
 from sqlalchemy.orm import Session, selectinload
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def _assign_all_hotels(user_id: int, db: Session):
@@ -48,7 +49,7 @@ def create_user_service(
     created_user = UserModel(
         name=new_user.name,
         email=new_user.email,
-        password_hash=pwd_context.hash(new_user.password),
+        password_hash=password_hasher.hash(new_user.password),
         role=new_user.role,
         phone=new_user.phone or None
     )
@@ -90,6 +91,7 @@ def create_user_service(
             ]
         )
     
+    invalidate_mention_index_on_commit(db)
     db.commit()
     db.refresh(created_user)
 
@@ -174,6 +176,7 @@ def update_user_hotels_service(
         )
 
     db.flush()
+    invalidate_principal_on_commit(db, target_user.id)
 
 def update_user_teams_service(
     target_user_id: int, 
@@ -196,13 +199,15 @@ def update_user_teams_service(
 
     db.query(UserTeamModel).filter(UserTeamModel.user_id == target_user.id).delete()
 
-    for team_id in team_ids:
+    # (user_id, team_id) é único: ids repetidos no payload entram uma vez só
+    for team_id in dict.fromkeys(team_ids):
         db.add(UserTeamModel(
             user_id=target_user.id,
             team_id=team_id
         ))
 
     db.flush()
+    invalidate_principal_on_commit(db, target_user.id)
 
     
 def list_users_service(
@@ -468,10 +473,10 @@ def update_user_service(
                 raise HTTPException(status_code=400, detail="Email already in use")
             
     if "password" in update_fields:
-        if pwd_context.verify(update_fields["password"], target_user.password_hash):
+        if password_hasher.verify(update_fields["password"], target_user.password_hash):
             update_fields.pop("password")
         else:
-            update_fields["password_hash"] = pwd_context.hash(update_fields.pop("password"))
+            update_fields["password_hash"] = password_hasher.hash(update_fields.pop("password"))
             
     for field_to_update, field_value in update_fields.items():
         setattr(target_user, field_to_update, field_value)
@@ -479,6 +484,10 @@ def update_user_service(
     if update_fields.get("role") == RoleEnum.agent:
         _assign_all_hotels(target_user.id, db)
 
+    invalidate_principal_on_commit(db, target_user.id)
+    if "name" in update_fields:
+        invalidate_mention_index_on_commit(db)
+
     return target_user
 
 def delete_user_service(
@@ -494,4 +503,7 @@ def delete_user_service(
     
     db.delete(user)
     
-    db.commit()
\ No newline at end of file
+    db.commit()
+
+    invalidate_principal(target_user_id)
+    invalidate_mention_index()
\ No newline at end of file